@@ -19,4 +19,15 @@ else:
 	os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'HRMS.settings.prod')
 
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from notifications.streams import STREAM_PATH, NotificationStream
+
+notification_stream = NotificationStream()
+
+
+async def application(scope, receive, send):
+	# The notification stream is a long lived response served outside of Django's views
+	if scope["type"] == "http" and scope["path"] == STREAM_PATH:
+		return await notification_stream(scope, receive, send)
+	return await django_application(scope, receive, send)
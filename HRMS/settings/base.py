@@ -24,8 +24,85 @@ ID_Z_FILL = 4
 ATTENDANCE_ID_MAX_LENGTH = 20
 LEAVE_ID_MAX_LENGTH = 10
 
+# Add a Postgres exclusion constraint that rejects overlapping leaves
+# (that are not denied) of an employee. Has no effect on other databases.
+LEAVE_OVERLAP_CONSTRAINT = env.bool('LEAVE_OVERLAP_CONSTRAINT', default=False)
+
+# Seconds the summary counters of a list (see core.pagination) are cached for
+# each user, 0 to count them on every request
+PAGINATION_SUMMARY_CACHE_TIMEOUT = env.int('PAGINATION_SUMMARY_CACHE_TIMEOUT', default=0)
+
+# Number of rows fetched at a time when exporting data
+EXPORT_CHUNK_SIZE = 2000
+
+# Rows validated and created at a time by the bulk imports (see core.imports)
+# and the processes hashing the passwords of the employees imported by the
+# import_data command
+IMPORT_CHUNK_SIZE = env.int('IMPORT_CHUNK_SIZE', default=500)
+IMPORT_HASH_WORKERS = env.int('IMPORT_HASH_WORKERS', default=4)
+
+# Notification e-mails sent over one connection by dispatch_outbox_task, the
+# seconds it waits to group a burst of e-mails, the number of times a failing
+# e-mail is tried, the seconds before it is tried again (doubled after each
+# try) and the seconds a worker has to send a batch before another worker
+# may claim it
+OUTBOX_BATCH_SIZE = env.int('OUTBOX_BATCH_SIZE', default=100)
+OUTBOX_BATCH_DELAY = env.int('OUTBOX_BATCH_DELAY', default=5)
+OUTBOX_MAX_ATTEMPTS = env.int('OUTBOX_MAX_ATTEMPTS', default=5)
+OUTBOX_RETRY_DELAY = env.int('OUTBOX_RETRY_DELAY', default=60)
+OUTBOX_LEASE_TIMEOUT = env.int('OUTBOX_LEASE_TIMEOUT', default=300)
+
+# The attendance info, the unread counts, the list summaries and the outbox
+# dispatch flag are cached and invalidated by both the web and the celery
+# workers, so the processes must share the cache: set CACHE_URL to a redis
+# database (prod defaults to the celery broker). Without it every process has
+# its own local memory cache, which is only right for a single process.
+CACHE_URL = env('CACHE_URL', default=None)
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+
+# Seconds the attendance info of an employee is cached for
+ATTENDANCE_INFO_CACHE_TIMEOUT = 60 * 60
+
+# Seconds the unread notifications count of an employee is cached for
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = 60 * 60
+
+# Pub/sub of the notification streams (see notifications.broker), the seconds
+# between the heartbeats of a stream and the milliseconds a client waits to reconnect
+NOTIFICATION_BROKER = env('NOTIFICATION_BROKER', default='notifications.broker.InMemoryBroker')
+NOTIFICATION_BROKER_URL = env('NOTIFICATION_BROKER_URL', default='redis://localhost:6379')
+NOTIFICATION_STREAM_HEARTBEAT = env.int('NOTIFICATION_STREAM_HEARTBEAT', default=15)
+NOTIFICATION_STREAM_RETRY = env.int('NOTIFICATION_STREAM_RETRY', default=5000)
+
+# Read notifications older than NOTIFICATION_RETENTION_DAYS are deleted daily
+# by purge_notifications_task, NOTIFICATION_RETENTION_CHUNK_SIZE at a time
+NOTIFICATION_RETENTION_DAYS = env.int('NOTIFICATION_RETENTION_DAYS', default=90)
+NOTIFICATION_RETENTION_CHUNK_SIZE = env.int('NOTIFICATION_RETENTION_CHUNK_SIZE', default=1000)
+
+CELERY_BEAT_SCHEDULE = {
+    # Sends the e-mails whose dispatch could not be scheduled, e.g. when the
+    # broker was down as they were queued
+    'dispatch-outbox': {
+        'task': 'notifications.tasks.dispatch_outbox_task',
+        'schedule': timedelta(seconds=OUTBOX_RETRY_DELAY),
+    },
+    'purge-notifications': {
+        'task': 'notifications.tasks.purge_notifications_task',
+        'schedule': timedelta(days=1),
+    },
+}
+
 # Custom User Settings
 AUTH_USER_MODEL = 'users.User'
+AUTHENTICATION_BACKENDS = [
+    'users.backends.UserModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
 
 # Django All-Auth Settings
 ACCOUNT_AUTHENTICATION_METHOD = 'email'
@@ -51,6 +128,7 @@ INSTALLED_APPS = [
 
     'core.apps.CoreConfig',
     'employees.apps.EmployeesConfig',
+    'exports.apps.ExportsConfig',
     'leaves.apps.LeavesConfig',
     'jobs.apps.JobsConfig',
     'notifications.apps.NotificationsConfig',
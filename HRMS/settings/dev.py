@@ -15,7 +15,11 @@ DATABASES = {
 INTERNAL_IPS = ['127.0.0.1', 'localhost']
 
 # Email Settings
-EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+# Set to "django.core.mail.backends.smtp.EmailBackend" with EMAIL_HOST/EMAIL_PORT
+# to try the batched delivery against a local SMTP server
+EMAIL_BACKEND = env('EMAIL_BACKEND', default="django.core.mail.backends.console.EmailBackend")
+EMAIL_HOST = env('EMAIL_HOST', default="localhost")
+EMAIL_PORT = env.int('EMAIL_PORT', default=25)
 
 JWT_AUTH_SECURE = False
 
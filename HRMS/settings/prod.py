@@ -38,6 +38,15 @@ JWT_AUTH_SECURE = True
 # Celery Settings
 CELERY_BROKER_URL = env('CELERY_BROKER_URL')
 
+# Cache Settings
+# Shared by the web and the celery workers, see CACHE_URL in base
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': env('CACHE_URL', default=CELERY_BROKER_URL),
+    }
+}
+
 # File Storage Settings
 CLOUDINARY_STORAGE = {
     'CLOUD_NAME': env('CLOUDINARY_CLOUD_NAME'),
@@ -18,7 +18,9 @@ urlpatterns = [
     path('api/auth/user/', CustomUserDetailsView.as_view(), name='rest_user_details'),
     path('api/auth/', include('dj_rest_auth.urls')),
 
+    path('', include('core.urls')),
     path('', include('employees.urls')),
+    path('', include('exports.urls')),
     path('', include('jobs.urls')),
     path('', include('leaves.urls')),
     path('', include('notifications.urls')),
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from rest_framework.exceptions import ValidationError
 
+from employees.roles import EmployeeRole
+
 
 User = get_user_model()
 
@@ -61,22 +63,14 @@ def get_user_info(user, request=None, check_admin=False):
 
 			if check_admin is True:
 				employee = user.employee
-				if employee is None:
-					admin_status = None
-				elif employee.is_md is True:
-					admin_status = "md"
-				elif employee.is_hr is True:
-					admin_status = "hr"
-				elif employee.is_hod is True:
-					admin_status = "hod"
-				elif employee.is_supervisor is True:
-					admin_status = "supervisor"
+				if request is not None and request.user == user:
+					role = EmployeeRole.for_request(request)
 				else:
-					admin_status = None
+					role = EmployeeRole.for_employee(employee)
 
 				data.update({ 
-					"is_admin": user.is_staff,
-					"admin_status": admin_status,
+					"is_admin": user.is_admin is True or role.is_staff,
+					"admin_status": role.name,
 					"leaves_taken": employee.leaves_taken,
 					"leaves_remaining": employee.leaves_remaining,
 				})
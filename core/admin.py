@@ -1,3 +1,16 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import IdCounter, ImportJob
+
+
+class IdCounterAdmin(admin.ModelAdmin):
+	list_display = ("name", "value")
+	search_fields = ("name", )
+
+
+class ImportJobAdmin(admin.ModelAdmin):
+	list_display = ("id", "name", "file_format", "requested_by", "status", "date_requested")
+	list_filter = ("name", "file_format", "status", "date_requested")
+
+admin.site.register(IdCounter, IdCounterAdmin)
+admin.site.register(ImportJob, ImportJobAdmin)
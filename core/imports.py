@@ -0,0 +1,186 @@
+import csv
+import django
+import gzip
+import io
+import json
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from django.conf import settings
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, identify_hasher, make_password
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+IMPORT_CLASSES = {
+	"attendance": "employees.imports.AttendanceImport",
+	"employees": "employees.imports.EmployeeImport",
+	"leaves": "leaves.imports.LeaveImport",
+}
+
+FILE_FORMATS = ("csv", "json")
+
+
+def get_import_class(name):
+	try:
+		return import_string(IMPORT_CLASSES[name])
+	except KeyError:
+		raise LookupError(f"{name} is not a registered import")
+
+
+def get_file_format(filename):
+	name = filename.lower()
+	if name.endswith(".gz"):
+		name = name[:-3]
+	for file_format in FILE_FORMATS:
+		if name.endswith(f".{file_format}"):
+			return file_format
+	raise ValueError(f"{filename} is not a csv or json file")
+
+
+def hash_password(password):
+	# Keeps the passwords that are already hashed e.g. the ones of a fixture
+	if password and password.startswith(UNUSABLE_PASSWORD_PREFIX):
+		return password
+	if password:
+		try:
+			identify_hasher(password)
+			return password
+		except ValueError:
+			pass
+	return make_password(password or None)
+
+
+def hash_passwords(passwords, executor=None):
+	if executor is None:
+		return [hash_password(password) for password in passwords]
+	chunksize = max(1, len(passwords) // (settings.IMPORT_HASH_WORKERS * 4))
+	return list(executor.map(hash_password, passwords, chunksize=chunksize))
+
+
+class BaseImport:
+	"""
+	Creates the rows of a csv or json file in chunks of IMPORT_CHUNK_SIZE with
+	bulk_create, i.e. without sending the model signals.
+
+	Subclasses set the `name` registered in IMPORT_CLASSES and the
+	`serializer_class` that validates a row, and implement create and
+	get_fixture_rows. The rows of a chunk can also be checked against the
+	database at once in check_rows.
+	"""
+	name = None
+	serializer_class = None
+	hashes_passwords = False
+
+	def __init__(self, user=None, chunk_size=None, use_processes=False):
+		self.user = user
+		self.chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+		self.use_processes = use_processes
+		self.executor = None
+		self.errors = []
+
+	def get_fixture_rows(self, objects):
+		# objects maps the label of a model to the fields of the objects by pk
+		raise NotImplementedError('`get_fixture_rows()` must be implemented.')
+
+	def create(self, rows):
+		raise NotImplementedError('`create()` must be implemented.')
+
+	def check_rows(self, rows):
+		# Returns the rows that are valid, call add_error for the others
+		return rows
+
+	def finish(self):
+		# Called once all the chunks are created
+		pass
+
+	def add_error(self, row, errors):
+		self.errors.append(OrderedDict([("row", row["_row"]), ("errors", errors)]))
+
+	def read(self, file, file_format):
+		# file is a binary file-like object, gzip compressed or not
+		if file.read(2) == b"\x1f\x8b":
+			file.seek(0)
+			file = gzip.GzipFile(fileobj=file)
+		else:
+			file.seek(0)
+
+		if file_format == "csv":
+			yield from csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig"))
+			return
+		elif file_format != "json":
+			raise ValueError(f"{file_format} is not a valid file format")
+
+		data = json.load(file)
+		if not isinstance(data, list):
+			raise ValueError("a json file must contain a list of objects")
+		if data and isinstance(data[0], dict) and "model" in data[0] and "fields" in data[0]:
+			# A fixture as written by dumpdata e.g. data.json.gz
+			objects = defaultdict(dict)
+			for obj in data:
+				objects[obj["model"]][obj.get("pk")] = obj["fields"]
+			yield from self.get_fixture_rows(objects)
+			return
+		yield from data
+
+	def get_chunks(self, rows):
+		chunk = []
+		for number, row in enumerate(rows, start=1):
+			chunk.append((number, row))
+			if len(chunk) >= self.chunk_size:
+				yield chunk
+				chunk = []
+		if chunk:
+			yield chunk
+
+	def validate(self, chunk):
+		rows = []
+		for number, data in chunk:
+			if not isinstance(data, dict):
+				self.errors.append(OrderedDict([("row", number), ("errors", {"detail": "row must be an object"})]))
+				continue
+			# Empty cells are left out rather than validated as blank values
+			data = {key: value for key, value in data.items() if key is not None and value not in ("", None)}
+			serializer = self.serializer_class(data=data)
+			if serializer.is_valid():
+				rows.append({"_row": number, **serializer.validated_data})
+			else:
+				self.errors.append(OrderedDict([("row", number), ("errors", serializer.errors)]))
+		return self.check_rows(rows) if rows else rows
+
+	def get_executor(self):
+		# Hashing passwords is slow, it is shared by a pool of processes. Only
+		# the import_data command forks one, a worker hashes them itself.
+		if self.use_processes and self.hashes_passwords and settings.IMPORT_HASH_WORKERS > 1:
+			return ProcessPoolExecutor(max_workers=settings.IMPORT_HASH_WORKERS, initializer=django.setup)
+		return nullcontext()
+
+	def run(self, file, file_format):
+		"""
+		Imports the rows of the file and returns a report of the rows created,
+		the rows that failed with their errors and the throughput.
+		"""
+		started = time.monotonic()
+		created = total = 0
+		with self.get_executor() as executor:
+			self.executor = executor
+			for chunk in self.get_chunks(self.read(file, file_format)):
+				total += len(chunk)
+				rows = self.validate(chunk)
+				if rows:
+					with transaction.atomic():
+						created += self.create(rows)
+			self.executor = None
+		with transaction.atomic():
+			self.finish()
+		seconds = time.monotonic() - started
+		return OrderedDict([
+			("name", self.name),
+			("total", total),
+			("created", created),
+			("failed", total - created),
+			("seconds", round(seconds, 3)),
+			("rows_per_second", round(total / seconds, 1) if seconds else total),
+			("errors", sorted(self.errors, key=lambda error: error["row"])),
+		])
+
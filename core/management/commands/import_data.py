@@ -0,0 +1,31 @@
+import csv
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import IMPORT_CLASSES, FILE_FORMATS, get_file_format, get_import_class
+
+
+class Command(BaseCommand):
+	help = "Import employees, attendance or leaves from a csv or json file (gzip compressed or not)"
+
+	def add_arguments(self, parser):
+		parser.add_argument("name", choices=sorted(IMPORT_CLASSES), help="What the file contains")
+		parser.add_argument("path", help="Path of the file e.g. data.json.gz")
+		parser.add_argument("--format", choices=FILE_FORMATS, dest="file_format",
+			help="Format of the file. Taken from the file name by default.")
+		parser.add_argument("--chunk-size", type=int, help="Rows created at a time")
+
+	def handle(self, *args, **options):
+		try:
+			file_format = options["file_format"] or get_file_format(options["path"])
+			with open(options["path"], "rb") as file:
+				importer = get_import_class(options["name"])(
+					chunk_size=options["chunk_size"], use_processes=True)
+				report = importer.run(file, file_format)
+		except (csv.Error, OSError, ValueError) as error:
+			raise CommandError(error)
+
+		for error in report["errors"]:
+			self.stderr.write(f"Row {error['row']}: {error['errors']}")
+		self.stdout.write(self.style.SUCCESS(
+			f"Imported {report['created']} of {report['total']} {report['name']} in "
+			f"{report['seconds']}s ({report['rows_per_second']} rows/s), {report['failed']} failed"))
@@ -0,0 +1,39 @@
+from django.db import connections, models, transaction, IntegrityError
+from django.db.models import F
+
+
+class IdCounterManager(models.Manager):
+	def allocate(self, name, count=1, seed=None):
+		"""
+		Reserves `count` consecutive numbers of the counter `name` and returns
+		the first one. The row is locked by the update until the transaction
+		ends so concurrent inserts never get the same number. `seed` returns
+		the last number used before the counter existed.
+		"""
+		value = self._increment(name, count)
+		if value is None:
+			try:
+				with transaction.atomic(using=self.db):
+					start = seed() if seed is not None else 0
+					self.create(name=name, value=start + count)
+					return start + 1
+			except IntegrityError:
+				# Created by a concurrent insert
+				value = self._increment(name, count)
+		return value - count + 1
+
+	def _increment(self, name, count):
+		# Returns the new value of the counter or None if it does not exist
+		connection = connections[self.db]
+		if connection.vendor in ("postgresql", "sqlite") and \
+			connection.features.can_return_columns_from_insert:
+			table = connection.ops.quote_name(self.model._meta.db_table)
+			with connection.cursor() as cursor:
+				cursor.execute(f"UPDATE {table} SET value = value + %s WHERE name = %s RETURNING value",
+					[count, name])
+				row = cursor.fetchone()
+			return row[0] if row else None
+		with transaction.atomic(using=self.db):
+			if not self.filter(name=name).update(value=F("value") + count):
+				return None
+			return self.filter(name=name).values_list("value", flat=True).get()
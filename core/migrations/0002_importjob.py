@@ -0,0 +1,32 @@
+# Generated by Django 4.0.3 on 2026-10-18 22:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0001_idcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('import_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('id', models.CharField(editable=False, max_length=7, unique=True)),
+                ('name', models.CharField(max_length=50)),
+                ('file_format', models.CharField(choices=[('csv', 'CSV'), ('json', 'JSON')], max_length=4)),
+                ('file', models.FileField(upload_to='imports/')),
+                ('status', models.CharField(choices=[('C', 'Completed'), ('F', 'Failed'), ('P', 'Pending'), ('R', 'Running')], default='P', max_length=1)),
+                ('report', models.JSONField(blank=True, help_text='Rows created and failed', null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('date_requested', models.DateTimeField(auto_now_add=True)),
+                ('date_completed', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -1,3 +1,59 @@
+from django.conf import settings
 from django.db import models
+from django.urls import reverse
 
-# Create your models here.
+from .imports import FILE_FORMATS
+from .managers import IdCounterManager
+
+ID_LENGTH = settings.ID_MAX_LENGTH
+
+STATUS_CHOICES = (
+	('C', 'Completed'),
+	('F', 'Failed'),
+	('P', 'Pending'),
+	('R', 'Running'),
+)
+
+
+class IdCounter(models.Model):
+	"""
+	The last number handed out for the public IDs (e.g. emp0001) of a model,
+	see core.utils.generate_id.
+	"""
+	name = models.CharField(max_length=100, unique=True)
+	value = models.PositiveBigIntegerField(default=0)
+
+	objects = IdCounterManager()
+
+	def __str__(self):
+		return "%s - %s" % (self.name, self.value)
+
+
+class ImportJob(models.Model):
+	"""
+	An import uploaded through the API, see core.views.ImportDataView. The
+	file is stored and imported by core.tasks.import_data_task.
+	"""
+	import_id = models.BigAutoField(primary_key=True)
+	id = models.CharField(max_length=ID_LENGTH, unique=True, editable=False)
+	name = models.CharField(max_length=50)
+	file_format = models.CharField(max_length=4,
+		choices=[(file_format, file_format.upper()) for file_format in FILE_FORMATS])
+	file = models.FileField(upload_to="imports/")
+	requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+		related_name="import_jobs")
+	status = models.CharField(max_length=1, choices=STATUS_CHOICES, default="P")
+	report = models.JSONField(blank=True, null=True, help_text="Rows created and failed")
+	error = models.TextField(blank=True, null=True)
+	date_requested = models.DateTimeField(auto_now_add=True)
+	date_completed = models.DateTimeField(blank=True, null=True)
+
+	def __str__(self):
+		return f"{self.name} {self.file_format} import by {self.requested_by.email}"
+
+	def get_absolute_url(self):
+		return reverse('import-detail', kwargs={"id": self.id})
+
+	@property
+	def status_name(self):
+		return self.get_status_display().lower()
@@ -1,11 +1,38 @@
+import hashlib
+import json
+from base64 import b64decode, b64encode
 from collections import OrderedDict
+from functools import reduce
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, Q
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class CustomLimitOffsetPagination(LimitOffsetPagination):
 	# Use to pass in the queryset in get_paginated_response
 
+	# Subclasses that set the cursor_ordering, e.g. ("-date_requested", "-pk"),
+	# let the client opt in to keyset pagination with ?pagination=cursor.
+	# Pages are then found by the ordering values of the last row instead of
+	# an OFFSET, the count is null and there is no previous link.
+	cursor_ordering = None
+	cursor_query_param = "cursor"
+	pagination_query_param = "pagination"
+	invalid_cursor_message = "Invalid cursor"
+
+	# Subclasses that set the summary_filters, e.g. {"completed": Q(completed=True)},
+	# get the number of rows of the queryset matching each filter from
+	# get_summary, all counted with a single aggregate query. The counters are
+	# cached per user and request for summary_cache_timeout seconds, by default
+	# PAGINATION_SUMMARY_CACHE_TIMEOUT (0 to not cache them).
+	summary_filters = None
+	summary_cache_timeout = None
+
 	def get_paginated_response(self, data, queryset):
 		return Response(OrderedDict([
 			('count', self.count),
@@ -14,3 +41,106 @@ class CustomLimitOffsetPagination(LimitOffsetPagination):
 			('results', data),
 		]))
 
+	def get_summary_aggregates(self):
+		return {name: Count("pk", filter=q) for name, q in (self.summary_filters or {}).items()}
+
+	def get_summary(self, queryset):
+		aggregates = self.get_summary_aggregates()
+		if not aggregates:
+			return {}
+		timeout = self.summary_cache_timeout
+		if timeout is None:
+			timeout = settings.PAGINATION_SUMMARY_CACHE_TIMEOUT
+		key = self.get_summary_cache_key() if timeout else None
+		if key is not None:
+			summary = cache.get(key)
+			if summary is not None:
+				return summary
+		# Aliased so that a counter can be named after a field it filters on
+		summary = queryset.order_by().aggregate(**{f"summary_{name}": aggregate
+			for name, aggregate in aggregates.items()})
+		summary = {name: summary[f"summary_{name}"] for name in aggregates}
+		if key is not None:
+			cache.set(key, summary, timeout)
+		return summary
+
+	def get_summary_cache_key(self):
+		# The counters depend on who is viewing, the path and the filters but
+		# not on the page
+		request = self.request
+		url = request.get_full_path()
+		for param in (self.limit_query_param, self.offset_query_param,
+			self.cursor_query_param, self.pagination_query_param):
+			url = remove_query_param(url, param)
+		digest = hashlib.md5(url.encode("utf-8")).hexdigest()
+		return f"pagination:summary:{self.__class__.__name__}:{request.user.pk}:{digest}"
+
+	def paginate_queryset(self, queryset, request, view=None):
+		self.use_cursor = self.cursor_ordering is not None and \
+			request.query_params.get(self.pagination_query_param) == "cursor"
+		if not self.use_cursor:
+			return super().paginate_queryset(queryset, request, view)
+
+		self.request = request
+		self.limit = self.get_limit(request)
+		self.offset = 0
+		self.count = None
+		queryset = queryset.order_by(*self.cursor_ordering)
+		position = self.decode_cursor(request)
+		if position is not None:
+			try:
+				queryset = queryset.filter(self.get_cursor_filter(position))
+			except (DjangoValidationError, TypeError, ValueError):
+				raise NotFound(self.invalid_cursor_message)
+
+		# Fetch an extra row to know if there is a next page
+		results = list(queryset[:self.limit + 1])
+		self.has_next = len(results) > self.limit
+		page = results[:self.limit]
+		self.next_position = self.get_position(page[-1]) if self.has_next else None
+		return page
+
+	def get_next_link(self):
+		if not getattr(self, "use_cursor", False):
+			return super().get_next_link()
+		if self.next_position is None:
+			return None
+		url = remove_query_param(self.request.build_absolute_uri(), self.offset_query_param)
+		return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+	def get_previous_link(self):
+		if not getattr(self, "use_cursor", False):
+			return super().get_previous_link()
+		return None
+
+	def get_position(self, instance):
+		position = []
+		for field in self.cursor_ordering:
+			value = getattr(instance, field.lstrip("-"))
+			position.append(value if value is None or isinstance(value, int) else str(value))
+		return position
+
+	def get_cursor_filter(self, position):
+		# (a, b) < (x, y) is a < x OR (a = x AND b < y), per the direction of each field
+		conditions = []
+		for index, field in enumerate(self.cursor_ordering):
+			name = field.lstrip("-")
+			lookup = "lt" if field.startswith("-") else "gt"
+			equal = {f.lstrip("-"): value for f, value in zip(self.cursor_ordering[:index], position)}
+			conditions.append(Q(**equal, **{f"{name}__{lookup}": position[index]}))
+		return reduce(lambda a, b: a | b, conditions)
+
+	def encode_cursor(self, position):
+		return b64encode(json.dumps(position).encode("ascii")).decode("ascii")
+
+	def decode_cursor(self, request):
+		encoded = request.query_params.get(self.cursor_query_param)
+		if not encoded:
+			return None
+		try:
+			position = json.loads(b64decode(encoded.encode("ascii")).decode("ascii"))
+		except (TypeError, ValueError):
+			raise NotFound(self.invalid_cursor_message)
+		if not isinstance(position, list) or len(position) != len(self.cursor_ordering):
+			raise NotFound(self.invalid_cursor_message)
+		return position
@@ -1,10 +1,27 @@
 from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 from rest_framework.fields import empty
 
+from .models import ImportJob
+
 User = get_user_model()
 
 
+class PersonListSerializer(serializers.ListSerializer):
+    """
+    Loads the users and profiles of every person in the list
+    at once instead of once per person.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        instances = list(iterable)
+        self.child.prefetch_users(instances)
+        return [self.child.to_representation(item) for item in instances]
+
+
 class PersonSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField('get_image')
     email = serializers.SerializerMethodField('get_email')
@@ -16,6 +33,7 @@ class PersonSerializer(serializers.ModelSerializer):
     class Meta:
         fields = ('image', 'email', 'first_name', 'last_name',
             'full_name', 'active')
+        list_serializer_class = PersonListSerializer
 
     def __init__(self, instance=None, data=empty, **kwargs):
         self.meta_model = self.Meta.model if self.Meta is not None else None
@@ -29,19 +47,34 @@ class PersonSerializer(serializers.ModelSerializer):
             self.initial_data = data
         super().__init__(**kwargs)
 
-    def get_user(self, pk=None):
-        if pk is None:
+    def get_user(self, obj=None):
+        # obj is the serialized instance or its primary key
+        if obj is None:
             return None
-        instance = self.meta_model.objects.get(pk=pk)
+        instance = obj if isinstance(obj, models.Model) else self.meta_model.objects.get(pk=obj)
         if isinstance(instance, User):
             return instance
+        # Cached on the instance after the first access
         user = getattr(instance, self.relation_key)
         assert isinstance(user, User), (
             'user must be of type `<class users.models.User>`, ')
         return user
 
+    def get_prefetch_lookups(self):
+        if issubclass(self.meta_model, User):
+            lookups = ['profile']
+        else:
+            lookups = [self.relation_key, f'{self.relation_key}__profile']
+        return lookups + list(getattr(self.Meta, 'prefetch_related', ()))
+
+    def prefetch_users(self, instances):
+        # Load the users and profiles of the instances, skipping cached relations
+        if len(instances) > 0:
+            prefetch_related_objects(instances, *self.get_prefetch_lookups())
+        return instances
+
     def get_image(self, obj):
-        user = self.get_user(obj.pk)
+        user = self.get_user(obj)
         if user is None:
             return None
         request = self.context.get("request")
@@ -54,26 +87,41 @@ class PersonSerializer(serializers.ModelSerializer):
             return None
 
     def get_email(self, obj):
-        user = self.get_user(obj.pk)
+        user = self.get_user(obj)
         return user.email if user is not None else None
 
     def get_first_name(self, obj):
-        user = self.get_user(obj.pk)
+        user = self.get_user(obj)
         return user.first_name if user is not None else None
 
     def get_last_name(self, obj):
-        user = self.get_user(obj.pk)
+        user = self.get_user(obj)
         return user.last_name if user is not None else None
 
     def get_full_name(self, obj):
-        user = self.get_user(obj.pk)
+        user = self.get_user(obj)
         return user.get_full_name() if user is not None else None
 
     def get_active(self, obj):
-        user = self.get_user(obj.pk)
+        user = self.get_user(obj)
         return user.is_active if user is not None else None
 
 
+class ImportJobSerializer(serializers.ModelSerializer):
+    status = serializers.CharField(source='status_name', read_only=True)
+    url = serializers.SerializerMethodField('get_url')
+
+    class Meta:
+        model = ImportJob
+        fields = ('id', 'name', 'file_format', 'status', 'report', 'error', 'url',
+            'date_requested', 'date_completed')
+
+    def get_url(self, obj):
+        request = self.context.get('request')
+        url = obj.get_absolute_url()
+        return request.build_absolute_uri(url) if request is not None else url
+
+
 
 # data = {
 #     "image": get_profile_image(user, request),
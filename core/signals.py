@@ -0,0 +1,11 @@
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from .models import ImportJob
+from .utils import generate_id
+
+
+@receiver(pre_save, sender=ImportJob)
+def set_import_id(sender, instance, **kwargs):
+	if not instance.id:
+		instance.id = generate_id("imp", key="import_id", model=ImportJob)
@@ -0,0 +1,40 @@
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.utils.timezone import now
+
+from .imports import get_import_class
+from .models import ImportJob
+
+logger = get_task_logger(__name__)
+
+@shared_task
+def import_data_task(import_id):
+	job = ImportJob.objects.select_related('requested_by').get(import_id=import_id)
+	job.status = "R"
+	job.save(update_fields=["status"])
+	try:
+		importer = get_import_class(job.name)(job.requested_by)
+		with job.file.open("rb") as file:
+			job.report = importer.run(file, job.file_format)
+		job.status = "C"
+		logger.info(f"Imported {job.id}")
+	except Exception as exception:
+		logger.exception(f"Import {job.id} failed")
+		job.status = "F"
+		job.error = str(exception)
+	job.date_completed = now()
+	job.save()
+	return job.status
+
+
+def queue_import(job):
+	# A job that cannot be queued, e.g. while the broker is down, is failed
+	# rather than left pending
+	try:
+		import_data_task.delay(job.import_id)
+	except Exception as exception:
+		logger.exception(f"Could not queue import {job.id}")
+		job.status = "F"
+		job.error = f"could not be queued: {exception}"
+		job.date_completed = now()
+		job.save(update_fields=["status", "error", "date_completed"])
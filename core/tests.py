@@ -1,3 +1,26 @@
 from django.test import TestCase
 
-# Create your tests here.
+from core.models import IdCounter
+from core.utils import generate_id, generate_ids
+from jobs.models import Job
+
+
+class IdCounterTests(TestCase):
+	def test_allocate_ids(self):
+		self.assertEqual(IdCounter.objects.allocate("test.counter"), 1)
+		self.assertEqual(IdCounter.objects.allocate("test.counter", 10), 2)
+		self.assertEqual(IdCounter.objects.allocate("test.counter"), 12)
+		self.assertEqual(IdCounter.objects.allocate("test.other", seed=lambda: 41), 42)
+		self.assertEqual(IdCounter.objects.get(name="test.counter").value, 12)
+
+	def test_generate_ids(self):
+		job1 = Job.objects.create(name="Developer")
+		job2 = Job.objects.create(name="Designer")
+		IdCounter.objects.filter(name="jobs.job").delete()
+
+		# A missing counter starts after the existing rows
+		ids = generate_ids("job", 3, key="job_id", model=Job)
+		self.assertEqual(job1.id, "job0001")
+		self.assertEqual(job2.id, "job0002")
+		self.assertEqual(ids, ["job0003", "job0004", "job0005"])
+		self.assertEqual(generate_id("job", key="job_id", model=Job), "job0006")
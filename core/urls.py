@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .views import ImportJobView
+
+urlpatterns = [
+	path('api/imports/<str:id>/', ImportJobView.as_view(), name='import-detail'),
+]
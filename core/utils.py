@@ -1,9 +1,11 @@
+import csv
 import datetime
 from collections import OrderedDict
 from django.apps import apps as django_apps
 from django.conf import settings
-from django.core.exceptions import ValidationError
-from django.http import Http404
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db.models import Max
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import (
 	get_object_or_404 as _get_object_or_404,
 	get_list_or_404 as _get_list_or_404,
@@ -43,6 +45,11 @@ weekdays = OrderedDict({
 })
 
 
+# Default working hours of a day without overtime
+OPENING_TIME = datetime.time(7, 0, 0)
+CLOSING_TIME = datetime.time(20, 30, 0)
+
+
 def get_object_or_404(queryset, *filter_args, **filter_kwargs):
     try:
         return _get_object_or_404(queryset, *filter_args, **filter_kwargs)
@@ -92,11 +99,17 @@ def generate_id(prefix=None, **kwargs):
 	Model = kwargs.get("model", None)
 
 	if Model is not None:
-		last_object = Model.objects.last()
-		id = getattr(last_object, key) + 1 if last_object is not None else 1
-		return generate_id_value(prefix, id)
+		return generate_ids(prefix, 1, key=key, model=Model)[0]
 	raise LookupError("Provide an id value as number or a key with a Model Class or an instance")
 
+def generate_ids(prefix, count, key, model):
+	# Reserves the next `count` IDs of a model at once e.g. for bulk_create.
+	# The counter starts after the largest `key` of the existing rows.
+	IdCounter = get_app_model("core.IdCounter")
+	start = IdCounter.objects.allocate(model._meta.label_lower, count,
+		seed=lambda: model.objects.aggregate(value=Max(key))["value"] or 0)
+	return [generate_id_value(prefix, id) for id in range(start, start + count)]
+
 # A Function to return last day of week(sunday) depending on the datetime instance passed
 def get_last_date_of_week(date=now().date()):
 	current_day = weekdays.get(date.strftime('%a').lower())
@@ -106,8 +119,20 @@ def get_last_date_of_week(date=now().date()):
 
 # A Function to return last day of month depending on the datetime instance passed
 def get_last_date_of_month(date=now().date()):
-	month = 1 if date.month >= 12 else date.month + 1
-	return datetime.date(date.year, month, 1) - datetime.timedelta(days=1)
+	if date.month >= 12:
+		return datetime.date(date.year, 12, 31)
+	return datetime.date(date.year, date.month + 1, 1) - datetime.timedelta(days=1)
+
+# A Function to return the number of week days (monday to friday) between two dates inclusive
+def get_working_days(start_date, end_date):
+	if end_date < start_date:
+		return 0
+	days = (end_date - start_date).days + 1
+	weeks, remainder = divmod(days, 7)
+	# Week days in the remaining days, which start on the weekday of start_date
+	start_index = start_date.weekday()
+	extra = sum(1 for day in range(remainder) if (start_index + day) % 7 < 5)
+	return weeks * 5 + extra
 
 def get_default_hours():
 	return OrderedDict({
@@ -117,3 +142,18 @@ def get_default_hours():
 		"thu": None,
 		"fri": None,
 	})
+
+class Echo:
+	# A file-like object that returns what is written to it instead of storing it
+	def write(self, value):
+		return value
+
+def get_csv_streaming_response(filename, headers, rows):
+	# Stream the csv rows one at a time rather than building the file in memory
+	writer = csv.writer(Echo())
+	def content():
+		yield writer.writerow(headers)
+		for row in rows:
+			yield writer.writerow(row)
+	return StreamingHttpResponse(content(), content_type='text/csv',
+		headers={'Content-Disposition': f'attachment; filename="{filename}"'})
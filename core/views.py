@@ -1,8 +1,17 @@
-from rest_framework import mixins
-from rest_framework.exceptions import server_error, MethodNotAllowed
+from django.db import transaction
+from rest_framework import mixins, permissions, status
+from rest_framework.exceptions import server_error, MethodNotAllowed, NotFound, ValidationError
 from rest_framework.generics import GenericAPIView
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from common.utils import get_instance
+from .imports import FILE_FORMATS, get_file_format
 from .mixins import CustomListModelMixin
+from .models import ImportJob
+from .serializers import ImportJobSerializer
+from .tasks import queue_import
 
 
 class ListView(CustomListModelMixin, GenericAPIView):
@@ -83,3 +92,40 @@ class ListCreateRetrieveUpdateDestroyView(ListCreateRetrieveUpdateView,
 		if self.validate_lookup_field(kwargs.get(self.lookup_field, None), True) is True:
 			return self.destroy(request, *args, **kwargs)
 		return server_error(request, *args, **kwargs)
+
+
+class ImportDataView(APIView):
+	"""
+	POST a csv or json file (gzip compressed or not) as "file" to import its
+	rows with the import_class in the background, see core.imports. The format
+	is taken from the file name unless "format" is given. Returns the import
+	job, whose url gives the report once it is completed.
+	"""
+	permission_classes = (permissions.IsAdminUser, )
+	parser_classes = (MultiPartParser, )
+	import_class = None
+
+	def post(self, request, *args, **kwargs):
+		file = request.FILES.get("file", None)
+		if file is None:
+			raise ValidationError({"detail": "file is required"})
+		try:
+			file_format = request.data.get("format", None) or get_file_format(file.name)
+		except ValueError as error:
+			raise ValidationError({"detail": str(error)})
+		if file_format not in FILE_FORMATS:
+			raise ValidationError({"detail": f"{file_format} is not a valid file format"})
+		job = ImportJob.objects.create(name=self.import_class.name, file_format=file_format,
+			file=file, requested_by=request.user)
+		transaction.on_commit(lambda: queue_import(job))
+		serializer = ImportJobSerializer(job, context={"request": request})
+		return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+class ImportJobView(APIView):
+	def get(self, request, *args, **kwargs):
+		job = get_instance(ImportJob, {"id": kwargs["id"], "requested_by": request.user})
+		if job is None:
+			raise NotFound({"detail": "import does not exist"})
+		serializer = ImportJobSerializer(job, context={"request": request})
+		return Response(serializer.data)
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.cache import cache
+
+ATTENDANCE_INFO_KEY = "employees:attendance-info:%s"
+
+
+def get_attendance_info_key(employee_id):
+	return ATTENDANCE_INFO_KEY % employee_id
+
+
+def get_attendance_info(employee_id, date):
+	# Return the cached attendance info snapshot of the employee for the date
+	snapshot = cache.get(get_attendance_info_key(employee_id))
+	if snapshot is not None and snapshot.get("date") == date:
+		return snapshot
+	return None
+
+
+def set_attendance_info(employee_id, snapshot):
+	cache.set(get_attendance_info_key(employee_id), snapshot,
+		settings.ATTENDANCE_INFO_CACHE_TIMEOUT)
+
+
+def invalidate_attendance_info(employee_id):
+	# Called when an attendance or an overtime of the employee changes
+	cache.delete(get_attendance_info_key(employee_id))
@@ -0,0 +1,48 @@
+from django.db.models import Q
+
+from exports.utils import BaseExport
+from .models import Employee
+
+
+class EmployeeExport(BaseExport):
+	name = "employees"
+	sheet_name = "Employees"
+	fields = (
+		'user__first_name', 'user__last_name', 'user__email', 'department__name', 'job__name',
+		'current_status', 'supervisor__user__first_name', 'supervisor__user__last_name',
+		'supervisor__user__email', 'date_employed'
+	)
+
+	def get_headers(self):
+		return ['First Name', 'Last Name', 'E-mail', 'Department', 'Job', 'Status',
+			'Supervisor Name', 'Supervisor E-mail', 'Date Employed']
+
+	def get_data(self, emp):
+		# emp is a row of the values() projection of the fields
+		supervisor_name = None
+		if emp['supervisor__user__email'] is not None:
+			supervisor_name = f"{emp['supervisor__user__first_name']} {emp['supervisor__user__last_name']}"
+			supervisor_name = supervisor_name.strip().capitalize()
+		return [
+			emp['user__first_name'], emp['user__last_name'], emp['user__email'],
+			emp['department__name'], emp['job__name'], emp['current_status'], supervisor_name,
+			emp['supervisor__user__email'], str(emp['date_employed'])
+		]
+
+	def get_queryset(self):
+		try:
+			name = self.params.get('name', None)
+			queryset = Employee.objects.employees(
+				self.user.employee).with_status().order_by('-date_updated')
+			if name:
+				queryset = queryset.filter(
+					Q(user__first_name__icontains=name.lower()) |
+					Q(user__last_name__icontains=name.lower()) |
+					Q(user__email__icontains=name.lower()))
+			status = self.params.get('status', None)
+			if status:
+				queryset = queryset.filter(current_status__iexact=status)
+			return queryset
+		except:
+			pass
+		return Employee.objects.with_status().none()
@@ -0,0 +1,235 @@
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+
+from core.imports import BaseImport, hash_passwords
+from core.utils import generate_ids
+from jobs.models import Job
+from users.models import GENDER_CHOICES, Profile
+from .cache import invalidate_attendance_info
+from .models import Attendance, Department, Employee, EmployeeHierarchy
+from .roles import invalidate_roles
+
+User = get_user_model()
+
+
+def get_fixture_email(objects, employee_pk):
+	# The e-mail of an employee of a fixture, which is how the imports refer to employees
+	employee = objects["employees.employee"].get(employee_pk)
+	if employee is None:
+		return None
+	return objects["users.user"].get(employee["user"], {}).get("email")
+
+
+def get_employees(emails):
+	return dict(Employee.objects.filter(user__email__in=emails).values_list("user__email", "pk"))
+
+
+class EmployeeImportSerializer(serializers.Serializer):
+	email = serializers.EmailField(max_length=255)
+	first_name = serializers.CharField(max_length=150)
+	last_name = serializers.CharField(max_length=150)
+	password = serializers.CharField(required=False, trim_whitespace=False)
+	gender = serializers.ChoiceField(choices=GENDER_CHOICES, default="M")
+	phone = serializers.CharField(max_length=20, required=False)
+	address = serializers.CharField(required=False)
+	job = serializers.CharField(max_length=50, required=False)
+	department = serializers.CharField(max_length=50, required=False)
+	supervisor = serializers.EmailField(required=False)
+	is_hr = serializers.BooleanField(default=False)
+	is_md = serializers.BooleanField(default=False)
+
+	def validate_email(self, value):
+		return value.strip().lower()
+
+	def validate_department(self, value):
+		return value.lower()
+
+	def validate_supervisor(self, value):
+		return value.strip().lower()
+
+
+class EmployeeImport(BaseImport):
+	"""
+	Creates the users, profiles and employees of the rows. The jobs and
+	departments are looked up by name and created if missing. A new employee
+	without a password gets the upper cased last name, as in UserSerializer.
+	"""
+	name = "employees"
+	serializer_class = EmployeeImportSerializer
+	hashes_passwords = True
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.emails = set()
+		self.employees = []
+		# The supervisors are set once all the employees exist
+		self.supervisors = {}
+
+	def get_fixture_rows(self, objects):
+		users = objects["users.user"]
+		profiles = {fields["user"]: fields for fields in objects["users.profile"].values()}
+		jobs = objects["jobs.job"]
+		departments = objects["employees.department"]
+		for fields in objects["employees.employee"].values():
+			user = users.get(fields["user"], {})
+			profile = profiles.get(fields["user"], {})
+			yield {
+				"email": user.get("email"),
+				"first_name": user.get("first_name"),
+				"last_name": user.get("last_name"),
+				"password": user.get("password"),
+				"gender": profile.get("gender"),
+				"phone": profile.get("phone"),
+				"address": profile.get("address"),
+				"job": jobs.get(fields["job"], {}).get("name"),
+				"department": departments.get(fields["department"], {}).get("name"),
+				"supervisor": get_fixture_email(objects, fields["supervisor"]),
+				"is_hr": fields["is_hr"],
+				"is_md": fields["is_md"],
+			}
+
+	def check_rows(self, rows):
+		existing = set(User.objects.filter(
+			email__in=[row["email"] for row in rows]).values_list("email", flat=True))
+		valid = []
+		for row in rows:
+			if row["email"] in existing or row["email"] in self.emails:
+				self.add_error(row, {"email": ["user with specified email already exists"]})
+				continue
+			self.emails.add(row["email"])
+			valid.append(row)
+		return valid
+
+	def get_or_create_by_name(self, model, names):
+		instances = {instance.name: instance for instance in model.objects.filter(name__in=names)}
+		for name in set(names) - set(instances):
+			instances[name] = model.objects.create(name=name)
+		return instances
+
+	def create(self, rows):
+		count = len(rows)
+		jobs = self.get_or_create_by_name(Job, {row["job"] for row in rows if "job" in row})
+		departments = self.get_or_create_by_name(
+			Department, {row["department"] for row in rows if "department" in row})
+		passwords = hash_passwords(
+			[row.get("password") or row["last_name"].upper() for row in rows], self.executor)
+
+		User.objects.bulk_create([
+			User(id=id, email=row["email"], first_name=row["first_name"],
+				last_name=row["last_name"], password=password)
+			for id, row, password in zip(generate_ids("usr", count, "user_id", User), rows, passwords)
+		])
+		users = {user.email: user for user in User.objects.filter(email__in=[row["email"] for row in rows])}
+		Profile.objects.bulk_create([
+			Profile(id=id, user=users[row["email"]], gender=row["gender"],
+				phone=row.get("phone"), address=row.get("address"))
+			for id, row in zip(generate_ids("ple", count, "profile_id", Profile), rows)
+		])
+		Employee.objects.bulk_create([
+			Employee(id=id, user=users[row["email"]], job=jobs.get(row.get("job")),
+				department=departments.get(row.get("department")), is_hr=row["is_hr"], is_md=row["is_md"])
+			for id, row in zip(generate_ids("emp", count, "employee_id", Employee), rows)
+		])
+		employees = {emp.user_id: emp for emp in Employee.objects.filter(user__in=users.values())}
+		EmployeeHierarchy.objects.bulk_create([
+			EmployeeHierarchy(ancestor=emp, descendant=emp, depth=0) for emp in employees.values()])
+
+		for row in rows:
+			employee = employees[users[row["email"]].pk]
+			self.employees.append(employee)
+			if "supervisor" in row:
+				self.supervisors[employee.pk] = (row, row["supervisor"])
+		return count
+
+	def finish(self):
+		if not self.employees:
+			return
+		by_pk = {emp.pk: emp for emp in self.employees}
+		supervisors = get_employees({email for _, email in self.supervisors.values()})
+		for pk, (row, email) in self.supervisors.items():
+			supervisor_id = supervisors.get(email)
+			if supervisor_id is None:
+				self.add_error(row, {"supervisor": [f"employee {email} does not exist, the supervisor was not set"]})
+			elif supervisor_id != pk:
+				by_pk[pk].supervisor_id = supervisor_id
+
+		for emp in self.employees:
+			# An employee cannot end up under itself
+			seen, supervisor_id = {emp.pk}, emp.supervisor_id
+			while supervisor_id in by_pk:
+				if supervisor_id in seen:
+					self.add_error(self.supervisors[emp.pk][0], {
+						"supervisor": ["an employee cannot be supervised by an employee under them"]})
+					emp.supervisor_id = None
+					break
+				seen.add(supervisor_id)
+				supervisor_id = by_pk[supervisor_id].supervisor_id
+
+		Employee.objects.bulk_update([emp for emp in self.employees if emp.supervisor_id], ["supervisor"])
+		EmployeeHierarchy.objects.link_many(self.employees)
+		invalidate_roles()
+
+
+class AttendanceImportSerializer(serializers.Serializer):
+	employee = serializers.EmailField()
+	date = serializers.DateField()
+	punch_in = serializers.TimeField()
+	punch_out = serializers.TimeField(required=False)
+
+	def validate_employee(self, value):
+		return value.strip().lower()
+
+	def validate(self, data):
+		if data.get("punch_out") and data["punch_in"] > data["punch_out"]:
+			raise serializers.ValidationError({
+				"punch_out": "Invalid Time. Punch in time is greater than punch out time."})
+		return data
+
+
+class AttendanceImport(BaseImport):
+	name = "attendance"
+	serializer_class = AttendanceImportSerializer
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.dates = set()
+		self.employee_ids = set()
+
+	def get_fixture_rows(self, objects):
+		for fields in objects["employees.attendance"].values():
+			yield {
+				"employee": get_fixture_email(objects, fields["employee"]),
+				"date": fields["date"],
+				"punch_in": fields["punch_in"],
+				"punch_out": fields["punch_out"],
+			}
+
+	def check_rows(self, rows):
+		employees = get_employees({row["employee"] for row in rows})
+		existing = set(Attendance.objects.filter(employee__in=employees.values(),
+			date__in={row["date"] for row in rows}).values_list("employee_id", "date"))
+		valid = []
+		for row in rows:
+			row["employee_id"] = employees.get(row["employee"])
+			key = (row["employee_id"], row["date"])
+			if row["employee_id"] is None:
+				self.add_error(row, {"employee": ["employee with specified email does not exist"]})
+			elif key in existing or key in self.dates:
+				self.add_error(row, {"date": ["employee already has an attendance on this date"]})
+			else:
+				self.dates.add(key)
+				valid.append(row)
+		return valid
+
+	def create(self, rows):
+		Attendance.objects.bulk_create([
+			Attendance(id=id, employee_id=row["employee_id"], date=row["date"],
+				punch_in=row["punch_in"], punch_out=row.get("punch_out"))
+			for id, row in zip(generate_ids("atd", len(rows), "attendance_id", Attendance), rows)
+		])
+		self.employee_ids.update(row["employee_id"] for row in rows)
+		return len(rows)
+
+	def finish(self):
+		for employee_id in self.employee_ids:
+			invalidate_attendance_info(employee_id)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from employees.models import ProjectFile
+
+
+class Command(BaseCommand):
+	help = "Store the size and checksum of the project files uploaded before they were stored"
+
+	def add_arguments(self, parser):
+		parser.add_argument("--batch-size", type=int, default=100, help="Files updated at a time")
+		parser.add_argument("--all", action="store_true", dest="all_files",
+			help="Read the size and checksum of every file again")
+
+	def handle(self, *args, **options):
+		queryset = ProjectFile.objects.order_by("pk")
+		if not options["all_files"]:
+			queryset = queryset.filter(Q(size__isnull=True) | Q(checksum__isnull=True))
+
+		updated, failed, batch = 0, 0, []
+		for instance in queryset.iterator(chunk_size=options["batch_size"]):
+			try:
+				instance.set_file_info()
+			except (OSError, ValueError) as error:
+				# e.g. the file was deleted from the storage
+				failed += 1
+				self.stderr.write(f"Could not read the file of project file {instance.pk}: {error}")
+				continue
+			finally:
+				instance.file.close()
+			batch.append(instance)
+			if len(batch) >= options["batch_size"]:
+				updated += ProjectFile.objects.bulk_update(batch, ["size", "checksum"])
+				batch = []
+		if batch:
+			updated += ProjectFile.objects.bulk_update(batch, ["size", "checksum"])
+		self.stdout.write(self.style.SUCCESS(f"Updated {updated} project files, {failed} failed"))
@@ -1,36 +1,134 @@
 import datetime
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from django.db import models
-from django.db.models import Q
+from django.db.models import Case, Count, Exists, OuterRef, Q, Sum, Value, When
 from django.utils.timezone import now
 from rest_framework.exceptions import PermissionDenied, ValidationError
 
 from core.utils import (
 	weekdays, 
+	get_app_model,
 	get_last_date_of_week, 
 	get_last_date_of_month,
-	get_default_hours
+	get_default_hours,
+	get_working_days,
+	OPENING_TIME,
+	CLOSING_TIME
 )
 
+
+def get_expected_hours(employee_ids, start_date, end_date):
+	"""
+	Return the hours the employees are expected to work between start_date
+	and end_date (inclusive) as { employee pk: hours }, i.e. the working hours
+	of every week day plus the approved overtime on those days, in one query.
+	"""
+	Overtime = get_app_model("leaves.Overtime")
+	day_hours = (datetime.datetime.combine(start_date, CLOSING_TIME) - 
+		datetime.datetime.combine(start_date, OPENING_TIME)).total_seconds() / (60 * 60)
+	base_hours = get_working_days(start_date, end_date) * day_hours
+
+	employee_ids = list(employee_ids)
+	overtime = dict(Overtime.objects.filter(employee_id__in=employee_ids, a_md="A",
+		date__gte=start_date, date__lte=end_date).exclude(
+		date__week_day__in=[1, 7]).values('employee_id').annotate( # Sunday and Saturday
+		total=Sum('hours')).values_list('employee_id', 'total'))
+	return OrderedDict((pk, base_hours + overtime.get(pk, 0)) for pk in employee_ids)
+
+
 # Querysets
 
 
 class EmployeeQuerySet(models.QuerySet):
 	def get_employees(self, emp):
-		if emp.is_md:
+		role = emp.role
+		if role.is_md:
 			return self.exclude(is_md=True)
-		elif emp.is_hr:
+		elif role.is_hr:
 			return self.exclude(Q(is_md=True) | Q(is_hr=True))
-		elif emp.is_hod:
+		elif role.is_hod:
 			return self.exclude(
 				Q(is_md=True) | 
 				Q(is_hr=True) |
 				Q(id=emp.id)).filter(department__hod=emp)
-		elif emp.is_supervisor:
-			return self.filter(supervisor=emp)
+		elif role.is_supervisor:
+			return self.under(emp)
 		else:
 			return self.none()
 
+	def with_status(self):
+		# Annotate "Active", "On Leave" or "Inactive" as returned by Employee.status
+		Leave = get_app_model("leaves.Leave")
+		today = now().date()
+		return self.annotate(
+			on_leave=Exists(Leave.objects.filter(employee=OuterRef('pk'), a_md="A",
+				start_date__lte=today, end_date__gt=today)),
+			current_status=Case(
+				When(user__is_active=False, then=Value("Inactive")),
+				When(on_leave=True, then=Value("On Leave")),
+				default=Value("Active"),
+				output_field=models.CharField()
+			)
+		)
+
+	def get_status_count(self):
+		queryset = self if "current_status" in self.query.annotations else self.with_status()
+		return queryset.aggregate(
+			active=Count('pk', filter=Q(current_status="Active")),
+			inactive=Count('pk', filter=Q(current_status="Inactive")),
+			on_leave=Count('pk', filter=Q(current_status="On Leave"))
+		)
+
+	def under(self, emp, depth=None):
+		# Employees supervised by emp directly or indirectly (any depth by default)
+		lookups = {"ancestor_links__ancestor": emp, "ancestor_links__depth__gte": 1}
+		if depth is not None:
+			lookups["ancestor_links__depth__lte"] = depth
+		return self.filter(**lookups)
+
+	def get_org_chart(self, root=None):
+		# Build the supervisor tree from a single query
+		queryset = self.filter(ancestor_links__ancestor=root) if root is not None else self
+		rows = queryset.order_by('user__first_name', 'user__last_name', 'id').values(
+			'employee_id', 'id', 'supervisor_id', 'user__first_name', 'user__last_name',
+			'user__email', 'job__name', 'department__name')
+
+		nodes = OrderedDict()
+		for row in rows:
+			nodes[row['employee_id']] = OrderedDict([
+				('id', row['id']),
+				('full_name', f"{row['user__first_name']} {row['user__last_name']}".strip()),
+				('email', row['user__email']),
+				('job', row['job__name']),
+				('department', row['department__name']),
+				('supervisor', row['supervisor_id']),
+				('children', []),
+			])
+
+		tree = []
+		for node in nodes.values():
+			parent = nodes.get(node['supervisor'])
+			if parent is None:
+				tree.append(node)
+			else:
+				parent['children'].append(node)
+		for node in nodes.values():
+			parent = nodes.get(node['supervisor'])
+			node['supervisor'] = parent['id'] if parent is not None else None
+		return tree
+
+	def get_expected_hours(self, start_date, end_date):
+		# Expected hours of every employee in the queryset, e.g. a whole department
+		return get_expected_hours(self.values_list('pk', flat=True), start_date, end_date)
+
+	def with_roles(self):
+		# Annotate the hod and supervisor flags used by employees.roles.EmployeeRole
+		Department = get_app_model("employees.Department")
+		return self.annotate(
+			role_is_hod=Exists(Department.objects.filter(hod=OuterRef('pk'))),
+			role_is_supervisor=Exists(self.model.objects.filter(supervisor=OuterRef('pk')))
+		)
+
 
 # Managers
 
@@ -120,8 +218,9 @@ class AttendanceManager(models.Manager):
 			"hours": hours
 		})
 
-	def get_hours(self, instance):
-		# instance should be an Attendance model instance
+	def get_hours(self, instance, overtime_hours=None):
+		# instance should be an Attendance model instance.
+		# overtime_hours is the approved overtime for the day, looked up if not given
 		if not instance:
 			return None
 		if not instance.punch_in:
@@ -136,7 +235,8 @@ class AttendanceManager(models.Manager):
 			# Check if the employee is doing overtime and the hours to closing time
 			current_time = now().time()
 
-			emp_times = instance.employee.get_open_and_close_time(instance.date)
+			emp_times = instance.employee.get_open_and_close_time(
+				instance.date, overtime_hours=overtime_hours)
 			closing_time = emp_times.get('close')
 
 			if closing_time < current_time:
@@ -167,15 +267,13 @@ class AttendanceManager(models.Manager):
 			employee = attendance.employee # Get the employee on that instance and the date below
 			last_date_of_the_week = get_last_date_of_week(attendance.date)
 
-		last_day = weekdays.get(last_date_of_the_week.strftime('%a').lower()) # Should return Sunday
-
-		day_index = last_day.get("index") # Get the week day by the index. Should return 6
+		start_date = last_date_of_the_week - datetime.timedelta(days=6) # Monday
+		end_date = last_date_of_the_week - datetime.timedelta(days=2) # Friday
+		hours = self.get_timesheet(employee, start_date, end_date)[employee.pk]
 
-		week_hours["mon"] = self.get_hours(self.get_attendance_instance(employee, last_date_of_the_week - datetime.timedelta(days=6)))
-		week_hours["tue"] = self.get_hours(self.get_attendance_instance(employee, last_date_of_the_week - datetime.timedelta(days=5)))
-		week_hours["wed"] = self.get_hours(self.get_attendance_instance(employee, last_date_of_the_week - datetime.timedelta(days=4)))
-		week_hours["thu"] = self.get_hours(self.get_attendance_instance(employee, last_date_of_the_week - datetime.timedelta(days=3)))
-		week_hours["fri"] = self.get_hours(self.get_attendance_instance(employee, last_date_of_the_week - datetime.timedelta(days=2)))
+		for day in week_hours.keys():
+			week_hours[day] = hours.get(start_date + datetime.timedelta(
+				days=weekdays[day]["index"]), None)
 		return week_hours
 
 	def get_month_hours(self, emp=None, date=now().date()):
@@ -184,12 +282,39 @@ class AttendanceManager(models.Manager):
 		start_date = datetime.date(date.year, date.month, 1) # Get Start Date of the month
 		end_date = get_last_date_of_month(date) # Get End Date of the month
 
-		atds = self.filter( # Get All Attendance between start and end date inclusive
-			Q(employee=emp, date__gte=start_date) & 
-			Q(employee=emp, date__lte=end_date))
-
-		hours = [self.get_hours(atd) for atd in atds]
-		return hours
+		hours = self.get_timesheet(emp, start_date, end_date)[emp.pk]
+		return list(hours.values())
+
+	def get_timesheet(self, employees, start_date, end_date):
+		"""
+		Return the hours of the attendance of the employees between start_date
+		and end_date (inclusive) as { employee pk: { date: hours info } }.
+		Uses a query for the attendance and at most one for the overtime
+		whatever the number of employees and days.
+		"""
+		Overtime = get_app_model("leaves.Overtime")
+		if isinstance(employees, models.Model):
+			employees = [employees]
+		employees = OrderedDict((emp.pk, emp) for emp in employees)
+		timesheet = OrderedDict((pk, OrderedDict()) for pk in employees.keys())
+
+		atds = list(self.filter(employee_id__in=employees.keys(),
+			date__gte=start_date, date__lte=end_date).order_by('date'))
+
+		# The closing time (and so the overtime) is only needed for today's open attendance
+		today = now().date()
+		open_atds = [atd.employee_id for atd in atds if atd.date == today and (
+			atd.punch_in and not atd.punch_out)]
+		overtime = {}
+		if len(open_atds) > 0:
+			overtime = dict(Overtime.objects.filter(employee_id__in=open_atds, date=today,
+				a_md="A").values_list('employee_id', 'hours'))
+
+		for atd in atds:
+			atd.employee = employees[atd.employee_id]
+			timesheet[atd.employee_id][atd.date] = self.get_hours(
+				atd, overtime_hours=overtime.get(atd.employee_id, 0))
+		return timesheet
 
 	def get_attendance_instance(self, emp, date):
 		instance = self.filter(employee=emp, date=date).first()
@@ -204,6 +329,98 @@ class EmployeeManager(models.Manager):
 	def employees(self, emp):
 		return self.get_queryset().get_employees(emp)
 
+	def with_roles(self):
+		return self.get_queryset().with_roles()
+
+	def with_status(self):
+		return self.get_queryset().with_status()
+
+	def under(self, emp, depth=None):
+		return self.get_queryset().under(emp, depth)
+
+	def get_org_chart(self, root=None):
+		return self.get_queryset().get_org_chart(root)
+
+	def get_expected_hours(self, start_date, end_date):
+		return self.get_queryset().get_expected_hours(start_date, end_date)
+
+
+class EmployeeHierarchyManager(models.Manager):
+	"""
+	Maintains the closure table of the supervisor hierarchy, i.e. one row
+	for every (ancestor, descendant) pair and the distance between them.
+	"""
+
+	def link(self, emp):
+		# Add a new employee below its supervisor
+		links = [self.model(ancestor=emp, descendant=emp, depth=0)]
+		if emp.supervisor_id is not None:
+			for ancestor_id, depth in self.filter(
+				descendant_id=emp.supervisor_id).values_list('ancestor_id', 'depth'):
+				links.append(self.model(ancestor_id=ancestor_id, descendant=emp, depth=depth + 1))
+		return self.bulk_create(links)
+
+	def link_many(self, employees):
+		"""
+		Like link for employees created without signals, whose supervisors
+		can be among them. Each employee must already be linked to itself.
+		"""
+		by_pk = {emp.pk: emp for emp in employees}
+		ancestors = defaultdict(list)
+		outside = {emp.supervisor_id for emp in employees} - set(by_pk) - {None}
+		for descendant_id, ancestor_id, depth in self.filter(descendant_id__in=outside).values_list(
+			'descendant_id', 'ancestor_id', 'depth'):
+			ancestors[descendant_id].append((ancestor_id, depth))
+
+		def get_ancestors(pk):
+			# The ancestors of a new employee are its supervisor's plus the supervisor
+			if pk not in by_pk or pk in ancestors:
+				return ancestors[pk]
+			ancestors[pk] = [(pk, 0)]
+			supervisor_id = by_pk[pk].supervisor_id
+			if supervisor_id is not None:
+				ancestors[pk] += [(ancestor_id, depth + 1) for ancestor_id, depth in get_ancestors(supervisor_id)]
+			return ancestors[pk]
+
+		links = []
+		for emp in employees:
+			links.extend(self.model(ancestor_id=ancestor_id, descendant_id=emp.pk, depth=depth)
+				for ancestor_id, depth in get_ancestors(emp.pk) if depth > 0)
+		return self.bulk_create(links)
+
+	def detach(self, emp, subtree=None):
+		# Cut emp (and everyone under it) from its supervisors
+		if subtree is None:
+			subtree = list(self.filter(ancestor=emp).values_list('descendant_id', flat=True))
+		ancestors = list(self.filter(descendant=emp, depth__gte=1).values_list('ancestor_id', flat=True))
+		return self.filter(descendant_id__in=subtree, ancestor_id__in=ancestors).delete()
+
+	def detach_reports(self, emp):
+		# Cut everyone under emp from emp and its supervisors
+		subtree = list(self.filter(ancestor=emp, depth__gte=1).values_list('descendant_id', flat=True))
+		ancestors = list(self.filter(descendant=emp).values_list('ancestor_id', flat=True))
+		return self.filter(descendant_id__in=subtree, ancestor_id__in=ancestors).delete()
+
+	def move(self, emp):
+		# Re-attach emp and everyone under it below its current supervisor
+		subtree = list(self.filter(ancestor=emp).values_list('descendant_id', 'depth'))
+		if len(subtree) == 0:
+			return self.link(emp)
+		self.detach(emp, subtree=[pk for pk, _ in subtree])
+		if emp.supervisor_id is None:
+			return []
+		ancestors = list(self.filter(descendant_id=emp.supervisor_id).values_list(
+			'ancestor_id', 'depth'))
+		return self.bulk_create([
+			self.model(ancestor_id=ancestor_id, descendant_id=descendant_id,
+				depth=ancestor_depth + descendant_depth + 1)
+			for ancestor_id, ancestor_depth in ancestors
+			for descendant_id, descendant_depth in subtree
+		])
+
+	def is_under(self, emp, supervisor_id):
+		return self.filter(ancestor=emp, descendant_id=supervisor_id).exists()
+
 
 """
 
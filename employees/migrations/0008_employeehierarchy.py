@@ -0,0 +1,49 @@
+# Generated by Django 4.0.3 on 2026-10-18 21:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_hierarchy(apps, schema_editor):
+    Employee = apps.get_model('employees', 'Employee')
+    EmployeeHierarchy = apps.get_model('employees', 'EmployeeHierarchy')
+
+    supervisors = dict(Employee.objects.values_list('employee_id', 'supervisor_id'))
+    links = []
+    for employee_id in supervisors:
+        ancestor_id, depth, seen = employee_id, 0, set()
+        while ancestor_id is not None and ancestor_id not in seen:
+            links.append(EmployeeHierarchy(
+                ancestor_id=ancestor_id, descendant_id=employee_id, depth=depth))
+            seen.add(ancestor_id)
+            ancestor_id = supervisors.get(ancestor_id)
+            depth += 1
+    EmployeeHierarchy.objects.bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0007_remove_project_verified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeHierarchy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='employees.employee')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='employees.employee')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='employeehierarchy',
+            index=models.Index(fields=['ancestor', 'depth'], name='employees_e_ancesto_c7cb1f_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='employeehierarchy',
+            unique_together={('ancestor', 'descendant')},
+        ),
+        migrations.RunPython(build_hierarchy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.3 on 2026-10-18 21:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0008_employeehierarchy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectfile',
+            name='checksum',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='projectfile',
+            name='size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
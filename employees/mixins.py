@@ -1,11 +1,14 @@
 import datetime
 from collections import OrderedDict
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Q, Sum
 from django.utils.timezone import now
 
-from common.utils import get_instance
-from core.utils import weekdays, get_app_model, get_last_date_of_week, get_last_date_of_month
+from core.utils import (
+	get_app_model, get_last_date_of_week, get_last_date_of_month, OPENING_TIME, CLOSING_TIME
+)
+from .managers import get_expected_hours
+from .roles import EmployeeRole
 
 LEAVE_TOTAL = settings.LEAVE_TOTAL
 
@@ -19,14 +22,20 @@ class EmployeeModelMixin:
 	def attendance_model(self):
 		return get_app_model("employees.Attendance")
 
+	@property
+	def role(self):
+		return EmployeeRole.for_employee(self)
+
 	@property
 	def is_supervisor(self):
-		if self.supervised_emps.count() > 0:
-			return True
-		return False
+		return self.role.is_supervisor
 
 	@property
 	def is_on_leave(self):
+		# Use the value annotated by EmployeeQuerySet.with_status if available
+		on_leave = getattr(self, "on_leave", None)
+		if on_leave is not None:
+			return on_leave
 		# Get all approved leaves with start date less than or equal to today
 		# And end_dates greater than today
 		active_leaves_count = self.user.employee.leaves.filter(a_md="A",
@@ -38,6 +47,9 @@ class EmployeeModelMixin:
 
 	@property
 	def status(self):
+		current_status = getattr(self, "current_status", None)
+		if current_status is not None:
+			return current_status
 		if self.user.is_active:
 			if self.is_on_leave is False:
 				return "Active"
@@ -46,21 +58,17 @@ class EmployeeModelMixin:
 
 	@property
 	def is_hod(self):
-		Department = get_app_model("employees.Department")
-		dep = get_instance(Department, {"hod__user": self.user})
-		if dep:
-			return True
-		return False
+		return self.role.is_hod
 
 	@property
 	def leaves_taken(self):
-		emp = self.user.employee
-		current_year = now().date().year
-		leaves = emp.leaves.filter(a_md="A", start_date__year=current_year)
-		return leaves.count()
+		# Days of approved leaves this year, read from the LeaveBalance ledger
+		balances = self.leave_balances.filter(year=now().date().year)
+		return balances.aggregate(days_taken=Sum("days_taken"))["days_taken"] or 0
 
 	@property
 	def leaves_remaining(self):
+		# LEAVE_TOTAL is the allowance of a year for all the leave types
 		return LEAVE_TOTAL - self.leaves_taken
 
 	@property
@@ -80,45 +88,40 @@ class EmployeeModelMixin:
 		EmployeeModel = self.employee_model
 		return EmployeeModel.objects.filter(supervisor__user=self.user)
 
+	@property
+	def subordinates(self):
+		# Everyone under this employee, at any depth
+		EmployeeModel = self.employee_model
+		return EmployeeModel.objects.under(self)
+
 	def has_active_leave(self, start_date, end_date=None):
 		assert end_date is not None, ('Provide End Date')
 		# A method to check if the employee has an active leave in the range of dates
-		leaves = self.user.employee.leaves.filter(a_md="A") # Get active leaves
-		for leave in leaves:
-			if (leave.start_date <= start_date <= leave.end_date) or (
-				leave.start_date <= end_date <= leave.end_date):
-				return True
-		return False
+		return self.leaves.filter(a_md="A").overlapping(start_date, end_date).exists()
 
 	def has_pending_leave(self, start_date, end_date=None):
 		assert end_date is not None, ('Provide End Date')
 		# A method to check if the employee has a pending leave in the range of dates
-		leaves = self.user.employee.leaves.exclude(Q(a_md="A") | Q(a_md="D") # Remove all active and denied leaves
-			| Q(a_hr="D") | Q(a_hod="D") | Q(a_s="D"))
-		for leave in leaves:
-			if (leave.start_date <= start_date <= leave.end_date) or (
-				leave.start_date <= end_date <= leave.end_date):
-				return True
-		return False
+		return self.leaves.exclude(Q(a_md="A") | Q(a_md="D") # Remove all active and denied leaves
+			| Q(a_hr="D") | Q(a_hod="D") | Q(a_s="D")).overlapping(start_date, end_date).exists()
 
 	def has_pending_or_active_leave(self, start_date, end_date=None):
 		assert end_date is not None, ('Provide End Date')
 		# A method to check if the employee has a pending or active leave in the range of dates
-		leaves = self.user.employee.leaves.exclude(Q(a_md="D") # Remove all denied leaves
-			| Q(a_hr="D") | Q(a_hod="D") | Q(a_s="D"))
-		for leave in leaves:
-			if (leave.start_date <= start_date <= leave.end_date) or (
-				leave.start_date <= end_date <= leave.end_date):
-				if leave.a_md == "A":
-					return [True, f"You are on leave from {leave.start_date} to {leave.end_date}"]
-				return [True, f"You have pending leave request from {leave.start_date} to {leave.end_date}"]
+		leave = self.leaves.exclude(Q(a_md="D") # Remove all denied leaves
+			| Q(a_hr="D") | Q(a_hod="D") | Q(a_s="D")).overlapping(start_date, end_date).order_by(
+			'start_date').values('start_date', 'end_date', 'a_md').first()
+		if leave is not None:
+			if leave["a_md"] == "A":
+				return [True, f"You are on leave from {leave['start_date']} to {leave['end_date']}"]
+			return [True, f"You have pending leave request from {leave['start_date']} to {leave['end_date']}"]
 		return [False, "You do not have pending nor active leave."]
 
 	def total_hours_for_the_day(self, date=now().date(), **kwargs):
 		# A method that returns the total hours an employee should or
 		# is expected to spend for the day
 		wo = kwargs.get('wo', False) # wo stands for 'without overtime'
-		times = self.get_open_and_close_time(date, wo=wo)
+		times = self.get_open_and_close_time(date, wo=wo, overtime_hours=kwargs.get('overtime_hours'))
 		open_time = times.get('open')
 		close_time = times.get('close')
 		opening_time = datetime.timedelta(
@@ -140,16 +143,9 @@ class EmployeeModelMixin:
 	def total_hours_for_the_week(self, date=now().date()):
 		# A method that returns the total hours an employee should or
 		# is expected to spend for the week
-
-		AttendanceModel = self.attendance_model
 		last_date_of_the_week = get_last_date_of_week(date)
-		mon = self.total_hours_for_the_day(last_date_of_the_week - datetime.timedelta(days=6))
-		tue = self.total_hours_for_the_day(last_date_of_the_week - datetime.timedelta(days=5))
-		wed = self.total_hours_for_the_day(last_date_of_the_week - datetime.timedelta(days=4))
-		thu = self.total_hours_for_the_day(last_date_of_the_week - datetime.timedelta(days=3))
-		fri = self.total_hours_for_the_day(last_date_of_the_week - datetime.timedelta(days=2))
-
-		return mon + tue + wed + thu + fri
+		return self.total_hours_for_the_period(
+			last_date_of_the_week - datetime.timedelta(days=6), last_date_of_the_week)
 
 	def total_hours_spent_for_the_week(self, date=now().date()):
 		# A method that returns the total hours an employee
@@ -176,21 +172,18 @@ class EmployeeModelMixin:
 
 		start_date = datetime.date(date.year, date.month, 1)
 		end_date = get_last_date_of_month(date)
-		hours = 0
-		while start_date <= end_date:
-			day_index = weekdays.get(start_date.strftime('%a').lower()).get("index")
-			if day_index > 4:
-				hours += 0
-			else:
-				hours += self.total_hours_for_the_day(start_date)
-			start_date += datetime.timedelta(days=1)
-		return hours
+		return self.total_hours_for_the_period(start_date, end_date)
+
+	def total_hours_for_the_period(self, start_date, end_date):
+		# A method that returns the total hours an employee should or
+		# is expected to spend on the week days between both dates
+		return get_expected_hours([self.pk], start_date, end_date)[self.pk]
 
 	def total_hours_spent_for_the_month(self, date=now().date()):
 		# A method that returns the total hours an employee
 		# spent for the month
 		AttendanceModel = self.attendance_model
-		atds = AttendanceModel.objects.get_month_hours(self.user.employee) # Get hours for each valid attendance in the month
+		atds = AttendanceModel.objects.get_month_hours(self.user.employee, date) # Get hours for each valid attendance in the month
 		hours = 0
 		for atd in atds:
 			hours += atd.get('hours', 0)
@@ -206,15 +199,19 @@ class EmployeeModelMixin:
 
 	def get_open_and_close_time(self, date=now().date(), **kwargs):
 		wo = kwargs.get('wo', False) # wo stands for 'without overtime'
+		# The approved overtime hours for the date if already known
+		overtime_hours = kwargs.get('overtime_hours', None)
 
-		open_time = datetime.time(7, 0, 0)
-		closing_time = datetime.time(20, 30, 0)
+		open_time = OPENING_TIME
+		closing_time = CLOSING_TIME
 
 		if wo:
 			return OrderedDict({"open": open_time, "close": closing_time})	
-		overtime = self.has_overtime(date)
-		close_time = datetime.time(closing_time.hour + overtime.hours, 
-			closing_time.minute, closing_time.second) if overtime else closing_time
+		if overtime_hours is None:
+			overtime = self.has_overtime(date)
+			overtime_hours = overtime.hours if overtime else 0
+		close_time = datetime.time(closing_time.hour + overtime_hours, 
+			closing_time.minute, closing_time.second) if overtime_hours else closing_time
 		return OrderedDict({"open": open_time, "close": close_time})
 
 	def get_supervisor(self, attr="name"):
@@ -232,15 +229,16 @@ class EmployeeModelMixin:
 
 	def relinquish_status(self):
 		Department = get_app_model("employees.Department")
-		for dep in Department.objects.filter(hod__user=self.user):
-			dep.hod = None
-			dep.save()
-		for emp in self.supervised_emps:
-			emp.supervisor = None
-			emp.save()
+		EmployeeHierarchy = get_app_model("employees.EmployeeHierarchy")
+		Department.objects.filter(hod=self).update(hod=None)
+		EmployeeHierarchy.objects.detach_reports(self)
+		self.supervised_emps.update(supervisor=None)
+		# Requests waiting on self as a supervisor or hod have no one to wait on anymore
+		self.awaiting_leaves.update(awaiting=None)
+		self.awaiting_overtime.update(awaiting=None)
 		self.is_hr = False
 		self.is_md = False
-		return self.save()
+		return self.save() # Also resets the memoized roles
 
 	def has_overtime(self, date=now().date()):
 		overtime = self.user.employee.overtime.filter(date=date, a_md='A')
@@ -248,12 +246,7 @@ class EmployeeModelMixin:
 
 	def has_pending_overtime(self, date=now().date()):
 		# A method to check if the employee has a pending overtime for this date
-		overtime = self.user.employee.overtime.filter(date=date)
-		for ov in overtime:
-			# Check if any admin denied it and if the md approved it them return False
-			if ov.a_s == "D" or ov.a_hod == "D" or ov.a_hr == "D" or ov.a_md == "D" or ov.a_md == "A":
-				pass
-			else:
-				return True
-		return False
+		# i.e. not denied by any admin nor approved by the md
+		return self.overtime.filter(date=date).exclude(Q(a_s="D") | Q(a_hod="D") | Q(a_hr="D")
+			| Q(a_md="D") | Q(a_md="A")).exists()
 
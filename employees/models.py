@@ -1,3 +1,4 @@
+import hashlib
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
@@ -6,7 +7,7 @@ from django.utils.timezone import now
 
 from common.utils import get_instance
 from jobs.models import Job
-from .managers import AttendanceManager, EmployeeManager
+from .managers import AttendanceManager, EmployeeManager, EmployeeHierarchyManager
 from .mixins import EmployeeModelMixin
 
 ATTENDANCE_ID_LENGTH = settings.ATTENDANCE_ID_MAX_LENGTH
@@ -71,6 +72,25 @@ class Employee(models.Model, EmployeeModelMixin):
 		return reverse('employee-detail', kwargs={"id": self.id})
 
 
+class EmployeeHierarchy(models.Model):
+	"""
+	Closure table of the supervisor hierarchy, kept up to date by the
+	Employee signals. Every employee is linked to itself with a depth of 0.
+	"""
+	ancestor = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="descendant_links")
+	descendant = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="ancestor_links")
+	depth = models.PositiveIntegerField()
+
+	objects = EmployeeHierarchyManager()
+
+	class Meta:
+		unique_together = ["ancestor", "descendant"]
+		indexes = [models.Index(fields=["ancestor", "depth"])]
+
+	def __str__(self):
+		return '%s - %s (%s)' % (self.ancestor, self.descendant, self.depth)
+
+
 class Holiday(models.Model):
 	holiday_id = models.BigAutoField(primary_key=True)
 	id = models.CharField(max_length=ID_LENGTH, unique=True, editable=False)
@@ -135,11 +155,21 @@ class ProjectFile(models.Model):
 	uploaded_by = models.ForeignKey(Employee, on_delete=models.SET_NULL, blank=True, null=True)
 	file = models.FileField(upload_to=file_folder)
 	file_type = models.CharField(max_length=50, verbose_name='type')
+	size = models.PositiveBigIntegerField(blank=True, null=True)
+	checksum = models.CharField(max_length=64, blank=True, null=True)
 	date = models.DateTimeField(auto_now=True)
 
 	def __str__(self):
 		return "%s - %s" % (self.project.name,self.name)
 
+	def set_file_info(self):
+		# Stored so that listing the files needs no call to the storage
+		checksum = hashlib.sha256()
+		for chunk in self.file.chunks():
+			checksum.update(chunk)
+		self.size = self.file.size
+		self.checksum = checksum.hexdigest()
+
 
 class Task(models.Model):
 	task_id = models.BigAutoField(primary_key=True)
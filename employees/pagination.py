@@ -1,16 +1,27 @@
 from collections import OrderedDict
+from django.db.models import Max, Q
 from rest_framework.response import Response
 
 from core.pagination import CustomLimitOffsetPagination
 from .models import Employee
 
 
+class AttendancePagination(CustomLimitOffsetPagination):
+	cursor_ordering = ("-date", "-pk")
+
+
 class ClientPagination(CustomLimitOffsetPagination):
+	summary_filters = {
+		"active": Q(contact__is_active=True),
+		"inactive": Q(contact__is_active=False),
+	}
+
 	def get_paginated_response(self, data, queryset):
+		summary = self.get_summary(queryset)
 		return Response(OrderedDict([
-			('active', queryset.filter(contact__is_active=True).count()),
+			('active', summary["active"]),
 			('count', self.count),
-			('inactive', queryset.filter(contact__is_active=False).count()),
+			('inactive', summary["inactive"]),
 			('next', self.get_next_link()),
 			('previous', self.get_previous_link()),
 			('results', data),
@@ -19,35 +30,38 @@ class ClientPagination(CustomLimitOffsetPagination):
 
 class EmployeePagination(CustomLimitOffsetPagination):
 	def get_paginated_response(self, data, queryset):
+		status_count = self.get_status_count(self.request.user.employee)
 		return Response(OrderedDict([
-			('active', self.get_employee_count(self.request.user.employee, "active")),
+			('active', status_count["active"]),
 			('count', self.count),
-			('inactive', self.get_employee_count(self.request.user.employee, "inactive")),
-			('on_leave', self.get_employee_count(self.request.user.employee, "on leave")),
+			('inactive', status_count["inactive"]),
+			('on_leave', status_count["on_leave"]),
 			('next', self.get_next_link()),
 			('previous', self.get_previous_link()),
 			('results', data),
 		]))
 
-	def get_employee_count(self, employee, status):
+	def get_status_count(self, employee):
 		try:
-			emp_count = 0
-			for emp in Employee.objects.employees(employee):
-				if emp.status.lower() == status:
-					emp_count += 1
-			return emp_count
+			return Employee.objects.employees(employee).get_status_count()
 		except:
 			pass
-		return 0
+		return {"active": 0, "inactive": 0, "on_leave": 0}
 
 
 class ProjectPagination(CustomLimitOffsetPagination):
+	summary_filters = {
+		"completed": Q(completed=True),
+		"ongoing": Q(completed=False),
+	}
+
 	def get_paginated_response(self, data, queryset):
+		summary = self.get_summary(queryset)
 		return Response(OrderedDict([
 			('count', self.count),
 			('total', self.count),
-			('completed', queryset.filter(completed=True).count()),
-			('ongoing', queryset.filter(completed=False).count()),
+			('completed', summary["completed"]),
+			('ongoing', summary["ongoing"]),
 			('next', self.get_next_link()),
 			('previous', self.get_previous_link()),
 			('results', data),
@@ -55,24 +69,35 @@ class ProjectPagination(CustomLimitOffsetPagination):
 
 
 class TaskPagination(CustomLimitOffsetPagination):
+	summary_filters = {
+		"completed": Q(completed=True),
+		"ongoing": Q(completed=False),
+	}
+
+	def get_summary_aggregates(self):
+		# The tasks are the ones of a single project, it is read with the counters
+		aggregates = super().get_summary_aggregates()
+		aggregates["project_id"] = Max("project__id")
+		aggregates["project_name"] = Max("project__name")
+		return aggregates
+
 	def get_paginated_response(self, data, queryset):
+		summary = self.get_summary(queryset)
 		return Response(OrderedDict([
-			('project', self.get_project(queryset, self.count)),
+			('project', self.get_project(summary, self.count)),
 			('total', self.count),
-			('completed', queryset.filter(completed=True).count()),
-			('ongoing', queryset.filter(completed=False).count()),
+			('completed', summary["completed"]),
+			('ongoing', summary["ongoing"]),
 			('count', self.count),
 			('next', self.get_next_link()),
 			('previous', self.get_previous_link()),
 			('results', data),
 		]))
 
-	def get_project(self, queryset, count):
-		if not queryset or count <= 0:
+	def get_project(self, summary, count):
+		if not count or summary["project_id"] is None:
 			return None
-		project = queryset.first().project
 		return {
-			"name": project.name,
-			"id": project.id
+			"name": summary["project_name"],
+			"id": summary["project_id"]
 		}
-		
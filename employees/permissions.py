@@ -1,5 +1,19 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from .roles import EmployeeRole
+
+
+def is_hr_or_md(request):
+	role = EmployeeRole.for_request(request)
+	return role is not None and (role.is_hr or role.is_md)
+
+
+def is_staff(request):
+	if request.user.is_admin is True:
+		return True
+	role = EmployeeRole.for_request(request)
+	return role is not None and role.is_staff
+
 
 class IsEmployee(BasePermission):
 	"""
@@ -18,7 +32,7 @@ class IsHROrMDOrReadOnly(BasePermission):
     def has_permission(self, request, view):
         return bool(
             (request.user.is_anonymous is False and request.user.is_active and request.method in SAFE_METHODS) or
-            request.user.is_authenticated and (request.user.employee.is_hr or request.user.employee.is_md))
+            request.user.is_authenticated and is_hr_or_md(request))
 
 
 class IsHROrMD(BasePermission):
@@ -30,9 +44,9 @@ class IsHROrMD(BasePermission):
         valid = False
         try:
             valid = bool(
-            request.user.is_anonymous is False and request.user.is_staff and
+            request.user.is_anonymous is False and
             request.user.is_authenticated and request.user.is_active and
-            (request.user.employee.is_hr or request.user.employee.is_md))
+            is_hr_or_md(request))
         except:
             pass
         return valid
@@ -48,9 +62,8 @@ class IsHROrMDOrAdminUser(BasePermission):
         try:
             valid = bool(
             request.user.is_anonymous is False and request.user.is_active and (
-            request.method in SAFE_METHODS and request.user.is_staff) or
-            request.user.is_authenticated and
-            (request.user.employee.is_hr or request.user.employee.is_md))
+            request.method in SAFE_METHODS and is_staff(request)) or
+            request.user.is_authenticated and is_hr_or_md(request))
         except:
             pass
         return valid
@@ -67,7 +80,7 @@ class IsHROrMDOrLeaderOrReadOnlyEmployee(BasePermission):
             return False
         if request.method in SAFE_METHODS and request.user.is_employee:
             return True
-        if request.user.is_employee and (request.user.employee.is_hr or request.user.employee.is_md):
+        if request.user.is_employee and is_hr_or_md(request):
             return True
         return False
 
@@ -83,7 +96,7 @@ class IsHROrMDOrLeaderOrReadOnlyEmployeeAndClient(BasePermission):
             return False
         if request.method in SAFE_METHODS and (request.user.is_client or request.user.is_employee):
             return True
-        if request.user.is_employee and (request.user.employee.is_hr or request.user.employee.is_md):
+        if request.user.is_employee and is_hr_or_md(request):
             return True
         return False
 
@@ -0,0 +1,93 @@
+from django.core.exceptions import ObjectDoesNotExist
+
+from core.utils import get_app_model
+
+# Incremented whenever an Employee or Department is saved or deleted
+# (see employees.signals) so that memoized roles are resolved again
+# instead of going stale.
+_roles_version = 0
+
+
+def invalidate_roles():
+	global _roles_version
+	_roles_version += 1
+
+
+class EmployeeRole:
+	"""
+	The administrative roles (md, hr, hod, supervisor) of an employee.
+	Resolved in one query and memoized on the employee instance and the request.
+	"""
+
+	def __init__(self, is_md=False, is_hr=False, is_hod=False, is_supervisor=False):
+		self.is_md = bool(is_md)
+		self.is_hr = bool(is_hr)
+		self.is_hod = bool(is_hod)
+		self.is_supervisor = bool(is_supervisor)
+		self.version = _roles_version
+
+	def __repr__(self):
+		return f"<EmployeeRole: {self.name}>"
+
+	@property
+	def is_staff(self):
+		return self.is_md or self.is_hr or self.is_hod or self.is_supervisor
+
+	@property
+	def is_stale(self):
+		return self.version != _roles_version
+
+	@property
+	def name(self):
+		# Highest ranking role, as returned in the "admin_status" of a user
+		if self.is_md:
+			return "md"
+		elif self.is_hr:
+			return "hr"
+		elif self.is_hod:
+			return "hod"
+		elif self.is_supervisor:
+			return "supervisor"
+		return None
+
+	@classmethod
+	def resolve(cls, employee, annotated=True):
+		if employee.pk is None:
+			return cls(is_md=employee.is_md, is_hr=employee.is_hr)
+
+		# Use the flags annotated by EmployeeQuerySet.with_roles if available
+		is_hod = getattr(employee, "role_is_hod", None) if annotated else None
+		is_supervisor = getattr(employee, "role_is_supervisor", None) if annotated else None
+		if is_hod is None or is_supervisor is None:
+			Employee = get_app_model("employees.Employee")
+			flags = Employee.objects.with_roles().filter(pk=employee.pk).values(
+				"role_is_hod", "role_is_supervisor").first() or {}
+			is_hod = flags.get("role_is_hod", False)
+			is_supervisor = flags.get("role_is_supervisor", False)
+
+		return cls(is_md=employee.is_md, is_hr=employee.is_hr,
+			is_hod=is_hod, is_supervisor=is_supervisor)
+
+	@classmethod
+	def for_employee(cls, employee):
+		role = getattr(employee, "_employee_role", None)
+		if role is None or role.is_stale:
+			# Annotations are only trusted until the first invalidation
+			role = cls.resolve(employee, annotated=role is None)
+			employee._employee_role = role
+		return role
+
+	@classmethod
+	def for_request(cls, request):
+		# Returns None if the request user is not an employee
+		_request = getattr(request, "_request", request)
+		role = getattr(_request, "_employee_role", None)
+		if role is not None and not role.is_stale:
+			return role
+		try:
+			employee = request.user.employee
+		except (AttributeError, ObjectDoesNotExist):
+			return None
+		role = cls.for_employee(employee)
+		_request._employee_role = role
+		return role
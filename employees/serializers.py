@@ -5,7 +5,7 @@ from rest_framework.exceptions import PermissionDenied, ValidationError
 
 from common.serializer_fields import ClientRelatedField, EmployeeRelatedField
 from common.utils import get_request_method, get_instance, get_instances, get_user_info
-from core.serializers import PersonSerializer
+from core.serializers import PersonListSerializer, PersonSerializer
 from jobs.models import Job
 from jobs.serializers import JobSerializer
 from users.models import Profile
@@ -33,6 +33,8 @@ class UserEmployeeSerializer(PersonSerializer):
 		model = Employee
 		relation_key = 'user'
 		fields = ('id', 'job',) + PersonSerializer.Meta.fields
+		list_serializer_class = PersonListSerializer
+		prefetch_related = ('job', )
 
 	def get_job(self, obj):
 		try:
@@ -417,7 +419,7 @@ class ProjectFileSerializer(serializers.ModelSerializer):
 
 	class Meta:
 		model = ProjectFile
-		fields = '__all__'
+		exclude = ('checksum',)
 
 	def get_uploaded_by(self, obj):
 		return {
@@ -426,7 +428,10 @@ class ProjectFileSerializer(serializers.ModelSerializer):
 		}
 
 	def get_size(self, obj):
-		return obj.file.size
+		# Files uploaded before the size was stored, see backfill_project_files
+		if obj.size is None:
+			return obj.file.size
+		return obj.size
 
 	def get_project_info(self, obj):
 		return {
@@ -458,13 +463,16 @@ class ProjectFileSerializer(serializers.ModelSerializer):
 		if not name:
 			name = file.name[:245] + file.name.split(".")[-1] if len(file.name) > 250 else file.name
 
-		return ProjectFile.objects.create(
+		instance = ProjectFile(
 			project=project, 
 			file_type=file.content_type,
 			uploaded_by=employee,
 			name=name,
 			**validated_data
 		)
+		instance.set_file_info()
+		instance.save()
+		return instance
 
 	def update(self, instance, validated_data):
 		# Prevent the file from being updated
@@ -1,10 +1,14 @@
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import post_delete, pre_delete, pre_save, post_save
 from django.dispatch import receiver
 from rest_framework.exceptions import ValidationError
 
 from common.utils import get_instance
 from core.utils import generate_id
-from .models import Attendance, Client, Department, Employee, Holiday, Project, Task
+from .models import (
+	Attendance, Client, Department, Employee, EmployeeHierarchy, Holiday, Project, Task
+)
+from .cache import invalidate_attendance_info
+from .roles import invalidate_roles
 
 
 @receiver(pre_save, sender=Attendance)
@@ -14,6 +18,11 @@ def check_attendance(sender, instance, **kwargs):
 	if not instance.id:
 		instance.id = generate_id("atd", key="attendance_id", model=Attendance)
 
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def reset_attendance_info(sender, instance, **kwargs):
+	invalidate_attendance_info(instance.employee_id)
+
 @receiver(pre_save, sender=Client)
 def set_client_id(sender, instance, **kwargs):
 	if not instance.id:
@@ -38,6 +47,32 @@ def set_employee_id(sender, instance, **kwargs):
 	if not instance.id:
 		instance.id = generate_id("emp", key="employee_id", model=Employee)
 
+@receiver(pre_save, sender=Employee)
+def check_supervisor(sender, instance, **kwargs):
+	instance._supervisor_changed = False
+	if instance.pk is None:
+		return
+	supervisor_id = Employee.objects.filter(pk=instance.pk).values_list(
+		'supervisor_id', flat=True).first()
+	if supervisor_id == instance.supervisor_id:
+		return
+	if instance.supervisor_id is not None and EmployeeHierarchy.objects.is_under(
+		instance, instance.supervisor_id):
+		raise ValidationError({"supervisor": "An employee cannot be supervised by an employee under them."})
+	instance._supervisor_changed = True
+
+@receiver(post_save, sender=Employee)
+def update_hierarchy(sender, instance, created, **kwargs):
+	if created:
+		EmployeeHierarchy.objects.link(instance)
+	elif getattr(instance, "_supervisor_changed", False):
+		EmployeeHierarchy.objects.move(instance)
+
+@receiver(pre_delete, sender=Employee)
+def detach_hierarchy(sender, instance, **kwargs):
+	# The reports' supervisor is set to null without sending signals
+	EmployeeHierarchy.objects.detach_reports(instance)
+
 @receiver(pre_save, sender=Holiday)
 def set_holiday_id(sender, instance, **kwargs):
 	if not instance.id:
@@ -52,3 +87,10 @@ def set_project_id(sender, instance, **kwargs):
 def set_task_id(sender, instance, **kwargs):
 	if not instance.id:
 		instance.id = generate_id("tsk", key="task_id", model=Task)
+
+@receiver(post_save, sender=Department)
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Department)
+@receiver(post_delete, sender=Employee)
+def reset_roles(sender, instance, **kwargs):
+	invalidate_roles()
@@ -1,9 +1,14 @@
+import datetime
 from django.contrib.auth import get_user_model
 from django.db import IntegrityError
 from django.test import TestCase
+from django.utils.timezone import now
+from rest_framework.exceptions import ValidationError
 
 from common.utils import get_instance
-from employees.models import Department, Employee
+from core.utils import get_last_date_of_week, get_working_days
+from employees.models import Attendance, Department, Employee, EmployeeHierarchy
+from leaves.models import Overtime
 
 User = get_user_model()
 
@@ -109,4 +114,128 @@ class EmployeeTests(TestCase):
 		self.assertFalse(employee.is_hod)
 		self.assertFalse(employee.is_supervisor)
 
+	def test_employee_hierarchy(self):
+		users = [User.objects.create(email=f"chain{i}@example.com") for i in range(5)]
+
+		employee1 = Employee.objects.create(user=users[0])
+		employee2 = Employee.objects.create(user=users[1], supervisor=employee1)
+		employee3 = Employee.objects.create(user=users[2], supervisor=employee2)
+		employee4 = Employee.objects.create(user=users[3], supervisor=employee3)
+		employee5 = Employee.objects.create(user=users[4])
+
+		self.assertEqual(set(employee1.subordinates), {employee2, employee3, employee4})
+		self.assertEqual(set(Employee.objects.under(employee1, depth=2)), {employee2, employee3})
+		self.assertEqual(set(employee3.subordinates), {employee4})
+
+		# Move a branch below another employee
+		employee2.supervisor = employee5
+		employee2.save()
+		self.assertFalse(employee1.subordinates.exists())
+		self.assertEqual(set(employee5.subordinates), {employee2, employee3, employee4})
+		self.assertEqual(EmployeeHierarchy.objects.get(
+			ancestor=employee5, descendant=employee4).depth, 3)
+
+		with self.assertRaises(ValidationError):
+			employee5.supervisor = employee4
+			employee5.save()
+
+		# Deleting a supervisor makes its reports the top of their branch
+		employee3.delete()
+		self.assertEqual(set(employee5.subordinates), {employee2})
+		self.assertFalse(Employee.objects.get(pk=employee4.pk).supervisor)
+		self.assertFalse(employee4.ancestor_links.exclude(ancestor=employee4).exists())
+
+		employee5.refresh_from_db()
+		employee5.relinquish_status()
+		self.assertFalse(employee5.subordinates.exists())
+		self.assertFalse(employee5.is_supervisor)
+
+	def test_employee_role(self):
+		user = User.objects.create(email="mark8@example.com")
+		user1 = User.objects.create(email="mark9@example.com")
 
+		employee = Employee.objects.create(user=user)
+		employee1 = Employee.objects.create(user=user1, supervisor=employee)
+
+		with self.assertNumQueries(1):
+			role = employee.role
+			self.assertTrue(employee.is_supervisor)
+			self.assertFalse(employee.is_hod)
+		self.assertEqual(role.name, "supervisor")
+
+		department = Department.objects.create(name="roles", hod=employee)
+
+		self.assertTrue(employee.is_hod)
+		self.assertEqual(employee.role.name, "hod")
+		self.assertFalse(employee1.role.is_staff)
+
+		annotated = Employee.objects.with_roles().get(pk=employee.pk)
+		with self.assertNumQueries(0):
+			self.assertTrue(annotated.is_hod)
+			self.assertTrue(annotated.is_supervisor)
+
+
+class AttendanceTests(TestCase):
+	def test_get_timesheet(self):
+		user1 = User.objects.create(email="mark10@example.com")
+		user2 = User.objects.create(email="mark11@example.com")
+
+		employee1 = Employee.objects.create(user=user1)
+		employee2 = Employee.objects.create(user=user2)
+
+		today = now().date()
+		monday = get_last_date_of_week(today) - datetime.timedelta(days=6)
+		for day in range(5):
+			Attendance(employee=employee1, date=monday + datetime.timedelta(days=day),
+				punch_in=datetime.time(8, 0), punch_out=datetime.time(16, 30)).save()
+		last_monday = monday - datetime.timedelta(days=7)
+		Attendance(employee=employee2, date=last_monday, punch_in=datetime.time(9, 0),
+			punch_out=datetime.time(12, 0)).save()
+		Attendance(employee=employee2, date=today, punch_in=datetime.time(0, 0)).save()
+		Overtime.objects.bulk_create([Overtime(id="ovt-test", employee=employee2, date=today,
+			hours=3, reason="Testing Purposes", a_md="A")])
+
+		with self.assertNumQueries(1):
+			week_hours = Attendance.objects.get_week_hours(employee=employee1)
+		with self.assertNumQueries(2):
+			timesheet = Attendance.objects.get_timesheet([employee1, employee2],
+				last_monday, monday + datetime.timedelta(days=6))
+
+		self.assertEqual([info["hours"] for info in week_hours.values()], [8.5] * 5)
+		self.assertEqual(week_hours["wed"]["date"], monday + datetime.timedelta(days=2))
+		self.assertEqual(len(timesheet[employee1.pk]), 5)
+		self.assertEqual(timesheet[employee2.pk][last_monday]["hours"], 3)
+		self.assertEqual(timesheet[employee2.pk][today]["punch_out"], None)
+		self.assertEqual(employee2.get_open_and_close_time(today)["close"], datetime.time(23, 30))
+
+	def test_get_expected_hours(self):
+		user1 = User.objects.create(email="mark12@example.com")
+		user2 = User.objects.create(email="mark13@example.com")
+
+		department = Department.objects.create(name="payroll")
+		employee1 = Employee.objects.create(user=user1, department=department)
+		employee2 = Employee.objects.create(user=user2, department=department)
+
+		start_date = datetime.date(2022, 2, 1) # Tuesday
+		end_date = datetime.date(2022, 2, 28) # Monday, 20 week days
+		Overtime.objects.bulk_create([
+			Overtime(id="ovt-test1", employee=employee1, date=datetime.date(2022, 2, 2),
+				hours=2, reason="Testing Purposes", a_md="A"),
+			Overtime(id="ovt-test2", employee=employee1, date=datetime.date(2022, 2, 5), # Saturday
+				hours=5, reason="Testing Purposes", a_md="A"),
+			Overtime(id="ovt-test3", employee=employee2, date=datetime.date(2022, 2, 3),
+				hours=3, reason="Testing Purposes", a_md="P"),
+		])
+
+		with self.assertNumQueries(2):
+			hours = Employee.objects.filter(department=department).get_expected_hours(
+				start_date, end_date)
+
+		self.assertEqual(get_working_days(start_date, end_date), 20)
+		self.assertEqual(get_working_days(datetime.date(2022, 2, 5), datetime.date(2022, 2, 6)), 0)
+		self.assertEqual(get_working_days(end_date, start_date), 0)
+		self.assertEqual(hours[employee1.pk], 20 * 13.5 + 2)
+		self.assertEqual(hours[employee2.pk], 20 * 13.5)
+		with self.assertNumQueries(1):
+			self.assertEqual(employee1.total_hours_for_the_month(start_date), 20 * 13.5 + 2)
+		self.assertEqual(employee2.total_hours_for_the_week(datetime.date(2022, 2, 2)), 5 * 13.5)
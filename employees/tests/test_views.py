@@ -1,15 +1,63 @@
 import datetime
+import hashlib
+import io
+import tempfile
+from unittest import mock
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import IntegrityError
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils.timezone import now
 
-from employees.models import Department, Employee
+from core.models import ImportJob
+from employees.models import Attendance, Department, Employee, EmployeeHierarchy, Project, ProjectFile, Task
+from HRMS.celery import app
+from leaves.models import Leave, LeaveBalance
 from .test_setup import get_date, TestSetUp
 
 User = get_user_model()
 
 
 """ Department List View Tests """
+class AttendanceInfoViewTests(TestSetUp):
+	def setUp(self):
+		cache.clear()
+		self.addCleanup(cache.clear)
+		return super().setUp()
+
+	def test_get_attendance_info(self):
+		today = get_date()
+		attendance = Attendance(employee=self.employee, date=today, punch_in=datetime.time(0, 0))
+		attendance.save()
+
+		self.client.post(self.login_url, {
+			"email": self.employee.user.email, "password": "Passing1234"})
+		with CaptureQueriesContext(connection) as context:
+			response1 = self.client.get(reverse("attendance-info"))
+		count1 = len(context.captured_queries)
+		with CaptureQueriesContext(connection) as context:
+			response2 = self.client.get(reverse("attendance-info"))
+		count2 = len(context.captured_queries)
+
+		attendance.punch_out = datetime.time(6, 0)
+		attendance.save()
+		response3 = self.client.get(reverse("attendance-info"))
+
+		self.assertEqual(response1.status_code, 200)
+		self.assertEqual(response1.data["hours_spent_today"]["punch_out"], None)
+		self.assertEqual(response1.data["overtime_hours"], None)
+		self.assertLess(count2, count1)
+		self.assertLessEqual(count2, 2) # The session and the user
+		self.assertEqual(response2.data["hours_spent_today"]["id"], attendance.id)
+		self.assertEqual(response3.data["hours_spent_today"]["hours"], 6)
+		self.assertEqual(response3.data["statistics"]["today"], 6 / 13.5)
+
+
 class DepartmentListViewTests(TestSetUp):
 	def test_get_departments_by_unauthenticated_user(self):
 		response = self.client.get(self.departments_url)
@@ -148,6 +196,109 @@ class DepartmentUpdateViewTests(TestSetUp):
 
 
 """ Employee List View Tests """
+class ProjectListViewTests(TestSetUp):
+	def create_projects(self, start, stop):
+		for i in range(start, stop):
+			project = Project.objects.create(name=f"project{i}", created_by=self.hr,
+				start_date=get_date(), end_date=get_date(30))
+			project.leaders.add(self.hod, self.supervisor)
+			project.team.add(self.employee, self.employee1, self.employee2)
+
+	def get_query_count(self):
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.get(reverse("projects"))
+		self.assertEqual(response.status_code, 200)
+		return len(context.captured_queries), response
+
+	def test_get_projects_query_count(self):
+		self.client.post(self.login_url, {
+			"email": self.hr.user.email, "password": "Passing1234"})
+
+		self.create_projects(0, 2)
+		count1, response1 = self.get_query_count()
+		self.create_projects(2, 10)
+		count2, response2 = self.get_query_count()
+
+		self.assertEqual(len(response1.data["results"]), 2)
+		self.assertEqual(len(response2.data["results"]), 10)
+		self.assertEqual(len(response2.data["results"][0]["team"]), 3)
+		self.assertEqual(count1, count2)
+
+	@override_settings(PAGINATION_SUMMARY_CACHE_TIMEOUT=60)
+	def test_get_projects_and_tasks_summary(self):
+		cache.clear()
+		self.addCleanup(cache.clear)
+		self.client.post(self.login_url, {
+			"email": self.hr.user.email, "password": "Passing1234"})
+		self.create_projects(0, 3)
+		project = Project.objects.get(name="project0")
+		Project.objects.filter(name="project1").update(completed=True)
+		for i in range(3):
+			Task.objects.create(name=f"task{i}", project=project, created_by=self.hr,
+				due_date=get_date(10), completed=i == 0)
+
+		response1 = self.client.get(reverse("projects"))
+		response2 = self.client.get(reverse("project-tasks", kwargs={"project_id": project.id}))
+		Project.objects.filter(name="project2").update(completed=True)
+		response3 = self.client.get(reverse("projects"), {"limit": 1})
+
+		self.assertEqual((response1.data["completed"], response1.data["ongoing"]), (1, 2))
+		self.assertEqual((response2.data["completed"], response2.data["ongoing"]), (1, 2))
+		self.assertEqual(response2.data["project"], {"name": "project0", "id": project.id})
+		# Cached for the user whatever the page
+		self.assertEqual((response3.data["completed"], response3.data["ongoing"]), (1, 2))
+
+
+class ProjectFileViewTests(TestSetUp):
+	def setUp(self):
+		media_root = tempfile.TemporaryDirectory()
+		self.addCleanup(media_root.cleanup)
+		settings = override_settings(MEDIA_ROOT=media_root.name)
+		settings.enable()
+		self.addCleanup(settings.disable)
+		return super().setUp()
+
+	def test_get_project_files(self):
+		self.client.post(self.login_url, {
+			"email": self.hr.user.email, "password": "Passing1234"})
+		project = Project.objects.create(name="project", created_by=self.hr,
+			start_date=get_date(), end_date=get_date(30))
+		url = reverse("project-files", kwargs={"project_id": project.id})
+		content = b"%PDF-1.4 project file"
+		for i in range(3):
+			response = self.client.post(url, {"file": SimpleUploadedFile(
+				f"file{i}.pdf", content, content_type="application/pdf")}, format="multipart")
+			self.assertEqual(response.status_code, 201)
+		project_file = ProjectFile.objects.first()
+		self.assertEqual(project_file.size, len(content))
+		self.assertEqual(project_file.checksum, hashlib.sha256(content).hexdigest())
+
+		# Files uploaded before the size was stored
+		ProjectFile.objects.update(size=None, checksum=None)
+		out = io.StringIO()
+		call_command("backfill_project_files", "--batch-size=2", stdout=out)
+		self.assertIn("Updated 3 project files, 0 failed", out.getvalue())
+		self.assertFalse(ProjectFile.objects.filter(size__isnull=True).exists())
+
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.get(url)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(len(response.data["results"]), 3)
+		self.assertEqual(response.data["results"][0]["size"], len(content))
+		self.assertEqual(response.data["results"][0]["project"], {"id": project.id, "name": "project"})
+		self.assertEqual(response.data["results"][0]["uploaded_by"]["id"], self.hr.id)
+		self.assertNotIn("checksum", response.data["results"][0])
+		queries = len(context.captured_queries)
+
+		ProjectFile.objects.create(project=project, name="file3.pdf", uploaded_by=self.employee,
+			file=SimpleUploadedFile("file3.pdf", content), file_type="application/pdf",
+			size=len(content), checksum=hashlib.sha256(content).hexdigest())
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.get(url)
+		self.assertEqual(len(response.data["results"]), 4)
+		self.assertEqual(len(context.captured_queries), queries)
+
+
 class EmployeeListViewTests(TestSetUp):
 	def test_get_employees_by_unauthenticated_user(self):
 		response = self.client.get(self.employees_url)
@@ -204,6 +355,78 @@ class EmployeeListViewTests(TestSetUp):
 		self.assertEqual(response7.status_code, 200)
 		self.assertEqual(len(response7.data['results']), 0)
 
+	def test_get_employees_status_count(self):
+		Leave.objects.create(employee=self.employee1, start_date=get_date(),
+			end_date=get_date(2), reason="Testing Purposes")
+		Leave.objects.filter(employee=self.employee1).update(a_md="A")
+		self.user7.is_active = False
+		self.user7.save()
+
+		self.client.post(self.login_url, {
+			"email": self.hr.user.email, "password": "Passing1234"})
+		response1 = self.client.get(self.employees_url)
+		response2 = self.client.get(reverse("employees-export", kwargs={"file_type": "csv"}),
+			{"status": "on leave"})
+		statuses = {emp["id"]: emp["status"] for emp in response1.data["results"]}
+		rows = b"".join(response2.streaming_content).decode().strip().split("\r\n")
+
+		self.assertEqual(response1.status_code, 200)
+		self.assertEqual(response1.data["active"], 3)
+		self.assertEqual(response1.data["on_leave"], 1)
+		self.assertEqual(response1.data["inactive"], 1)
+		self.assertEqual(statuses[self.employee1.id], "on leave")
+		self.assertEqual(statuses[self.employee2.id], "inactive")
+		self.assertEqual(statuses[self.employee.id], "active")
+		self.assertEqual(response2.status_code, 200)
+		self.assertEqual(len(rows), 2)
+		self.assertIn(self.employee1.user.email, rows[1])
+
+	def test_get_employees_org_chart(self):
+		self.employee2.supervisor = self.employee
+		self.employee2.save()
+		self.supervisor.supervisor = self.hod
+		self.supervisor.save()
+
+		self.client.post(self.login_url, {
+			"email": self.hr.user.email, "password": "Passing1234"})
+		response1 = self.client.get(reverse("employees-org-chart"))
+		response2 = self.client.get(reverse("employees-org-chart"), {"root": self.supervisor.id})
+		response3 = self.client.get(reverse("employees-org-chart"), {"root": "emp-none"})
+
+		roots = {node["id"]: node for node in response1.data}
+		supervisor = roots[self.hod.id]["children"][0]
+
+		self.assertEqual(response1.status_code, 200)
+		self.assertEqual(len(roots), 4)
+		self.assertEqual(supervisor["id"], self.supervisor.id)
+		self.assertEqual(supervisor["supervisor"], self.hod.id)
+		self.assertEqual(supervisor["children"][0]["id"], self.employee.id)
+		self.assertEqual(supervisor["children"][0]["children"][0]["id"], self.employee2.id)
+		self.assertEqual(response2.status_code, 200)
+		self.assertEqual(len(response2.data), 1)
+		self.assertEqual(response2.data[0]["children"][0]["id"], self.employee.id)
+		self.assertEqual(response3.status_code, 404)
+
+	def test_get_employees_org_chart_by_employee_and_supervisor(self):
+		self.employee2.supervisor = self.employee
+		self.employee2.save()
+
+		self.client.post(self.login_url, {
+			"email": self.employee1.user.email, "password": "Passing1234"})
+		response1 = self.client.get(reverse("employees-org-chart"))
+		response2 = self.client.get(reverse("employees-org-chart"), {"root": self.supervisor.id})
+		self.client.post(self.login_url, {
+			"email": self.supervisor.user.email, "password": "Passing1234"})
+		response3 = self.client.get(reverse("employees-org-chart"))
+
+		self.assertEqual(response1.status_code, 200)
+		self.assertEqual([node["id"] for node in response1.data], [self.employee1.id])
+		self.assertEqual(response1.data[0]["children"], [])
+		self.assertEqual(response2.status_code, 404)
+		self.assertEqual([node["id"] for node in response3.data], [self.supervisor.id])
+		self.assertEqual(response3.data[0]["children"][0]["id"], self.employee.id)
+		self.assertEqual(response3.data[0]["children"][0]["children"][0]["id"], self.employee2.id)
+
 	def test_create_employee_by_unauthenticated_user(self):
 		response = self.client.post(self.employees_url, {})
 		self.assertEqual(response.status_code, 401)
@@ -850,3 +1073,91 @@ class EmployeeDeactiveateViewTests(TestSetUp):
 		self.assertEqual(response5.status_code, 200)
 		self.assertFalse(hr.user.is_staff)
 
+
+""" Import Data View Tests """
+@override_settings(IMPORT_HASH_WORKERS=1, IMPORT_CHUNK_SIZE=2)
+class ImportDataViewTests(TestSetUp):
+	def setUp(self):
+		# Run the import jobs eagerly and keep their files out of the media folder
+		media_root = tempfile.TemporaryDirectory()
+		self.addCleanup(media_root.cleanup)
+		media_settings = override_settings(MEDIA_ROOT=media_root.name)
+		media_settings.enable()
+		self.addCleanup(media_settings.disable)
+		task_always_eager = app.conf.task_always_eager
+		app.conf.task_always_eager = True
+		self.addCleanup(setattr, app.conf, "task_always_eager", task_always_eager)
+		return super().setUp()
+
+	def test_import_employees(self):
+		content = "\n".join([
+			"email,first_name,last_name,password,job,department,supervisor,is_hr",
+			"lead@example.com,Lead,One,Passing1234,job,sales,supervisor@example.com,",
+			"Member@example.com,Member,Two,,engineer,sales,lead@example.com,true",
+			"employee@example.com,Existing,Employee,,,,,",
+			"invalid,Invalid,Email,,,,,",
+		]).encode("utf-8")
+		url = reverse("employees-import")
+
+		self.client.post(self.login_url, {
+			"email": self.employee.user.email, "password": "Passing1234"})
+		response1 = self.client.post(url, {"file": SimpleUploadedFile("employees.csv", content)})
+
+		self.client.post(self.login_url, {
+			"email": self.hr.user.email, "password": "Passing1234"})
+		with self.captureOnCommitCallbacks(execute=True):
+			response2 = self.client.post(url, {"file": SimpleUploadedFile("employees.csv", content)})
+		response3 = self.client.post(url, {"file": SimpleUploadedFile("employees.txt", content)})
+		response4 = self.client.get(response2.data["url"])
+
+		self.assertEqual(response1.status_code, 403)
+		self.assertEqual(response2.status_code, 202)
+		self.assertEqual(response2.data["status"], "pending")
+		self.assertEqual(response3.status_code, 400)
+		self.assertEqual(response4.status_code, 200)
+		self.assertEqual(response4.data["status"], "completed")
+		self.assertEqual(response4.data["report"]["created"], 2)
+		self.assertEqual([error["row"] for error in response4.data["report"]["errors"]], [3, 4])
+
+		lead = Employee.objects.get(user__email="lead@example.com")
+		member = Employee.objects.get(user__email="member@example.com")
+		self.assertTrue(lead.user.check_password("Passing1234"))
+		self.assertTrue(member.user.check_password("TWO"))
+		self.assertTrue(lead.id.startswith("emp") and lead.user.id.startswith("usr"))
+		self.assertTrue(member.user.profile.id.startswith("ple"))
+		self.assertEqual(member.job.name, "engineer")
+		self.assertEqual(member.department.name, "sales")
+		self.assertTrue(member.is_hr)
+		self.assertEqual(member.supervisor, lead)
+		self.assertEqual(dict(EmployeeHierarchy.objects.filter(descendant=member).values_list(
+			"ancestor_id", "depth")), {member.pk: 0, lead.pk: 1, self.supervisor.pk: 2})
+
+	def test_import_when_broker_is_down(self):
+		content = b"email,first_name,last_name\nlead@example.com,Lead,One"
+		self.client.post(self.login_url, {
+			"email": self.hr.user.email, "password": "Passing1234"})
+		with mock.patch("core.tasks.import_data_task.delay", side_effect=OSError("broker is down")):
+			with self.assertLogs("core.tasks", level="ERROR"):
+				with self.captureOnCommitCallbacks(execute=True):
+					response = self.client.post(reverse("employees-import"), {
+						"file": SimpleUploadedFile("employees.csv", content)})
+
+		job = ImportJob.objects.get(id=response.data["id"])
+		self.assertEqual(response.status_code, 202)
+		self.assertEqual(job.status, "F")
+		self.assertIn("broker is down", job.error)
+		self.assertFalse(Employee.objects.filter(user__email="lead@example.com").exists())
+
+	def test_import_fixture(self):
+		stdout = io.StringIO()
+		for name in ("employees", "attendance", "leaves"):
+			call_command("import_data", name, str(settings.BASE_DIR / "data.json.gz"),
+				stdout=stdout, stderr=io.StringIO())
+
+		employees = Employee.objects.filter(user__email__endswith="@kitehrms.com")
+		self.assertIn("Imported 38 of 38 employees", stdout.getvalue())
+		self.assertEqual(employees.count(), 38)
+		self.assertEqual(Attendance.objects.filter(employee__in=employees).count(), 21)
+		self.assertTrue(Leave.objects.filter(employee__in=employees).exists())
+		self.assertTrue(LeaveBalance.objects.filter(employee__in=employees).exists())
+		self.assertEqual(EmployeeHierarchy.objects.filter(descendant__in=employees, depth=0).count(), 38)
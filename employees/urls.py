@@ -1,15 +1,16 @@
 from django.urls import path
 from .views import (
-	AttendanceListView, AttendanceInfoView, 
+	AttendanceListView, AttendanceInfoView, AttendanceImportDataView,
 	ClientView, DepartmentView, EmployeeView,
 	EmployeeDeactivateView, EmployeePasswordChangeView,
-	EmployeeExportDataView, HolidayView,
+	EmployeeExportDataView, EmployeeImportDataView, EmployeeOrgChartView, HolidayView,
 	ProjectView, ProjectFileView, ProjectCompletedView, ProjectEmployeesView,
 	TaskView
 )
 
 
 urlpatterns = [
+	path('api/attendance/import/', AttendanceImportDataView.as_view(), name="attendance-import"),
 	path('api/attendance/info/', AttendanceInfoView.as_view(), name="attendance-info"),
 	path('api/attendance/', AttendanceListView.as_view(), name="attendance-list"),
 	path('api/clients/', ClientView.as_view(), name="clients"),
@@ -17,6 +18,8 @@ urlpatterns = [
 	path('api/departments/', DepartmentView.as_view(), name="departments"),
 	path('api/departments/<str:id>/', DepartmentView.as_view(), name="department-detail"),
 	path('api/employees/', EmployeeView.as_view(), name="employees"),
+	path('api/employees/import/', EmployeeImportDataView.as_view(), name="employees-import"),
+	path('api/employees/org-chart/', EmployeeOrgChartView.as_view(), name="employees-org-chart"),
 	path('api/employees/<str:id>/', EmployeeView.as_view(), name="employee-detail"),
 	path('api/employees-deactivate/',
 		EmployeeDeactivateView.as_view(), name="employee-deactivate"),
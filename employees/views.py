@@ -1,23 +1,29 @@
-import csv
 import datetime
-import xlwt
 from allauth.account.adapter import get_adapter
 from collections import OrderedDict
 from django.contrib.auth import get_user_model
 from django.db.models import Q
-from django.http import HttpResponse
-from rest_framework import permissions, status
+from django.utils.timezone import now
+from rest_framework import status
 from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError, server_error
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from common.utils import get_instance
+from core.utils import (
+	weekdays, get_default_hours, get_last_date_of_week, get_last_date_of_month
+)
 from core.views import (
+	ImportDataView,
 	ListView,
 	ListCreateRetrieveDestroyView,
 	ListCreateRetrieveUpdateView,
 	ListCreateRetrieveUpdateDestroyView
 )
+from exports.views import ExportDataView
+from .cache import get_attendance_info, set_attendance_info
+from .exports import EmployeeExport
+from .imports import AttendanceImport, EmployeeImport
 from .filters import ClientFilter
 from .models import (
 	Attendance, 
@@ -29,6 +35,7 @@ from .models import (
 	Task
 )
 from .pagination import (
+	AttendancePagination,
 	ClientPagination,
 	EmployeePagination,
 	ProjectPagination,
@@ -59,51 +66,108 @@ User = get_user_model()
 
 
 class AttendanceInfoView(APIView):
+	"""
+	Everything but the hours spent on today's open attendance is read from a
+	snapshot cached per employee, which the attendance and overtime signals
+	invalidate (see employees.cache).
+	"""
+
 	def get(self, request, *args, **kwargs):
+		employee = self.request.user.employee
+		today = now().date()
+		snapshot = get_attendance_info(employee.pk, today)
+		if snapshot is None:
+			snapshot = self.get_snapshot(employee, today)
+			set_attendance_info(employee.pk, snapshot)
+
+		hours_spent_today = self.get_hours_spent_today(employee, snapshot)
+		today_hours = hours_spent_today.get('hours') if hours_spent_today else 0
+
+		week_hours = OrderedDict(snapshot["week_hours"])
+		today_key = today.strftime('%a').lower()
+		if today_key in week_hours:
+			week_hours[today_key] = hours_spent_today
+
 		return Response(OrderedDict([
-				('hours_spent_today', Attendance.objects.get_hours(
-					self.request.user.employee.has_attendance())),
-				('week_hours', Attendance.objects.get_week_hours(
-					employee=self.request.user.employee)),
-				('overtime_hours', self.get_overtime_hours()),
-				('statistics', self.get_statistics()),
+				('hours_spent_today', hours_spent_today),
+				('week_hours', week_hours),
+				('overtime_hours', snapshot["overtime_hours"]),
+				('statistics', self.get_statistics(snapshot, today_hours, today_key in week_hours)),
 			]))
 
-	def get_overtime_hours(self):
-		overtime = self.request.user.employee.has_overtime()
-		return overtime.hours if overtime else None
+	def get_snapshot(self, employee, today):
+		attendance = employee.has_attendance(today)
+		overtime = employee.overtime.filter(date=today, a_md='A').first()
+		overtime_hours = overtime.hours if overtime else 0
+
+		last_date_of_the_week = get_last_date_of_week(today)
+		week_start = last_date_of_the_week - datetime.timedelta(days=6)
+		month_start = datetime.date(today.year, today.month, 1)
+		month_end = get_last_date_of_month(today)
+
+		# The hours of the week and the month in a single range, without today's
+		timesheet = Attendance.objects.get_timesheet(employee,
+			min(week_start, month_start), max(last_date_of_the_week, month_end))[employee.pk]
+		timesheet.pop(today, None)
+
+		week_hours = get_default_hours()
+		for day in week_hours.keys():
+			week_hours[day] = timesheet.get(week_start + datetime.timedelta(
+				days=weekdays[day]["index"]), None)
 
-	def get_statistics(self):
-		today_total_expected_hours = self.request.user.employee.total_hours_for_the_day()
-		today_total_hours_spent = self.request.user.employee.total_hours_spent_for_the_day()
+		return {
+			"date": today,
+			"attendance": OrderedDict([
+				("id", attendance.id), ("date", attendance.date),
+				("punch_in", attendance.punch_in), ("punch_out", attendance.punch_out)
+			]) if attendance else None,
+			"overtime_hours": overtime.hours if overtime else None,
+			"week_hours": week_hours,
+			"week_hours_spent": sum(info["hours"] for date, info in timesheet.items() if (
+				week_start <= date <= last_date_of_the_week)),
+			"month_hours_spent": sum(info["hours"] for date, info in timesheet.items() if (
+				month_start <= date <= month_end)),
+			"today_expected_hours": employee.total_hours_for_the_day(
+				today, overtime_hours=overtime_hours),
+			"today_expected_hours_wo": employee.total_hours_for_the_day(today, wo=True),
+			"week_expected_hours": employee.total_hours_for_the_period(
+				week_start, last_date_of_the_week),
+			"month_expected_hours": employee.total_hours_for_the_period(month_start, month_end),
+		}
 
-		week_total_expected_hours = self.request.user.employee.total_hours_for_the_week()
-		week_total_hours_spent = self.request.user.employee.total_hours_spent_for_the_week()
+	def get_hours_spent_today(self, employee, snapshot):
+		# Computed from the cached punch in and out times, without any query
+		if snapshot["attendance"] is None:
+			return None
+		attendance = Attendance(employee=employee, **snapshot["attendance"])
+		return Attendance.objects.get_hours(attendance,
+			overtime_hours=snapshot["overtime_hours"] or 0)
 
-		month_total_expected_hours = self.request.user.employee.total_hours_for_the_month()
-		month_total_hours_spent = self.request.user.employee.total_hours_spent_for_the_month()
+	def get_statistics(self, snapshot, today_hours, is_week_day):
+		week_hours_spent = snapshot["week_hours_spent"] + (today_hours if is_week_day else 0)
+		month_hours_spent = snapshot["month_hours_spent"] + today_hours
 
 		statistics = OrderedDict({})
-		statistics["today"] = today_total_hours_spent / today_total_expected_hours
-		statistics["week"] = week_total_hours_spent / week_total_expected_hours
-		statistics["month"] = month_total_hours_spent / month_total_expected_hours
-		statistics["overtime"] = self.get_overtime_statistics()
+		statistics["today"] = today_hours / snapshot["today_expected_hours"]
+		statistics["week"] = week_hours_spent / snapshot["week_expected_hours"]
+		statistics["month"] = month_hours_spent / snapshot["month_expected_hours"]
+		statistics["overtime"] = self.get_overtime_statistics(snapshot, today_hours)
 		return statistics
 
-	def get_overtime_statistics(self):
-		overtime = self.request.user.employee.has_overtime()
-		attendance = self.request.user.employee.has_attendance()
-		if not overtime or not attendance or not attendance.punch_in:
+	def get_overtime_statistics(self, snapshot, today_hours):
+		attendance = snapshot["attendance"]
+		overtime_hours = snapshot["overtime_hours"]
+		if not overtime_hours or not attendance or not attendance["punch_in"]:
 			return 0
-		hours_spent = self.request.user.employee.total_hours_spent_for_the_day()
-		hours_without_overtime = self.request.user.employee.total_hours_for_the_day(wo=True)
-		if hours_spent > hours_without_overtime:
-			return (hours_spent - hours_without_overtime) / overtime.hours
+		hours_without_overtime = snapshot["today_expected_hours_wo"]
+		if today_hours > hours_without_overtime:
+			return (today_hours - hours_without_overtime) / overtime_hours
 		return 0
 
 
 class AttendanceListView(ListView):
 	serializer_class = AttendanceSerializer
+	pagination_class = AttendancePagination
 	permission_classes = (IsEmployee, )
 
 	def post(self, request, *args, **kwargs):
@@ -145,7 +209,7 @@ class ClientView(ListCreateRetrieveUpdateDestroyView):
 
 class DepartmentView(ListCreateRetrieveUpdateDestroyView):
 	permission_classes = (IsHROrMDOrAdminUser, )
-	queryset = Department.objects.all().order_by('-id')
+	queryset = Department.objects.select_related('hod__user__profile', 'hod__job').order_by('-id')
 	serializer_class = DepartmentSerializer
 	ordering_fields = ('name', 'hod__user__first_name', 'hod__user__last_name', 'hod__user__email')
 	search_fields = ('name', 'hod__user__first_name', 'hod__user__last_name', 'hod__user__email')
@@ -174,95 +238,50 @@ class EmployeeView(ListCreateRetrieveUpdateDestroyView):
 	def get_queryset(self):
 		try:
 			queryset = Employee.objects.employees(
-				self.request.user.employee).order_by('user__first_name', 'user__last_name', 'id')
+				self.request.user.employee).with_status().select_related(
+				'user__profile', 'job', 'department__hod__user__profile', 'department__hod__job',
+				'supervisor__user__profile', 'supervisor__job'
+				).order_by('user__first_name', 'user__last_name', 'id')
 			return queryset
 		except:
 			pass
 		return Employee.objects.none()
 
 
-class EmployeeExportDataView(APIView):
-	permission_classes = (permissions.IsAdminUser, )
+class EmployeeExportDataView(ExportDataView):
+	export_class = EmployeeExport
 
-	def get(self, request, *args, **kwargs):
-		file_type = kwargs["file_type"]
-		if file_type == "csv":
-			response = self.export_csv_data()
-			return response
-		elif file_type == "excel":
-			response = self.export_excel_data()
-			return response
-		return Response(
-			{"error": "invalid content type. can only export csv and excel file format."},
-			status=status.HTTP_400_BAD_REQUEST)
-
-	def export_csv_data(self):
-		response = HttpResponse(content_type='text/csv',
-			headers={'Content-Disposition': 'attachment; filename="employees.csv"'})
-		writer = csv.writer(response)
-		writer.writerow(self.get_emp_headers())
-
-		employees = self.get_queryset()
-		for emp in employees:
-			writer.writerow(self.get_emp_data(emp))
-		return response
-
-	def export_excel_data(self):
-		response = HttpResponse(content_type='application/ms-excel',
-			headers={'Content-Disposition': 'attachment; filename="employees.xls"'})
-		wb = xlwt.Workbook(encoding='utf-8')
-		ws = wb.add_sheet('Employees')
-		row_num = 0
-		font_style = xlwt.XFStyle()
-		font_style.font.bold = True
-
-		columns = self.get_emp_headers()
-		for col_num in range(len(columns)):
-			ws.write(row_num, col_num, columns[col_num], font_style)
-		font_style = xlwt.XFStyle()
-
-		emps = self.get_queryset()
-		for emp in emps:
-			row_num += 1
-			data = self.get_emp_data(emp)
-
-			for col_num in range(len(data)):
-				ws.write(row_num, col_num, str(data[col_num]), font_style)
-		wb.save(response)
-		return response
-
-	def get_emp_headers(self):
-		return ['First Name', 'Last Name', 'E-mail', 'Department', 'Job', 'Status',
-			'Supervisor Name', 'Supervisor E-mail', 'Date Employed']
-
-	def get_emp_data(self, emp):
-		try:
-			return [
-				emp.user.first_name, emp.user.last_name, emp.user.email, emp.department_name,
-				emp.job_name, emp.status, emp.get_supervisor("name"),
-				emp.get_supervisor("email"), str(emp.date_employed)
-			]
-		except:
-			pass
-		return []
 
-	def get_queryset(self):
-		try:
-			name = self.request.query_params.get('name', None)
-			queryset = Employee.objects.employees(
-				self.request.user.employee).order_by('-date_updated')
-			if name:
-				queryset = queryset.filter(
-					Q(user__first_name__icontains=name.lower()) |
-					Q(user__last_name__icontains=name.lower()) |
-					Q(user__email__icontains=name.lower()))
-			status = self.request.query_params.get('status', None)
-			if status:
-				queryset = [x for x in queryset if x.status.lower() == status.lower()]
-			return queryset
-		except:
-			pass
-		return Employee.objects.none()
+class EmployeeImportDataView(ImportDataView):
+	permission_classes = (IsHROrMD, )
+	import_class = EmployeeImport
+
+
+class AttendanceImportDataView(ImportDataView):
+	permission_classes = (IsHROrMD, )
+	import_class = AttendanceImport
+
+
+class EmployeeOrgChartView(APIView):
+	permission_classes = (IsEmployee, )
+
+	def get(self, request, *args, **kwargs):
+		queryset = self.get_queryset(request.user.employee)
+		root = None
+		root_id = request.query_params.get("root", None)
+		if root_id is not None:
+			root = queryset.filter(id=root_id).first()
+			if root is None:
+				raise NotFound({"detail": "employee does not exist"})
+		return Response(queryset.get_org_chart(root))
+
+	def get_queryset(self, employee):
+		# The HR and the MD see the whole company, the others themselves and
+		# the employees they can list (see EmployeeQuerySet.get_employees)
+		if employee.is_hr or employee.is_md:
+			return Employee.objects.all()
+		return Employee.objects.filter(
+			Q(pk=employee.pk) | Q(pk__in=Employee.objects.employees(employee).values("pk")))
 
 
 # Use Allauth Get adapter validate password to do this
@@ -427,7 +446,10 @@ class ProjectView(ListCreateRetrieveUpdateDestroyView):
 			queryset = Project.objects.all().distinct()
 		else:
 			queryset = Project.objects.filter(Q(created_by__user=user) | Q(team=user.employee)).distinct()
-		return queryset
+		return queryset.select_related(
+			'client__contact__profile', 'created_by__user__profile', 'created_by__job'
+		).prefetch_related(
+			'leaders__user__profile', 'leaders__job', 'team__user__profile', 'team__job')
 
 
 class ProjectCompletedView(APIView):
@@ -485,7 +507,8 @@ class ProjectFileView(ListCreateRetrieveDestroyView):
 		project = get_instance(Project, {"id": project_id})
 		if not project:
 			raise ValidationError({"detail": f"Project with ID {project_id} was not found!"})
-		queryset = ProjectFile.objects.filter(project=project)
+		queryset = ProjectFile.objects.filter(project=project).select_related(
+			'project', 'uploaded_by__user')
 		return queryset
 		
 
@@ -536,7 +559,10 @@ class TaskView(ListCreateRetrieveUpdateDestroyView):
 				queryset = project.task.filter(followers=employee)
 		except:
 			queryset = project.task.none()
-		return queryset
+		return queryset.select_related(
+			'project', 'created_by__user__profile', 'created_by__job'
+		).prefetch_related(
+			'leaders__user__profile', 'leaders__job', 'followers__user__profile', 'followers__job')
 
 	def get_project(self, id):
 		try:
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import ExportJob
+
+
+class ExportJobAdmin(admin.ModelAdmin):
+	list_display = ('id', 'name', 'file_type', 'requested_by', 'status', 'date_requested')
+	list_filter = ('name', 'file_type', 'status', 'date_requested')
+
+
+admin.site.register(ExportJob, ExportJobAdmin)
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class ExportsConfig(AppConfig):
+    name = 'exports'
+
+    def ready(self):
+        import exports.signals
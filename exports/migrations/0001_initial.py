@@ -0,0 +1,33 @@
+# Generated by Django 4.0.3 on 2026-10-18 21:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('export_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('id', models.CharField(editable=False, max_length=7, unique=True)),
+                ('name', models.CharField(max_length=50)),
+                ('file_type', models.CharField(choices=[('csv', 'CSV'), ('excel', 'Excel 97-2003'), ('xlsx', 'Excel')], default='csv', max_length=5)),
+                ('params', models.JSONField(blank=True, default=dict, help_text='Filters of the export')),
+                ('status', models.CharField(choices=[('C', 'Completed'), ('F', 'Failed'), ('P', 'Pending'), ('R', 'Running')], default='P', max_length=1)),
+                ('file', models.FileField(blank=True, null=True, upload_to='exports/')),
+                ('error', models.TextField(blank=True, null=True)),
+                ('date_requested', models.DateTimeField(auto_now_add=True)),
+                ('date_completed', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
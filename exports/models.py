@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import models
+from django.urls import reverse
+
+ID_LENGTH = settings.ID_MAX_LENGTH
+
+FILE_TYPE_CHOICES = (
+	('csv', 'CSV'),
+	('excel', 'Excel 97-2003'),
+	('xlsx', 'Excel'),
+)
+
+STATUS_CHOICES = (
+	('C', 'Completed'),
+	('F', 'Failed'),
+	('P', 'Pending'),
+	('R', 'Running'),
+)
+
+
+class ExportJob(models.Model):
+	export_id = models.BigAutoField(primary_key=True)
+	id = models.CharField(max_length=ID_LENGTH, unique=True, editable=False)
+	name = models.CharField(max_length=50)
+	file_type = models.CharField(max_length=5, choices=FILE_TYPE_CHOICES, default="csv")
+	params = models.JSONField(default=dict, blank=True, help_text="Filters of the export")
+	requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+		related_name="export_jobs")
+	status = models.CharField(max_length=1, choices=STATUS_CHOICES, default="P")
+	file = models.FileField(upload_to="exports/", blank=True, null=True)
+	error = models.TextField(blank=True, null=True)
+	date_requested = models.DateTimeField(auto_now_add=True)
+	date_completed = models.DateTimeField(blank=True, null=True)
+
+	def __str__(self):
+		return f"{self.name} {self.file_type} export by {self.requested_by.email}"
+
+	def get_absolute_url(self):
+		return reverse('export-detail', kwargs={"id": self.id})
+
+	def get_download_url(self):
+		return reverse('export-download', kwargs={"id": self.id})
+
+	@property
+	def status_name(self):
+		return self.get_status_display().lower()
+
+	@property
+	def is_ready(self):
+		return self.status == "C" and bool(self.file)
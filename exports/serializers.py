@@ -0,0 +1,26 @@
+from rest_framework import serializers
+
+from .models import ExportJob
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+	status = serializers.CharField(source='status_name', read_only=True)
+	url = serializers.SerializerMethodField('get_url')
+	download_url = serializers.SerializerMethodField('get_download_url')
+
+	class Meta:
+		model = ExportJob
+		fields = ('id', 'name', 'file_type', 'params', 'status', 'error', 'url', 'download_url',
+			'date_requested', 'date_completed')
+
+	def get_absolute_url(self, url):
+		request = self.context.get('request')
+		return request.build_absolute_uri(url) if request is not None else url
+
+	def get_url(self, obj):
+		return self.get_absolute_url(obj.get_absolute_url())
+
+	def get_download_url(self, obj):
+		if obj.is_ready:
+			return self.get_absolute_url(obj.get_download_url())
+		return None
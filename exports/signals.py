@@ -0,0 +1,11 @@
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from core.utils import generate_id
+from .models import ExportJob
+
+
+@receiver(pre_save, sender=ExportJob)
+def set_export_id(sender, instance, **kwargs):
+	if not instance.id:
+		instance.id = generate_id("exp", key="export_id", model=ExportJob)
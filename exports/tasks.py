@@ -0,0 +1,45 @@
+import tempfile
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.core.files import File
+from django.utils.timezone import now
+
+from .models import ExportJob
+from .utils import get_export_class
+
+logger = get_task_logger(__name__)
+
+@shared_task
+def export_data_task(export_id):
+	job = ExportJob.objects.select_related('requested_by').get(export_id=export_id)
+	job.status = "R"
+	job.save(update_fields=["status"])
+	try:
+		export = get_export_class(job.name)(job.requested_by, job.params)
+		# Rows are written to a temporary file in chunks and then copied to storage
+		with tempfile.TemporaryFile() as file:
+			export.write(file, job.file_type)
+			file.seek(0)
+			job.file.save(export.get_filename(job.file_type), File(file), save=False)
+		job.status = "C"
+		logger.info(f"Exported {job.id}")
+	except Exception as exception:
+		logger.exception(f"Export {job.id} failed")
+		job.status = "F"
+		job.error = str(exception)
+	job.date_completed = now()
+	job.save()
+	return job.status
+
+
+def queue_export(job):
+	# A job that cannot be queued, e.g. while the broker is down, is failed
+	# rather than left pending
+	try:
+		export_data_task.delay(job.export_id)
+	except Exception as exception:
+		logger.exception(f"Could not queue export {job.id}")
+		job.status = "F"
+		job.error = f"could not be queued: {exception}"
+		job.date_completed = now()
+		job.save(update_fields=["status", "error", "date_completed"])
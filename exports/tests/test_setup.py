@@ -0,0 +1,50 @@
+import shutil
+import tempfile
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from employees.models import Department, Employee
+from HRMS.celery import app
+
+User = get_user_model()
+
+
+class TestSetUp(APITestCase):
+
+	def setUp(self):
+		self.client = APIClient()
+		self.login_url = reverse('rest_login')
+
+		# Run the export jobs eagerly and keep their files out of the media folder
+		self.media_root = tempfile.mkdtemp()
+		media_settings = override_settings(MEDIA_ROOT=self.media_root)
+		media_settings.enable()
+		self.addCleanup(media_settings.disable)
+		self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+		task_always_eager = app.conf.task_always_eager
+		app.conf.task_always_eager = True
+		self.addCleanup(setattr, app.conf, "task_always_eager", task_always_eager)
+
+		self.user1 = User.objects.create(email="hr@example.com")
+		self.user1.set_password("Passing1234")
+		self.user1.save()
+
+		self.user2 = User.objects.create(email="hod@example.com")
+		self.user2.set_password("Passing1234")
+		self.user2.save()
+
+		self.user3 = User.objects.create(email="employee@example.com")
+		self.user3.set_password("Passing1234")
+		self.user3.save()
+
+		self.hr = Employee.objects.create(user=self.user1, is_hr=True)
+		self.hod = Employee.objects.create(user=self.user2)
+		self.department = Department.objects.create(name="marketing202", hod=self.hod)
+		self.employee = Employee.objects.create(user=self.user3, department=self.department)
+
+		return super().setUp()
+
+	def tearDown(self):
+		return super().tearDown()
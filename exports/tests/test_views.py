@@ -0,0 +1,107 @@
+import csv
+import datetime
+import io
+import openpyxl
+from unittest import mock
+from django.urls import reverse
+from django.utils.timezone import now
+
+from exports.models import ExportJob
+from leaves.models import Leave
+from .test_setup import TestSetUp
+
+
+""" Export Job View Tests """
+class ExportJobViewTests(TestSetUp):
+	def queue_export(self, name, file_type, params=None):
+		url = reverse(name, kwargs={"file_type": file_type})
+		if params:
+			url = f"{url}?{params}"
+		with self.captureOnCommitCallbacks(execute=True):
+			response = self.client.post(url)
+		return response
+
+	def test_queue_export_by_unauthenticated_user(self):
+		response = self.client.post(reverse("employees-export", kwargs={"file_type": "xlsx"}))
+		self.assertEqual(response.status_code, 401)
+		self.assertFalse(ExportJob.objects.exists())
+
+	def test_queue_export_by_non_staff_user(self):
+		self.client.post(self.login_url, {
+			"email": self.employee.user.email, "password": "Passing1234"})
+		response = self.client.post(reverse("employees-export", kwargs={"file_type": "xlsx"}))
+		self.assertEqual(response.status_code, 403)
+
+	def test_queue_employees_xlsx_export(self):
+		self.client.post(self.login_url, {
+			"email": self.hr.user.email, "password": "Passing1234"})
+		response1 = self.queue_export("employees-export", "xlsx")
+		response2 = self.queue_export("employees-export", "pdf")
+		response3 = self.client.get(response1.data["url"])
+		response4 = self.client.get(response3.data["download_url"])
+
+		workbook = openpyxl.load_workbook(io.BytesIO(b"".join(response4.streaming_content)))
+		rows = list(workbook["Employees"].values)
+
+		self.assertEqual(response1.status_code, 202)
+		self.assertEqual(response1.data["status"], "pending")
+		self.assertEqual(response2.status_code, 400)
+		self.assertEqual(response3.status_code, 200)
+		self.assertEqual(response3.data["status"], "completed")
+		self.assertEqual(response4.status_code, 200)
+		self.assertIn("employees.xlsx", response4["Content-Disposition"])
+		self.assertEqual(rows[0][0], "First Name")
+		self.assertEqual(len(rows), 3)
+		self.assertEqual({row[2] for row in rows[1:]}, {self.hod.user.email, self.employee.user.email})
+
+	def test_queue_leaves_csv_export(self):
+		start_date = now().date() + datetime.timedelta(days=1)
+		end_date = start_date + datetime.timedelta(days=4)
+		Leave.objects.create(employee=self.employee, start_date=start_date,
+			end_date=end_date, reason="Testing Purposes")
+		Leave.objects.create(employee=self.hod, start_date=start_date,
+			end_date=end_date, reason="Testing Purposes")
+		for leave in Leave.objects.all():
+			leave.a_s = "N"
+			leave.a_hod = "A"
+			leave.save()
+
+		self.client.post(self.login_url, {
+			"email": self.hr.user.email, "password": "Passing1234"})
+		response1 = self.queue_export("leave-admin-export", "csv", f"name={self.employee.user.email}")
+		job = ExportJob.objects.get(id=response1.data["id"])
+		response2 = self.client.get(reverse("export-download", kwargs={"id": job.id}))
+		rows = list(csv.reader(io.StringIO(b"".join(response2.streaming_content).decode())))
+
+		self.client.post(self.login_url, {
+			"email": self.hod.user.email, "password": "Passing1234"})
+		response3 = self.client.get(reverse("export-detail", kwargs={"id": job.id}))
+
+		self.assertEqual(job.status, "C")
+		self.assertEqual(job.params, {"name": self.employee.user.email})
+		self.assertEqual(response2.status_code, 200)
+		self.assertEqual(len(rows), 2)
+		self.assertEqual(rows[1][2], self.employee.user.email)
+		self.assertEqual(rows[1][10], "pending")
+		self.assertEqual(response3.status_code, 404)
+
+	def test_queue_export_when_broker_is_down(self):
+		self.client.post(self.login_url, {
+			"email": self.hr.user.email, "password": "Passing1234"})
+		with mock.patch("exports.tasks.export_data_task.delay", side_effect=OSError("broker is down")):
+			with self.assertLogs("exports.tasks", level="ERROR"):
+				response = self.queue_export("employees-export", "xlsx")
+
+		job = ExportJob.objects.get(id=response.data["id"])
+		self.assertEqual(response.status_code, 202)
+		self.assertEqual(job.status, "F")
+		self.assertIn("broker is down", job.error)
+
+	def test_download_unfinished_export(self):
+		job = ExportJob.objects.create(name="employees", file_type="xlsx", requested_by=self.hr.user)
+
+		self.client.post(self.login_url, {
+			"email": self.hr.user.email, "password": "Passing1234"})
+		response = self.client.get(reverse("export-download", kwargs={"id": job.id}))
+
+		self.assertEqual(response.status_code, 400)
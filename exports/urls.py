@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import ExportJobView, ExportJobDownloadView
+
+urlpatterns = [
+	path('api/exports/<str:id>/', ExportJobView.as_view(), name='export-detail'),
+	path('api/exports/<str:id>/download/', 
+		ExportJobDownloadView.as_view(), name='export-download'),
+]
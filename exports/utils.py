@@ -0,0 +1,125 @@
+import csv
+import openpyxl
+import xlwt
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+from core.utils import get_csv_streaming_response, Echo
+
+EXPORT_CLASSES = {
+	"employees": "employees.exports.EmployeeExport",
+	"leaves": "leaves.exports.LeaveExport",
+	"overtime": "leaves.exports.OvertimeExport",
+}
+
+CONTENT_TYPES = {
+	"csv": "text/csv",
+	"excel": "application/ms-excel",
+	"xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+FILE_EXTENSIONS = {
+	"csv": "csv",
+	"excel": "xls",
+	"xlsx": "xlsx",
+}
+
+
+def get_export_class(name):
+	try:
+		return import_string(EXPORT_CLASSES[name])
+	except KeyError:
+		raise LookupError(f"{name} is not a registered export")
+
+
+class BaseExport:
+	"""
+	Writes the rows of a queryset to a csv, xls or xlsx file.
+
+	Subclasses set the `name` registered in EXPORT_CLASSES, the `fields` of the
+	values() projection and implement get_headers, get_queryset and get_data.
+	"""
+	name = None
+	sheet_name = None
+	fields = ()
+
+	def __init__(self, user, params=None):
+		self.user = user
+		self.params = params if params is not None else {}
+
+	def get_headers(self):
+		raise NotImplementedError('`get_headers()` must be implemented.')
+
+	def get_queryset(self):
+		raise NotImplementedError('`get_queryset()` must be implemented.')
+
+	def get_data(self, row):
+		raise NotImplementedError('`get_data()` must be implemented.')
+
+	def get_rows(self, queryset=None):
+		if queryset is None:
+			queryset = self.get_queryset()
+		rows = queryset.values(*self.fields)
+		for row in rows.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+			yield self.get_data(row)
+
+	def get_filename(self, file_type):
+		return f"{self.name}.{FILE_EXTENSIONS[file_type]}"
+
+	def get_response(self, file_type):
+		if file_type == "csv":
+			# Built before the response starts so that an invalid parameter is
+			# still a 400 and not a truncated file
+			queryset = self.get_queryset()
+			return get_csv_streaming_response(
+				self.get_filename(file_type), self.get_headers(), self.get_rows(queryset))
+		response = HttpResponse(content_type=CONTENT_TYPES[file_type], headers={
+			'Content-Disposition': f'attachment; filename="{self.get_filename(file_type)}"'})
+		self.write(response, file_type)
+		return response
+
+	def write(self, file, file_type):
+		# file is a binary file-like object
+		if file_type == "csv":
+			return self.write_csv(file)
+		elif file_type == "excel":
+			return self.write_xls(file)
+		elif file_type == "xlsx":
+			return self.write_xlsx(file)
+		raise ValueError(f"{file_type} is not a valid file type")
+
+	def write_csv(self, file):
+		writer = csv.writer(Echo())
+		file.write(writer.writerow(self.get_headers()).encode("utf-8"))
+		for row in self.get_rows():
+			file.write(writer.writerow(row).encode("utf-8"))
+
+	def write_xls(self, file):
+		wb = xlwt.Workbook(encoding='utf-8')
+		ws = wb.add_sheet(self.sheet_name)
+		row_num = 0
+		font_style = xlwt.XFStyle()
+		font_style.font.bold = True
+
+		columns = self.get_headers()
+		for col_num in range(len(columns)):
+			ws.write(row_num, col_num, columns[col_num], font_style)
+		font_style = xlwt.XFStyle()
+
+		for data in self.get_rows():
+			row_num += 1
+			for col_num in range(len(data)):
+				ws.write(row_num, col_num, str(data[col_num]), font_style)
+			if row_num % settings.EXPORT_CHUNK_SIZE == 0:
+				ws.flush_row_data()
+		wb.save(file)
+
+	def write_xlsx(self, file):
+		# A write only workbook keeps a single row in memory at a time
+		wb = openpyxl.Workbook(write_only=True)
+		ws = wb.create_sheet(self.sheet_name)
+		ws.append(self.get_headers())
+		for data in self.get_rows():
+			ws.append(["" if value is None else value for value in data])
+		wb.save(file)
@@ -0,0 +1,63 @@
+from django.db import transaction
+from django.http import FileResponse
+from rest_framework import permissions, status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.utils import get_instance
+from .models import ExportJob
+from .serializers import ExportJobSerializer
+from .tasks import queue_export
+from .utils import FILE_EXTENSIONS
+
+
+class ExportDataView(APIView):
+	"""
+	GET returns the export right away (csv is streamed).
+	POST queues an export job and returns it, to be downloaded when ready.
+	"""
+	permission_classes = (permissions.IsAdminUser, )
+	export_class = None
+
+	def get(self, request, *args, **kwargs):
+		file_type = self.validate_file_type(kwargs["file_type"])
+		export = self.export_class(request.user, request.query_params)
+		return export.get_response(file_type)
+
+	def post(self, request, *args, **kwargs):
+		file_type = self.validate_file_type(kwargs["file_type"])
+		job = ExportJob.objects.create(name=self.export_class.name, file_type=file_type,
+			params=request.query_params.dict(), requested_by=request.user)
+		transaction.on_commit(lambda: queue_export(job))
+		serializer = ExportJobSerializer(job, context={"request": request})
+		return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+	def validate_file_type(self, file_type):
+		if file_type not in FILE_EXTENSIONS:
+			raise ValidationError({
+				"detail": "invalid content type. can only export csv, excel and xlsx file format."})
+		return file_type
+
+
+class ExportJobView(APIView):
+	def get(self, request, *args, **kwargs):
+		job = get_export_job(request, kwargs["id"])
+		serializer = ExportJobSerializer(job, context={"request": request})
+		return Response(serializer.data)
+
+
+class ExportJobDownloadView(APIView):
+	def get(self, request, *args, **kwargs):
+		job = get_export_job(request, kwargs["id"])
+		if job.is_ready is False:
+			raise ValidationError({"detail": f"export is {job.status_name}"})
+		return FileResponse(job.file.open('rb'), as_attachment=True,
+			filename=f"{job.name}.{FILE_EXTENSIONS[job.file_type]}")
+
+
+def get_export_job(request, id):
+	job = get_instance(ExportJob, {"id": id, "requested_by": request.user})
+	if job is None:
+		raise NotFound({"detail": "export does not exist"})
+	return job
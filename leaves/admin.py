@@ -1,14 +1,20 @@
 from django.contrib import admin
-from .models import Leave, Overtime
+from .models import Leave, LeaveBalance, Overtime
 
 
 class LeaveAdmin(admin.ModelAdmin):
 	list_display = ('employee', 'start_date', 'end_date', 'status')
 
 
+class LeaveBalanceAdmin(admin.ModelAdmin):
+	list_display = ('employee', 'year', 'leave_type', 'days_taken', 'days_pending')
+	list_filter = ('year', 'leave_type')
+
+
 class OvertimeAdmin(admin.ModelAdmin):
 	list_display = ('employee', 'date', 'hours')
 
 
 admin.site.register(Leave, LeaveAdmin)
+admin.site.register(LeaveBalance, LeaveBalanceAdmin)
 admin.site.register(Overtime, OvertimeAdmin)
@@ -0,0 +1,110 @@
+import datetime
+from django.contrib.auth import get_user_model
+from django.db.models import Q, Value
+
+from common.utils import get_leave_type, get_overtime_type
+from exports.utils import BaseExport
+from .models import DECISIONS, Leave, Overtime
+
+User = get_user_model()
+
+DECISION_NAMES = {code: name.lower() for code, name in DECISIONS}
+DECISION_CODES = {name: code for code, name in DECISION_NAMES.items()}
+
+
+class LeaveExport(BaseExport):
+	name = "leaves"
+	sheet_name = "Leaves"
+	fields = (
+		'employee__user__first_name', 'employee__user__last_name', 'employee__user__email',
+		'leave_type', 'start_date', 'end_date', 'reason', 'created_by__user__first_name',
+		'created_by__user__last_name', 'admin_status', 'date_requested'
+	)
+
+	def get_headers(self):
+		return ['First Name', 'Last Name', 'E-mail', 'Leave Type', 'Start Date', 'End Date', 
+			'Resumption Date', 'Number Of Days', 'Reason', 'Created By', 'Status', 
+			'Date Requested']
+
+	def get_data(self, leave):
+		# leave is a row of the values() projection of the fields
+		created_by = f"{leave['created_by__user__first_name'] or ''} {leave['created_by__user__last_name'] or ''}"
+		return [
+			leave['employee__user__first_name'], leave['employee__user__last_name'],
+			leave['employee__user__email'], get_leave_type(leave['leave_type']).lower(),
+			str(leave['start_date']), str(leave['end_date']),
+			str(leave['end_date'] + datetime.timedelta(days=1)),
+			(leave['end_date'] - leave['start_date']).days, leave['reason'], created_by.strip(),
+			DECISION_NAMES.get(leave['admin_status']), leave['date_requested']
+		]
+
+	def get_queryset(self):
+		try:
+			employee = self.user.employee
+			queryset = Leave.admin_objects.leaves(employee)
+			_from = self.params.get("from")
+			_to = self.params.get("to")
+			if _from is not None and _to is not None and _from != "" and _to != "":
+				queryset = Leave.admin_objects.filter_by_date(employee, _from, _to)
+			name = self.params.get("name")
+			if name is not None and name != "":
+				queryset = queryset.filter(
+					Q(employee__user__first_name__icontains=name) |
+					Q(employee__user__last_name__icontains=name) |
+					Q(employee__user__email__icontains=name)
+				)
+			queryset = queryset.with_admin_status(employee).order_by('-date_requested')
+			status = self.params.get('status', None)
+			if status:
+				queryset = queryset.filter(admin_status=DECISION_CODES.get(status.lower()))
+			return queryset
+		except User.employee.RelatedObjectDoesNotExist:
+			pass
+		return Leave.objects.annotate(admin_status=Value("N")).none()
+
+
+class OvertimeExport(BaseExport):
+	name = "overtime"
+	sheet_name = "Overtime"
+	fields = (
+		'employee__user__first_name', 'employee__user__last_name', 'employee__user__email',
+		'overtime_type', 'date', 'hours', 'reason', 'created_by__user__first_name',
+		'created_by__user__last_name', 'admin_status', 'date_requested'
+	)
+
+	def get_headers(self):
+		return ['First Name', 'Last Name', 'E-mail', 'Overtime Type', 'Date', 'Hours', 
+			'Reason', 'Created By', 'Status', 'Date Requested']
+
+	def get_data(self, overtime):
+		# overtime is a row of the values() projection of the fields
+		created_by = f"{overtime['created_by__user__first_name'] or ''} {overtime['created_by__user__last_name'] or ''}"
+		return [
+			overtime['employee__user__first_name'], overtime['employee__user__last_name'],
+			overtime['employee__user__email'], get_overtime_type(overtime['overtime_type']),
+			str(overtime['date']), str(overtime['hours']), overtime['reason'], created_by.strip(),
+			DECISION_NAMES.get(overtime['admin_status']), overtime['date_requested']
+		]
+
+	def get_queryset(self):
+		try:
+			employee = self.user.employee
+			queryset = Overtime.admin_objects.overtimes(employee)
+			_from = self.params.get("from")
+			if _from is not None and _from != "":
+				queryset = Overtime.admin_objects.filter_by_date(employee, _from)
+			name = self.params.get("name")
+			if name is not None and name != "":
+				queryset = queryset.filter(
+					Q(employee__user__first_name__icontains=name) |
+					Q(employee__user__last_name__icontains=name) |
+					Q(employee__user__email__icontains=name)
+				)
+			queryset = queryset.with_admin_status(employee).order_by('-date_requested')
+			status = self.params.get('status', None)
+			if status:
+				queryset = queryset.filter(admin_status=DECISION_CODES.get(status.lower()))
+			return queryset
+		except User.employee.RelatedObjectDoesNotExist:
+			pass
+		return Overtime.objects.annotate(admin_status=Value("N")).none()
@@ -0,0 +1,97 @@
+from collections import defaultdict
+from rest_framework import serializers
+
+from core.imports import BaseImport
+from core.utils import generate_ids
+from employees.imports import get_fixture_email
+from employees.models import Employee
+from .managers import DENIED, get_awaiting
+from .models import DECISIONS, LEAVE_CHOICES, Leave, LeaveBalance
+
+
+class LeaveImportSerializer(serializers.Serializer):
+	employee = serializers.EmailField()
+	leave_type = serializers.ChoiceField(choices=LEAVE_CHOICES, default="C")
+	start_date = serializers.DateField()
+	end_date = serializers.DateField()
+	reason = serializers.CharField()
+	a_s = serializers.ChoiceField(choices=DECISIONS, default="P")
+	a_hod = serializers.ChoiceField(choices=DECISIONS, default="P")
+	a_hr = serializers.ChoiceField(choices=DECISIONS, default="P")
+	a_md = serializers.ChoiceField(choices=DECISIONS, default="P")
+
+	def validate_employee(self, value):
+		return value.strip().lower()
+
+	def validate(self, data):
+		if data["end_date"] < data["start_date"]:
+			raise serializers.ValidationError({"end_date": "end date must be after the start date"})
+		return data
+
+
+class LeaveImport(BaseImport):
+	"""
+	Creates the leave history of the rows. Leaves that are not denied cannot
+	overlap the other leaves of the employee that are not denied.
+	"""
+	name = "leaves"
+	serializer_class = LeaveImportSerializer
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		# The periods of the leaves imported so far by employee
+		self.periods = defaultdict(list)
+		self.employee_ids = set()
+
+	def get_fixture_rows(self, objects):
+		for fields in objects["leaves.leave"].values():
+			yield {
+				"employee": get_fixture_email(objects, fields["employee"]),
+				**{field: fields.get(field) for field in (
+					"leave_type", "start_date", "end_date", "reason", "a_s", "a_hod", "a_hr", "a_md")}
+			}
+
+	def is_denied(self, row):
+		return "D" in (row["a_s"], row["a_hod"], row["a_hr"], row["a_md"])
+
+	def check_rows(self, rows):
+		employees = {emp.user.email: emp for emp in Employee.objects.select_related(
+			"user", "department").filter(user__email__in={row["employee"] for row in rows})}
+		periods = defaultdict(list)
+		for employee_id, start_date, end_date in Leave.objects.filter(
+			employee__in=employees.values(),
+			start_date__lte=max(row["end_date"] for row in rows),
+			end_date__gte=min(row["start_date"] for row in rows),
+		).exclude(DENIED).values_list("employee_id", "start_date", "end_date"):
+			periods[employee_id].append((start_date, end_date))
+
+		valid = []
+		for row in rows:
+			row["employee"] = employees.get(row["employee"])
+			if row["employee"] is None:
+				self.add_error(row, {"employee": ["employee with specified email does not exist"]})
+				continue
+			if not self.is_denied(row):
+				pk = row["employee"].pk
+				if any(start <= row["end_date"] and end >= row["start_date"]
+					for start, end in periods[pk] + self.periods[pk]):
+					self.add_error(row, {"detail": "employee has a pending or active leave within this period."})
+					continue
+				self.periods[pk].append((row["start_date"], row["end_date"]))
+			valid.append(row)
+		return valid
+
+	def create(self, rows):
+		leaves = []
+		for id, row in zip(generate_ids("lve", len(rows), "leave_id", Leave), rows):
+			row.pop("_row")
+			leave = Leave(id=id, created_by=row["employee"], **row)
+			leave.awaiting_role, leave.awaiting_id = get_awaiting(leave)
+			leaves.append(leave)
+		Leave.objects.bulk_create(leaves)
+		self.employee_ids.update(leave.employee_id for leave in leaves)
+		return len(leaves)
+
+	def finish(self):
+		if self.employee_ids:
+			LeaveBalance.objects.rebuild(employees=list(self.employee_ids))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.models import Employee
+from leaves.models import LeaveBalance
+
+
+class Command(BaseCommand):
+	help = "Rebuild the LeaveBalance ledger from the leaves"
+
+	def add_arguments(self, parser):
+		parser.add_argument("--year", type=int, help="Only rebuild the balances of this year")
+		parser.add_argument("--employee", action="append", dest="employees", metavar="ID",
+			help="Only rebuild the balances of the employee with this id. Can be repeated.")
+
+	def handle(self, *args, **options):
+		employees = None
+		if options["employees"]:
+			employees = Employee.objects.filter(id__in=options["employees"])
+			missing = set(options["employees"]) - set(employees.values_list("id", flat=True))
+			if missing:
+				raise CommandError(f"Employees with IDs {', '.join(sorted(missing))} were not found")
+		count = LeaveBalance.objects.rebuild(employees=employees, year=options["year"])
+		self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} leave balances"))
@@ -1,15 +1,106 @@
 import datetime
-from django.db import models
-from django.db.models import Q
+from collections import defaultdict
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, F, Q, Value, When
 from django.utils.timezone import now
 from rest_framework.exceptions import ValidationError
 
+from core.utils import get_app_model
 from employees.models import Employee
 
+ADMIN_STATUS_FIELDS = {"md": "a_md", "hr": "a_hr", "hod": "a_hod", "supervisor": "a_s"}
+
+# The decision fields in the order of the approval chain
+DECISION_FIELDS = (("supervisor", "a_s"), ("hod", "a_hod"), ("hr", "a_hr"), ("md", "a_md"))
+
+STATUS_CODES = {"approved": "A", "denied": "D", "expired": "E", "pending": "P"}
+
+# The fields of a leave recorded in the LeaveBalance ledger
+LEAVE_BALANCE_FIELDS = ("employee_id", "leave_type", "start_date", "end_date", "a_s", "a_hod", "a_hr", "a_md")
+
+# Name of the exclusion constraint added by migration 0007 on Postgres
+OVERLAP_CONSTRAINT_NAME = "leaves_leave_no_overlap"
+
+DENIED = Q(a_s="D") | Q(a_hod="D") | Q(a_hr="D") | Q(a_md="D")
+
+
+def get_admin_status_field(emp):
+	# The decision field of the highest ranking role of emp, as used by get_admin_status
+	return ADMIN_STATUS_FIELDS.get(emp.role.name)
+
+
+def get_awaiting(instance):
+	"""
+	The role and, for supervisors and hods, the employee a leave or overtime
+	is waiting on. (None, None) once it is approved by the md or denied.
+	"""
+	decisions = [getattr(instance, field) for role, field in DECISION_FIELDS]
+	if "D" in decisions or instance.a_md == "A":
+		return None, None
+	# An approval moves the request past the pending decisions below it
+	start = len(decisions) - decisions[::-1].index("A") if "A" in decisions else 0
+	for role, field in DECISION_FIELDS[start:]:
+		if getattr(instance, field) == "P":
+			employee = instance.employee
+			if role == "supervisor":
+				return role, employee.supervisor_id
+			elif role == "hod":
+				return role, employee.department.hod_id if employee.department_id else None
+			return role, None
+	return None, None
+
+
+def get_status_code(status):
+	# Accepts either the name or the code of a status
+	if status is None:
+		return None
+	return STATUS_CODES.get(status.lower(), status.upper())
+
+
+class StatusQuerySetMixin:
+	"""
+	Shared by LeaveQuerySet and OvertimeQuerySet. Subclasses implement
+	get_status_expression to annotate the same status as the model's
+	status property.
+	"""
+
+	def get_status_expression(self):
+		raise NotImplementedError('`get_status_expression()` must be implemented.')
+
+	def with_status(self):
+		return self.annotate(status_code=self.get_status_expression())
+
+	def filter_by_status(self, status):
+		return self.with_status().filter(status_code=get_status_code(status))
+
+	def get_status_counts(self):
+		# The approved, denied and pending counts in a single query
+		return self.with_status().aggregate(
+			approved_count=Count("pk", filter=Q(status_code="A")),
+			denied_count=Count("pk", filter=Q(status_code="D")),
+			pending_count=Count("pk", filter=Q(status_code="P")),
+		)
+
 
 # Querysets
 
-class LeaveQuerySet(models.QuerySet):
+class LeaveQuerySet(StatusQuerySetMixin, models.QuerySet):
+	def overlapping(self, start_date, end_date):
+		# Leaves that share at least one day with the range, including the ones
+		# that contain it. Served by the (employee, start_date, end_date) index.
+		return self.filter(start_date__lte=end_date, end_date__gte=start_date)
+
+	def get_status_expression(self):
+		# Same as Leave.status
+		return Case(
+			When(a_md="A", then=Value("A")),
+			When(DENIED, then=Value("D")),
+			When(start_date__lt=now().date(), then=Value("E")),
+			default=Value("P"),
+			output_field=models.CharField(),
+		)
+
 	def get_leaves_by_date(self, emp, _from, _to):
 		try:
 			if _from is None:
@@ -38,23 +129,49 @@ class LeaveQuerySet(models.QuerySet):
 		return self.none()
 
 
-class LeaveAdminQuerySet(models.QuerySet):
-	def get_leaves(self, emp):
-		if emp.is_md:
-			return self.filter(Q(a_hr="A") | Q(a_hr="N"))
-		elif emp.is_hr:
-			return self.exclude(Q(employee__is_md=True) | Q(employee__is_hr=True) | Q(a_hr="N")
-				).filter(Q(a_hod="A") | Q(a_hod="N"))
-		elif emp.is_hod:
-			return self.exclude(
-				Q(employee__is_md=True) | 
-				Q(employee__is_hr=True) |
-				Q(a_hod="N")
-				).filter(Q(employee__department__hod=emp) & (Q(a_s="A") | Q(a_s="N")))
-		elif emp.is_supervisor:
-			return self.exclude(a_s="N").filter(employee__supervisor=emp)
-		else:
+class AdminQuerySetMixin:
+	"""
+	Shared by LeaveAdminQuerySet and OvertimeAdminQuerySet. The requests
+	waiting on an admin are found with the awaiting_role and awaiting columns
+	kept by get_awaiting.
+	"""
+
+	def with_admin_status(self, emp):
+		# Annotate the decision of emp as returned by get_admin_status
+		field = get_admin_status_field(emp)
+		return self.annotate(admin_status=F(field) if field else Value("N"))
+
+	def get_awaiting_q(self, emp):
+		role = emp.role.name
+		if role == "supervisor" or role == "hod":
+			return Q(awaiting_role=role, awaiting=emp)
+		return Q(awaiting_role=role)
+
+	def get_decided_q(self, emp):
+		role = emp.role.name
+		q = Q(**{f"{ADMIN_STATUS_FIELDS[role]}__in": ("A", "D")})
+		if role == "hod":
+			return q & Q(employee__department__hod=emp)
+		elif role == "supervisor":
+			return q & Q(employee__supervisor=emp)
+		return q
+
+	def awaiting(self, emp):
+		# The requests waiting on the decision of emp
+		if emp.role.name is None:
 			return self.none()
+		return self.filter(self.get_awaiting_q(emp))
+
+	def get_requests(self, emp):
+		# The requests waiting on emp and the ones emp already decided on
+		if emp.role.name is None:
+			return self.none()
+		return self.filter(self.get_awaiting_q(emp) | self.get_decided_q(emp))
+
+
+class LeaveAdminQuerySet(AdminQuerySetMixin, models.QuerySet):
+	def get_leaves(self, emp):
+		return self.get_requests(emp)
 
 	def get_leaves_by_date(self, emp, _from, _to):
 		try:
@@ -84,7 +201,16 @@ class LeaveAdminQuerySet(models.QuerySet):
 		return self.none()
 
 
-class OvertimeQuerySet(models.QuerySet):
+class OvertimeQuerySet(StatusQuerySetMixin, models.QuerySet):
+	def get_status_expression(self):
+		# Same as Overtime.status
+		return Case(
+			When(a_md="A", then=Value("A")),
+			When(DENIED | Q(date__lt=now().date()), then=Value("D")),
+			default=Value("P"),
+			output_field=models.CharField(),
+		)
+
 	# Get all overtime from specified date to current date or specified_date
 	def get_overtime_by_date(self, emp, _from, _to=None):
 		try:
@@ -111,23 +237,9 @@ class OvertimeQuerySet(models.QuerySet):
 		return self.none()
 
 
-class OvertimeAdminQuerySet(models.QuerySet):
+class OvertimeAdminQuerySet(AdminQuerySetMixin, models.QuerySet):
 	def get_overtimes(self, emp):
-		if emp.is_md:
-			return self.filter(Q(a_hr="A") | Q(a_hr="N"))
-		elif emp.is_hr:
-			return self.exclude(Q(employee__is_md=True) | Q(employee__is_hr=True) | Q(a_hr="N")
-				).filter(Q(a_hod="A") | Q(a_hod="N"))
-		elif emp.is_hod:
-			return self.exclude(
-				Q(employee__is_md=True) | 
-				Q(employee__is_hr=True) |
-				Q(a_hod="N")
-				).filter(Q(employee__department__hod=emp) & (Q(a_s="A") | Q(a_s="N")))
-		elif emp.is_supervisor:
-			return self.exclude(a_s="N").filter(employee__supervisor=emp)
-		else:
-			return self.none()
+		return self.get_requests(emp)
 
 	def get_overtime_by_date(self, emp, _from, _to=None):
 		try:
@@ -191,7 +303,15 @@ class LeaveManager(models.Manager):
 				leave_data.update({ "a_s": "N", "a_hod": "N", "a_hr": "N", "a_md": "P" })
 			if emp.is_md is True:
 				leave_data.update({ "a_s": "N", "a_hod": "N", "a_hr": "N", "a_md": "A" })
-		return super().create(**leave_data)
+		try:
+			with transaction.atomic():
+				return super().create(**leave_data)
+		except IntegrityError as error:
+			# Raised by the overlap constraint (see LEAVE_OVERLAP_CONSTRAINT)
+			# when a concurrent request got in first
+			if OVERLAP_CONSTRAINT_NAME not in str(error):
+				raise
+			raise ValidationError({"detail": "You have a pending or active leave within this period."})
 
 	def get_queryset(self):
 		return LeaveQuerySet(self.model, using=self._db)
@@ -237,16 +357,17 @@ class LeaveAdminManager(LeaveManager):
 			raise ValueError("employee does not exist")
 		if admin is None:
 			raise ValueError("admin did not make this action")
-		if admin.user.is_staff is False:
+		role = admin.role
+		if admin.user.is_admin is False and role.is_staff is False:
 			raise ValueError("only admins can make this action")
 
-		if admin.is_md is True:
+		if role.is_md is True:
 			leaves_data.update({ "a_s": "N", "a_hod": "N", "a_hr": "N", "a_md": "A" })
-		elif admin.is_hr is True:
+		elif role.is_hr is True:
 			leaves_data.update({ "a_s": "N", "a_hod": "N", "a_hr": "A", "a_md": "P" })
-		elif admin.is_hod is True:
+		elif role.is_hod is True:
 			leaves_data.update({ "a_s": "N", "a_hod": "A", "a_hr": "P", "a_md": "P" })
-		elif admin.is_supervisor is True:
+		elif role.is_supervisor is True:
 			leaves_data.update({ "a_s": "A", "a_hod": "P", "a_hr": "P", "a_md": "P" })
 
 		return super().create(do_check=False, **leaves_data)
@@ -265,14 +386,14 @@ class LeaveAdminManager(LeaveManager):
 			else:
 				db = f"{leave.employee.user.get_full_name().capitalize()}'s supervisor"
 			return [False, f"Leave has already been denied by {db}."]
-		elif emp.is_md:
+		elif emp.role.is_md:
 			return [True, "Can amend leave"]
-		elif emp.is_hr:
+		elif emp.role.is_hr:
 			return [True, "Can amend leave"]
-		elif emp.is_hod and leave.a_hr != "A" and leave.employee.department is not None and (
+		elif emp.role.is_hod and leave.a_hr != "A" and leave.employee.department is not None and (
 			leave.employee.department.hod == emp):
 			return [True, "Can amend leave"]
-		elif emp.is_supervisor and leave.employee.supervisor == emp and (
+		elif emp.role.is_supervisor and leave.employee.supervisor == emp and (
 			leave.a_hod == "P" or leave.a_hod == "N") and ( 
 			leave.a_hr == "P") and leave.a_md == "P":
 				return [True, "Can amend leave"]
@@ -284,6 +405,9 @@ class LeaveAdminManager(LeaveManager):
 	def leaves(self, emp):
 		return self.get_queryset().get_leaves(emp)
 
+	def awaiting(self, emp):
+		return self.get_queryset().awaiting(emp)
+
 
 class OvertimeManager(models.Manager):
 	def create(self, do_check=True, **overtime_data):
@@ -378,16 +502,17 @@ class OvertimeAdminManager(OvertimeManager):
 			raise ValueError("employee does not exist")
 		if admin is None:
 			raise ValueError("admin did not make this action")
-		if admin.user.is_staff is False:
+		role = admin.role
+		if admin.user.is_admin is False and role.is_staff is False:
 			raise ValueError("only admins can make this action")
 
-		if admin.is_md is True:
+		if role.is_md is True:
 			overtime_data.update({ "a_s": "N", "a_hod": "N", "a_hr": "N", "a_md": "A" })
-		elif admin.is_hr is True:
+		elif role.is_hr is True:
 			overtime_data.update({ "a_s": "N", "a_hod": "N", "a_hr": "A", "a_md": "P" })
-		elif admin.is_hod is True:
+		elif role.is_hod is True:
 			overtime_data.update({ "a_s": "N", "a_hod": "A", "a_hr": "P", "a_md": "P" })
-		elif admin.is_supervisor is True:
+		elif role.is_supervisor is True:
 			overtime_data.update({ "a_s": "A", "a_hod": "P", "a_hr": "P", "a_md": "P" })
 
 		return super().create(do_check=False, **overtime_data)
@@ -406,14 +531,14 @@ class OvertimeAdminManager(OvertimeManager):
 			else:
 				db = f"{overtime.employee.user.get_full_name().capitalize()}'s supervisor"
 			return [False, f"Overtime has already been denied by {db}."]
-		elif emp.is_md:
+		elif emp.role.is_md:
 			return [True, "Can amend overtime"]
-		elif emp.is_hr:
+		elif emp.role.is_hr:
 			return [True, "Can amend overtime"]
-		elif emp.is_hod and overtime.a_hr != "A" and overtime.employee.department is not None and (
+		elif emp.role.is_hod and overtime.a_hr != "A" and overtime.employee.department is not None and (
 			overtime.employee.department.hod == emp):
 			return [True, "Can amend overtime"]
-		elif emp.is_supervisor and overtime.employee.supervisor == emp and (
+		elif emp.role.is_supervisor and overtime.employee.supervisor == emp and (
 			overtime.a_hod == "P" or overtime.a_hod == "N") and ( 
 			overtime.a_hr == "P") and overtime.a_md == "P":
 				return [True, "Can amend overtime"]
@@ -425,5 +550,99 @@ class OvertimeAdminManager(OvertimeManager):
 	def overtimes(self, emp):
 		return self.get_queryset().get_overtimes(emp)
 
-
-
+	def awaiting(self, emp):
+		return self.get_queryset().awaiting(emp)
+
+
+
+
+
+class LeaveBalanceManager(models.Manager):
+	"""
+	Keeps the LeaveBalance ledger in step with the leaves. Each leave adds its
+	number of days to the days taken (approved by the md) or the days pending
+	(not denied yet) of its employee, year and leave type.
+	"""
+
+	def get_entry(self, leave):
+		# The (key, days taken, days pending) a leave adds to the ledger
+		if leave is None:
+			return None
+		days = (leave["end_date"] - leave["start_date"]).days
+		key = (leave["employee_id"], leave["start_date"].year, leave["leave_type"])
+		if leave["a_md"] == "A":
+			return key, days, 0
+		elif "D" in (leave["a_s"], leave["a_hod"], leave["a_hr"], leave["a_md"]):
+			return None
+		return key, 0, days
+
+	def apply(self, entry, sign=1):
+		if entry is None:
+			return
+		(employee_id, year, leave_type), days_taken, days_pending = entry
+		if sign > 0:
+			self.get_or_create(employee_id=employee_id, year=year, leave_type=leave_type)
+		# Relative to the stored value, so concurrent decisions do not overwrite each other
+		self.filter(employee_id=employee_id, year=year, leave_type=leave_type).update(
+			days_taken=F("days_taken") + sign * days_taken,
+			days_pending=F("days_pending") + sign * days_pending)
+
+	def record(self, old_leave=None, new_leave=None):
+		# old_leave and new_leave are the LEAVE_BALANCE_FIELDS of a leave
+		# before and after it was saved (None if created or deleted)
+		old_entry = self.get_entry(old_leave)
+		new_entry = self.get_entry(new_leave)
+		if old_entry == new_entry:
+			return
+		with transaction.atomic():
+			self.apply(old_entry, -1)
+			self.apply(new_entry)
+
+	def record_many(self, changes):
+		# changes are (old_leave, new_leave) pairs as in record, the changes
+		# of the leaves of the same employee, year and type are applied at once
+		deltas = defaultdict(lambda: [0, 0])
+		for old_leave, new_leave in changes:
+			for entry, sign in ((self.get_entry(old_leave), -1), (self.get_entry(new_leave), 1)):
+				if entry is not None:
+					deltas[entry[0]][0] += sign * entry[1]
+					deltas[entry[0]][1] += sign * entry[2]
+		with transaction.atomic():
+			for key, (days_taken, days_pending) in deltas.items():
+				if days_taken or days_pending:
+					self.apply((key, days_taken, days_pending))
+
+	def rebuild(self, employees=None, year=None):
+		leaves = get_app_model("leaves.Leave").objects.all()
+		balances = self.all()
+		if employees is not None:
+			leaves = leaves.filter(employee__in=employees)
+			balances = balances.filter(employee__in=employees)
+		if year is not None:
+			leaves = leaves.filter(start_date__year=year)
+			balances = balances.filter(year=year)
+
+		totals = defaultdict(lambda: [0, 0])
+		for leave in leaves.values(*LEAVE_BALANCE_FIELDS).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+			entry = self.get_entry(leave)
+			if entry is not None:
+				totals[entry[0]][0] += entry[1]
+				totals[entry[0]][1] += entry[2]
+
+		with transaction.atomic():
+			# The existing balances are updated in place
+			existing = {(b.employee_id, b.year, b.leave_type): b for b in balances.select_for_update()}
+			to_create, to_update = [], []
+			for key in set(existing) | set(totals):
+				days_taken, days_pending = totals.get(key, (0, 0))
+				balance = existing.get(key)
+				if balance is None:
+					to_create.append(self.model(employee_id=key[0], year=key[1], leave_type=key[2],
+						days_taken=days_taken, days_pending=days_pending))
+				elif balance.days_taken != days_taken or balance.days_pending != days_pending:
+					balance.days_taken = days_taken
+					balance.days_pending = days_pending
+					to_update.append(balance)
+			self.bulk_create(to_create)
+			self.bulk_update(to_update, ["days_taken", "days_pending"])
+		return len(to_create) + len(to_update)
@@ -0,0 +1,21 @@
+# Generated by Django 4.0.3 on 2026-10-18 21:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaves', '0005_alter_leave_leave_type_alter_overtime_overtime_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['employee', 'start_date', 'end_date'], name='leaves_leav_employe_302729_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overtime',
+            index=models.Index(fields=['employee', 'date'], name='leaves_over_employe_70c3d4_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import migrations
+
+CONSTRAINT_NAME = "leaves_leave_no_overlap"
+
+
+def use_constraint(schema_editor):
+    return settings.LEAVE_OVERLAP_CONSTRAINT and schema_editor.connection.vendor == "postgresql"
+
+
+def add_overlap_constraint(apps, schema_editor):
+    if not use_constraint(schema_editor):
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(f"""
+        ALTER TABLE leaves_leave ADD CONSTRAINT {CONSTRAINT_NAME} EXCLUDE USING gist (
+            employee_id WITH =, daterange(start_date, end_date, '[]') WITH &&
+        ) WHERE (a_s <> 'D' AND a_hod <> 'D' AND a_hr <> 'D' AND a_md <> 'D')
+    """)
+
+
+def remove_overlap_constraint(apps, schema_editor):
+    if not use_constraint(schema_editor):
+        return
+    schema_editor.execute(f"ALTER TABLE leaves_leave DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaves', '0006_leave_overtime_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_overlap_constraint, remove_overlap_constraint),
+    ]
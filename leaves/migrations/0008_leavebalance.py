@@ -0,0 +1,52 @@
+# Generated by Django 4.0.3 on 2026-10-18 21:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_balances(apps, schema_editor):
+    Leave = apps.get_model('leaves', 'Leave')
+    LeaveBalance = apps.get_model('leaves', 'LeaveBalance')
+
+    balances = {}
+    for leave in Leave.objects.iterator():
+        denied = "D" in (leave.a_s, leave.a_hod, leave.a_hr, leave.a_md)
+        if leave.a_md != "A" and denied:
+            continue
+        key = (leave.employee_id, leave.start_date.year, leave.leave_type)
+        if key not in balances:
+            balances[key] = LeaveBalance(employee_id=key[0], year=key[1], leave_type=key[2])
+        days = (leave.end_date - leave.start_date).days
+        if leave.a_md == "A":
+            balances[key].days_taken += days
+        else:
+            balances[key].days_pending += days
+    LeaveBalance.objects.bulk_create(balances.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0008_employeehierarchy'),
+        ('leaves', '0007_leave_overlap_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('leave_type', models.CharField(choices=[('A', 'Annual'), ('C', 'Causal'), ('H', 'Hospitalization'), ('LOP', 'Loss Of Pay'), ('M', 'Maternity'), ('P', 'Paternity'), ('S', 'Sick')], max_length=3, verbose_name='type')),
+                ('entitlement', models.PositiveIntegerField(default=40)),
+                ('days_taken', models.IntegerField(default=0)),
+                ('days_pending', models.IntegerField(default=0)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_balances', to='employees.employee')),
+            ],
+            options={
+                'unique_together': {('employee', 'year', 'leave_type')},
+            },
+        ),
+        migrations.RunPython(build_balances, migrations.RunPython.noop),
+    ]
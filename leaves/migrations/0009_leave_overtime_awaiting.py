@@ -0,0 +1,65 @@
+# Generated by Django 4.0.3 on 2026-10-18 21:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Q
+
+DECISION_FIELDS = (("supervisor", "a_s"), ("hod", "a_hod"), ("hr", "a_hr"), ("md", "a_md"))
+
+
+def set_awaiting(apps, schema_editor):
+    # Same as leaves.managers.get_awaiting for the requests still pending
+    for model_name in ('Leave', 'Overtime'):
+        model = apps.get_model('leaves', model_name)
+        pending = model.objects.filter(a_md="P").exclude(
+            Q(a_s="D") | Q(a_hod="D") | Q(a_hr="D")).select_related('employee__department')
+        for instance in pending.iterator():
+            decisions = [getattr(instance, field) for role, field in DECISION_FIELDS]
+            start = len(decisions) - decisions[::-1].index("A") if "A" in decisions else 0
+            role = next(role for role, field in DECISION_FIELDS[start:] if getattr(instance, field) == "P")
+            awaiting_id = None
+            if role == "supervisor":
+                awaiting_id = instance.employee.supervisor_id
+            elif role == "hod" and instance.employee.department_id:
+                awaiting_id = instance.employee.department.hod_id
+            model.objects.filter(pk=instance.pk).update(awaiting_role=role, awaiting_id=awaiting_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0008_employeehierarchy'),
+        ('leaves', '0008_leavebalance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leave',
+            name='awaiting',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='awaiting_leaves', to='employees.employee'),
+        ),
+        migrations.AddField(
+            model_name='leave',
+            name='awaiting_role',
+            field=models.CharField(blank=True, choices=[('hod', 'Head Of Department'), ('hr', 'Human Resource Manager'), ('md', 'Managing Director'), ('supervisor', 'Supervisor')], max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='overtime',
+            name='awaiting',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='awaiting_overtime', to='employees.employee'),
+        ),
+        migrations.AddField(
+            model_name='overtime',
+            name='awaiting_role',
+            field=models.CharField(blank=True, choices=[('hod', 'Head Of Department'), ('hr', 'Human Resource Manager'), ('md', 'Managing Director'), ('supervisor', 'Supervisor')], max_length=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['awaiting_role', 'awaiting'], name='leaves_leav_awaitin_5948f1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overtime',
+            index=models.Index(fields=['awaiting_role', 'awaiting'], name='leaves_over_awaitin_84bf43_idx'),
+        ),
+        migrations.RunPython(set_awaiting, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.3 on 2026-10-18 22:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaves', '0009_leave_overtime_awaiting'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='leavebalance',
+            name='entitlement',
+        ),
+    ]
@@ -7,8 +7,10 @@ from django.utils.timezone import now
 from common.utils import get_overtime_type
 from employees.models import Employee
 from .managers import (
+	get_awaiting,
 	LeaveManager, 
 	LeaveAdminManager, 
+	LeaveBalanceManager,
 	OvertimeManager, 
 	OvertimeAdminManager
 )
@@ -31,6 +33,13 @@ DECISIONS = (
 	('P', 'Pending'),
 )
 
+AWAITING_ROLES = (
+	('hod', 'Head Of Department'),
+	('hr', 'Human Resource Manager'),
+	('md', 'Managing Director'),
+	('supervisor', 'Supervisor'),
+)
+
 OVERTIME_CHOICES = (
 	('C', 'Compulsory'),
 	('H', 'Holiday'),
@@ -66,12 +75,22 @@ class Leave(models.Model):
 		max_length=1, choices=DECISIONS, default='P',
 		verbose_name="Approved by MD"
 	)
+	# The admin the request is waiting on, see get_awaiting
+	awaiting_role = models.CharField(max_length=10, choices=AWAITING_ROLES, blank=True, null=True)
+	awaiting = models.ForeignKey(Employee, on_delete=models.SET_NULL,
+		related_name="awaiting_leaves", blank=True, null=True)
 	date_updated = models.DateTimeField(auto_now=True)
 	date_requested = models.DateTimeField(auto_now_add=True)
 
 	objects = LeaveManager()
 	admin_objects = LeaveAdminManager()
 
+	class Meta:
+		indexes = [
+			models.Index(fields=["employee", "start_date", "end_date"]),
+			models.Index(fields=["awaiting_role", "awaiting"]),
+		]
+
 	def __str__(self):
 		return f"""{
 			self.employee.user.email.capitalize()} type {self.leave_type} from {self.start_date} to {self.end_date
@@ -83,6 +102,7 @@ class Leave(models.Model):
 		elif self.created_by is not None and (
 			self.created_by.user.is_staff is False) and self.created_by != self.employee:
 			raise ValueError("Created by must be a staff or the employee himself")
+		self.awaiting_role, self.awaiting_id = get_awaiting(self)
 		return super().save(*args,**kwargs)
 
 	def get_absolute_url(self):
@@ -177,6 +197,29 @@ class Leave(models.Model):
 		return False
 
 
+class LeaveBalance(models.Model):
+	"""
+	Ledger of the days taken and pending per employee, year and leave type.
+	Updated by the Leave signals and rebuilt by `manage.py rebuild_leave_balances`.
+	The days remaining are the LEAVE_TOTAL of the year less the days taken of
+	all the types, see Employee.leaves_remaining.
+	"""
+	employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="leave_balances")
+	year = models.PositiveSmallIntegerField()
+	leave_type = models.CharField(max_length=3, choices=LEAVE_CHOICES, verbose_name="type")
+	days_taken = models.IntegerField(default=0)
+	days_pending = models.IntegerField(default=0)
+	date_updated = models.DateTimeField(auto_now=True)
+
+	objects = LeaveBalanceManager()
+
+	class Meta:
+		unique_together = ["employee", "year", "leave_type"]
+
+	def __str__(self):
+		return f"{self.employee} {self.leave_type} in {self.year}"
+
+
 class Overtime(models.Model):
 	overtime_id = models.BigAutoField(primary_key=True)
 	id = models.CharField(max_length=ID_LENGTH, unique=True, editable=False)
@@ -203,12 +246,22 @@ class Overtime(models.Model):
 		max_length=1, choices=DECISIONS, default='P',
 		verbose_name="Approved by MD"
 	)
+	# The admin the request is waiting on, see get_awaiting
+	awaiting_role = models.CharField(max_length=10, choices=AWAITING_ROLES, blank=True, null=True)
+	awaiting = models.ForeignKey(Employee, on_delete=models.SET_NULL,
+		related_name="awaiting_overtime", blank=True, null=True)
 	date_updated = models.DateTimeField(auto_now=True)
 	date_requested = models.DateTimeField(auto_now_add=True)
 
 	objects = OvertimeManager()
 	admin_objects = OvertimeAdminManager()
 
+	class Meta:
+		indexes = [
+			models.Index(fields=["employee", "date"]),
+			models.Index(fields=["awaiting_role", "awaiting"]),
+		]
+
 	def __str__(self):
 		return f"{self.employee.user.email.capitalize()} on {self.date}"
 
@@ -218,6 +271,7 @@ class Overtime(models.Model):
 		elif self.created_by is not None and (
 			self.created_by.user.is_staff is False) and self.created_by != self.employee:
 			raise ValueError("Created by must be a staff or the employee himself")
+		self.awaiting_role, self.awaiting_id = get_awaiting(self)
 		return super().save(*args,**kwargs)
 
 	def get_absolute_url(self):
@@ -5,27 +5,26 @@ from core.pagination import CustomLimitOffsetPagination
 
 
 class LeavePagination(CustomLimitOffsetPagination):
+	cursor_ordering = ("-date_requested", "-pk")
+
 	def get_paginated_response(self, data, queryset):
+		counts = self.get_status_counts(queryset)
 		return Response(OrderedDict([
-			('approved_count', self.get_status_count(queryset, "A")),
+			('approved_count', counts["approved_count"]),
 			('count', self.count),
-			('denied_count', self.get_status_count(queryset, "D")),
+			('denied_count', counts["denied_count"]),
 			('next', self.get_next_link()),
-			('pending_count', self.get_status_count(queryset, "P")),
+			('pending_count', counts["pending_count"]),
 			('previous', self.get_previous_link()),
 			('results', data),
 		]))
-		
-	def get_status_count(self, queryset, status):
+
+	def get_status_counts(self, queryset):
 		try:
-			leave_count = 0
-			for leave in queryset:
-				if leave.status == status:
-					leave_count += 1
-			return leave_count
+			return queryset.get_status_counts()
 		except:
 			pass
-		return 0
+		return {"approved_count": 0, "denied_count": 0, "pending_count": 0}
 
 
 class LeaveAdminPagination(CustomLimitOffsetPagination):
@@ -43,7 +42,9 @@ class LeaveAdminPagination(CustomLimitOffsetPagination):
 	def get_status_count(self, queryset, status):
 		try:
 			employee = self.request.user.employee
-			if employee.is_md:
+			if status == "P":
+				return queryset.awaiting(employee).count()
+			elif employee.is_md:
 				return queryset.filter(a_md=status).count()
 			elif employee.is_hr:
 				return queryset.filter(a_hr=status).count()
@@ -59,27 +60,26 @@ class LeaveAdminPagination(CustomLimitOffsetPagination):
 
 
 class OvertimePagination(CustomLimitOffsetPagination):
+	cursor_ordering = ("-date_requested", "-pk")
+
 	def get_paginated_response(self, data, queryset):
+		counts = self.get_status_counts(queryset)
 		return Response(OrderedDict([
-			('approved_count', self.get_status_count(queryset, "A")),
+			('approved_count', counts["approved_count"]),
 			('count', self.count),
-			('denied_count', self.get_status_count(queryset, "D")),
+			('denied_count', counts["denied_count"]),
 			('next', self.get_next_link()),
-			('pending_count', self.get_status_count(queryset, "P")),
+			('pending_count', counts["pending_count"]),
 			('previous', self.get_previous_link()),
 			('results', data),
 		]))
-		
-	def get_status_count(self, queryset, status):
+
+	def get_status_counts(self, queryset):
 		try:
-			overtime_count = 0
-			for overtime in queryset:
-				if overtime.status == status:
-					overtime_count += 1
-			return overtime_count
+			return queryset.get_status_counts()
 		except:
 			pass
-		return 0
+		return {"approved_count": 0, "denied_count": 0, "pending_count": 0}
 
 
 class OvertimeAdminPagination(CustomLimitOffsetPagination):
@@ -97,7 +97,9 @@ class OvertimeAdminPagination(CustomLimitOffsetPagination):
 	def get_status_count(self, queryset, status):
 		try:
 			employee = self.request.user.employee
-			if employee.is_md:
+			if status == "P":
+				return queryset.awaiting(employee).count()
+			elif employee.is_md:
 				return queryset.filter(a_md=status).count()
 			elif employee.is_hr:
 				return queryset.filter(a_hr=status).count()
@@ -4,6 +4,7 @@ from rest_framework.exceptions import PermissionDenied, ValidationError
 from common.serializer_fields import CustomChoiceField
 from common.utils import get_instance, get_user_info, get_leave_type, get_overtime_type
 from employees.models import Employee
+from employees.roles import EmployeeRole
 from .models import Leave, Overtime
 
 
@@ -113,25 +114,25 @@ class LeaveAdminSerializer(LeaveSerializer):
 		return employee
 
 	def get_admin_status(self, obj):
-		user = self.context.get("request").user
-		if user is None:
+		request = self.context.get("request")
+		if request is None or request.user is None:
 			return None
-		employee = get_instance(Employee, {"user": user})
-		if employee is None:
+		role = EmployeeRole.for_request(request)
+		if role is None:
 			return None
-		if employee.is_md is True:
+		if role.is_md is True:
 			if obj.a_md == "P" and obj.status == "E":
 				return get_status("E")
 			return get_status(obj.a_md)
-		if employee.is_hr is True:
+		if role.is_hr is True:
 			if obj.a_hr == "P" and obj.status == "E":
 				return get_status("E")
 			return get_status(obj.a_hr)
-		if employee.is_hod is True:
+		if role.is_hod is True:
 			if obj.a_hod == "P" and obj.status == "E":
 				return get_status("E")
 			return get_status(obj.a_hod)
-		if employee.is_supervisor is True:
+		if role.is_supervisor is True:
 			if obj.a_s == "P" and obj.status == "E":
 				return get_status("E")
 			return get_status(obj.a_s)
@@ -220,25 +221,25 @@ class OvertimeAdminSerializer(OvertimeSerializer):
 		return employee
 
 	def get_admin_status(self, obj):
-		user = self.context.get("request").user
-		if user is None:
+		request = self.context.get("request")
+		if request is None or request.user is None:
 			return None
-		employee = get_instance(Employee, {"user": user})
-		if employee is None:
+		role = EmployeeRole.for_request(request)
+		if role is None:
 			return None
-		if employee.is_md is True:
+		if role.is_md is True:
 			if obj.a_md == "P" and obj.status == "E":
 				return get_status("E")
 			return get_status(obj.a_md)
-		if employee.is_hr is True:
+		if role.is_hr is True:
 			if obj.a_hr == "P" and obj.status == "E":
 				return get_status("E")
 			return get_status(obj.a_hr)
-		if employee.is_hod is True:
+		if role.is_hod is True:
 			if obj.a_hod == "P" and obj.status == "E":
 				return get_status("E")
 			return get_status(obj.a_hod)
-		if employee.is_supervisor is True:
+		if role.is_supervisor is True:
 			if obj.a_s == "P" and obj.status == "E":
 				return get_status("E")
 			return get_status(obj.a_s)
@@ -1,3 +1,4 @@
+import logging
 from django.conf import settings
 from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
@@ -5,12 +6,15 @@ from django.template.loader import render_to_string
 
 from common.utils import get_instance, get_instances, get_name_prefix, get_leave_type, get_overtime_type
 from core.utils import generate_id
-from employees.models import Employee
-from leaves.tasks import send_email_task
-from notifications.models import Notification
-from .models import Leave, Overtime
+from employees.cache import invalidate_attendance_info
+from employees.models import Department, Employee
+from notifications.models import Notification, OutboxMessage
+from .managers import LEAVE_BALANCE_FIELDS
+from .models import Leave, LeaveBalance, Overtime
 from .utils import send_leave_email, send_overtime_email
 
+logger = logging.getLogger(__name__)
+
 
 @receiver(pre_save, sender=Leave)
 def set_leave_id(sender, instance, **kwargs):
@@ -18,6 +22,15 @@ def set_leave_id(sender, instance, **kwargs):
 		instance.id = generate_id("lve", key="leave_id", model=Leave)
 
 
+@receiver(pre_save, sender=Leave)
+def get_leave_balance_fields(sender, instance, **kwargs):
+	# Kept for update_leave_balance to take the previous state off the ledger
+	instance._balance_fields = None
+	if instance.pk is not None:
+		instance._balance_fields = Leave.objects.filter(pk=instance.pk).values(
+			*LEAVE_BALANCE_FIELDS).first()
+
+
 @receiver(pre_save, sender=Overtime)
 def set_overtime_id(sender, instance, **kwargs):
 	if not instance.id:
@@ -73,7 +86,7 @@ def send_leave_email_signal(sender, instance, created, **kwargs):
 					"reason": instance.reason
 				}
 				email_body = render_to_string('leaves/employee_to_admin.txt', context)
-				send_email_task(message, email_body, settings.LEAVE_EMAIL, [recipient.user.email])
+				OutboxMessage.objects.queue(message, email_body, settings.LEAVE_EMAIL, [recipient.user.email])
 			else: # Created By An Admin
 				recipient = get_instance(Employee, {"is_md": True})
 				admin = instance.created_by
@@ -117,7 +130,7 @@ def send_leave_email_signal(sender, instance, created, **kwargs):
 					if admin.job:
 						context.update({"admin_job": instance.created_by.job.name})
 					email_body = render_to_string('leaves/admin_to_admin.txt', context)
-					send_email_task(message, email_body, settings.LEAVE_EMAIL, [recipient.user.email])
+					OutboxMessage.objects.queue(message, email_body, settings.LEAVE_EMAIL, [recipient.user.email])
 				message=f"{admin.user.get_full_name().upper()} sent a request for leave on your behalf"
 				Notification.objects.create(_type="L", sender=admin, recipient=employee,
 					message=message, message_id=instance.id)
@@ -136,9 +149,9 @@ def send_leave_email_signal(sender, instance, created, **kwargs):
 				if admin.job:
 					context.update({"admin_job": admin.job.name})
 				email_body = render_to_string('leaves/admin_to_employee.txt', context)
-				send_email_task(message, email_body, settings.LEAVE_EMAIL, [employee.user.email])
-	except:
-		pass
+				OutboxMessage.objects.queue(message, email_body, settings.LEAVE_EMAIL, [employee.user.email])
+	except Exception:
+		logger.exception(f"Could not notify the admins of leave {instance.id}")
 
 
 @receiver(post_save, sender=Overtime)
@@ -189,7 +202,7 @@ def send_overtime_email_signal(sender, instance, created, **kwargs):
 					"reason": instance.reason
 				}
 				email_body = render_to_string('overtimes/employee_to_admin.txt', context)
-				send_email_task(message, email_body, settings.OVERTIME_EMAIL, [recipient.user.email])
+				OutboxMessage.objects.queue(message, email_body, settings.OVERTIME_EMAIL, [recipient.user.email])
 			else: # Created By An Admin
 				recipient = get_instance(Employee, {"is_md": True})
 				admin = instance.created_by
@@ -232,7 +245,7 @@ def send_overtime_email_signal(sender, instance, created, **kwargs):
 					if admin.job:
 						context.update({"admin_job": instance.created_by.job.name})
 					email_body = render_to_string('overtimes/admin_to_admin.txt', context)
-					send_email_task(message, email_body, settings.OVERTIME_EMAIL, [recipient.user.email])
+					OutboxMessage.objects.queue(message, email_body, settings.OVERTIME_EMAIL, [recipient.user.email])
 				message=f"{admin.user.get_full_name().upper()} sent a request for overtime on your behalf"
 				Notification.objects.create(_type="O", sender=admin, recipient=employee,
 					message=message, message_id=instance.id)
@@ -250,22 +263,56 @@ def send_overtime_email_signal(sender, instance, created, **kwargs):
 				if admin.job:
 					context.update({"admin_job": admin.job.name})
 				email_body = render_to_string('overtimes/admin_to_employee.txt', context)
-				send_email_task(message, email_body, settings.OVERTIME_EMAIL, [employee.user.email])
-	except:
-		pass
+				OutboxMessage.objects.queue(message, email_body, settings.OVERTIME_EMAIL, [employee.user.email])
+	except Exception:
+		logger.exception(f"Could not notify the admins of overtime {instance.id}")
 
 
 @receiver(post_delete, sender=Leave)
 def delete_notification(sender, instance, **kwargs):
-	notifications = get_instances(Notification, {"_type": "L", "message_id": instance.id})
-	if notifications is not None:
-		for note in notifications:
-			note.delete()
+	Notification.objects.filter(_type="L", message_id=instance.id).bulk_delete()
 
 
 @receiver(post_delete, sender=Overtime)
 def delete_notification(sender, instance, **kwargs):
-	notifications = get_instances(Notification, {"_type": "O", "message_id": instance.id})
-	if notifications is not None:
-		for note in notifications:
-			note.delete()
+	Notification.objects.filter(_type="O", message_id=instance.id).bulk_delete()
+
+
+@receiver(post_save, sender=Overtime)
+@receiver(post_delete, sender=Overtime)
+def reset_attendance_info(sender, instance, **kwargs):
+	invalidate_attendance_info(instance.employee_id)
+
+
+@receiver(post_save, sender=Leave)
+def update_leave_balance(sender, instance, **kwargs):
+	new_fields = {field: getattr(instance, field) for field in LEAVE_BALANCE_FIELDS}
+	LeaveBalance.objects.record(getattr(instance, "_balance_fields", None), new_fields)
+
+
+@receiver(post_delete, sender=Leave)
+def remove_leave_balance(sender, instance, **kwargs):
+	old_fields = {field: getattr(instance, field) for field in LEAVE_BALANCE_FIELDS}
+	LeaveBalance.objects.record(old_fields, None)
+
+
+@receiver(post_save, sender=Employee)
+def update_awaiting_employee(sender, instance, created, **kwargs):
+	# Pending requests follow a change of supervisor or department
+	if created:
+		return
+	hod_id = instance.department.hod_id if instance.department_id else None
+	for model in (Leave, Overtime):
+		model.objects.filter(employee=instance, awaiting_role="supervisor").exclude(
+			awaiting=instance.supervisor_id).update(awaiting=instance.supervisor_id)
+		model.objects.filter(employee=instance, awaiting_role="hod").exclude(
+			awaiting=hod_id).update(awaiting=hod_id)
+
+
+@receiver(post_save, sender=Department)
+def update_awaiting_hod(sender, instance, created, **kwargs):
+	if created:
+		return
+	for model in (Leave, Overtime):
+		model.objects.filter(employee__department=instance, awaiting_role="hod").exclude(
+			awaiting=instance.hod_id).update(awaiting=instance.hod_id)
@@ -1,16 +1,30 @@
 from celery import shared_task
 from celery.utils.log import get_task_logger
-from django.conf import settings
-from django.core.mail import EmailMessage
 
 logger = get_task_logger(__name__)
 
 @shared_task
 def send_email_task(message, body, _from, to):
-	if isinstance(to, list) is False and isinstance(to, tuple) is False:
-		to = [to]
-	if _from is None:
-		_from = settings.DEFAULT_FROM_EMAIL
-	email = EmailMessage(message, body, _from, to)
-	logger.info("Sent E-mail")
-	return email.send(fail_silently=False)
\ No newline at end of file
+	# Kept for the tasks queued before the outbox, the e-mail is sent
+	# with the other pending e-mails by notifications.tasks.dispatch_outbox_task
+	from notifications.models import OutboxMessage
+	OutboxMessage.objects.queue(message, body, _from, to)
+	logger.info("Queued E-mail")
+
+
+@shared_task
+def send_decision_emails_task(_type, admin_id, ids, decision):
+	# Notifications and e-mails of the decisions made through the bulk views,
+	# _type is "L" for leaves and "O" for overtime
+	from employees.models import Employee
+	from .models import Leave, Overtime
+	from .utils import get_position, send_leave_email, send_overtime_email
+
+	admin = Employee.objects.select_related("user", "job").get(pk=admin_id)
+	model, send_email = (Leave, send_leave_email) if _type == "L" else (Overtime, send_overtime_email)
+	instances = model.objects.filter(id__in=ids).select_related(
+		"employee__user", "employee__department__hod__user", "created_by__user")
+	for instance in instances:
+		[position, to] = get_position(admin, instance)
+		send_email(decision, admin, instance, to, position)
+	logger.info(f"Sent the decisions of {len(ids)} requests")
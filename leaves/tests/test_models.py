@@ -1,10 +1,14 @@
+from io import StringIO
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.exceptions import ValidationError
 
 from common.utils import get_instance
-from leaves.models import Leave, Overtime
+from leaves.models import Leave, LeaveBalance, Overtime
 from notifications.models import Notification
 
 from .test_setup import get_date, TestSetUp
@@ -20,9 +24,10 @@ global_end_date = get_date(1)
 class LeaveTests(TestSetUp):
 	def test_create_leave_by_employee(self):
 		can_request = Leave.objects.can_request_leave(self.employee, global_start_date, global_end_date)[0]
-		leave = Leave.objects.create(
-			employee=self.employee, leave_type="C", start_date=global_start_date,
-			end_date=global_end_date, reason="Testing purposes")
+		with self.captureOnCommitCallbacks(execute=True):
+			leave = Leave.objects.create(
+				employee=self.employee, leave_type="C", start_date=global_start_date,
+				end_date=global_end_date, reason="Testing purposes")
 		email = mail.outbox[0]
 
 		self.assertEqual(email.from_email, settings.LEAVE_EMAIL)
@@ -45,9 +50,10 @@ class LeaveTests(TestSetUp):
 		self.assertFalse(Leave.objects.can_update_leave(leave, self.md))
 
 	def test_create_leave_by_employee1(self):
-		leave = Leave.objects.create(
-			employee=self.employee1, leave_type="C", start_date=global_start_date,
-			end_date=global_end_date, reason="Testing purposes")
+		with self.captureOnCommitCallbacks(execute=True):
+			leave = Leave.objects.create(
+				employee=self.employee1, leave_type="C", start_date=global_start_date,
+				end_date=global_end_date, reason="Testing purposes")
 		email = mail.outbox[0]
 
 		notification = get_instance(Notification, {"message_id": leave.id, "_type": "L",
@@ -74,9 +80,10 @@ class LeaveTests(TestSetUp):
 
 
 	def test_create_leave_by_supervisor(self):
-		leave = Leave.objects.create(
-			employee=self.supervisor, leave_type="C", start_date=global_start_date,
-			end_date=global_end_date, reason="Testing purposes")
+		with self.captureOnCommitCallbacks(execute=True):
+			leave = Leave.objects.create(
+				employee=self.supervisor, leave_type="C", start_date=global_start_date,
+				end_date=global_end_date, reason="Testing purposes")
 		email = mail.outbox[0]
 
 		self.assertEqual(email.from_email, settings.LEAVE_EMAIL)
@@ -93,9 +100,10 @@ class LeaveTests(TestSetUp):
 		self.assertTrue(Leave.objects.can_view_leave(leave, self.md))
 
 	def test_create_leave_by_hod(self):
-		leave = Leave.objects.create(
-			employee=self.hod, leave_type="C", start_date=global_start_date,
-			end_date=global_end_date, reason="Testing purposes")
+		with self.captureOnCommitCallbacks(execute=True):
+			leave = Leave.objects.create(
+				employee=self.hod, leave_type="C", start_date=global_start_date,
+				end_date=global_end_date, reason="Testing purposes")
 		email = mail.outbox[0]
 
 		self.assertEqual(email.from_email, settings.LEAVE_EMAIL)
@@ -112,9 +120,10 @@ class LeaveTests(TestSetUp):
 		self.assertTrue(Leave.objects.can_view_leave(leave, self.md))
 
 	def test_create_leave_by_hr(self):
-		leave = Leave.objects.create(
-			employee=self.hr, leave_type="C", start_date=global_start_date,
-			end_date=global_end_date, reason="Testing purposes")
+		with self.captureOnCommitCallbacks(execute=True):
+			leave = Leave.objects.create(
+				employee=self.hr, leave_type="C", start_date=global_start_date,
+				end_date=global_end_date, reason="Testing purposes")
 		email = mail.outbox[0]
 
 		self.assertEqual(email.from_email, settings.LEAVE_EMAIL)
@@ -162,6 +171,81 @@ class LeaveTests(TestSetUp):
 				employee=self.employee, leave_type="C", start_date=global_start_date,
 				end_date=global_start_date, reason="Testing purposes")
 
+	def test_has_pending_or_active_leave(self):
+		Leave(employee=self.employee, start_date=get_date(10), end_date=get_date(20),
+			reason="Testing purposes", a_md="A").save()
+		Leave(employee=self.employee, start_date=get_date(30), end_date=get_date(32),
+			reason="Testing purposes").save()
+		Leave(employee=self.employee, start_date=get_date(40), end_date=get_date(42),
+			reason="Testing purposes", a_hr="D").save()
+
+		# A range within an approved leave
+		self.assertTrue(self.employee.has_active_leave(get_date(12), get_date(14)))
+		self.assertEqual(self.employee.has_pending_or_active_leave(get_date(12), get_date(14))[1],
+			f"You are on leave from {get_date(10)} to {get_date(20)}")
+		# A range containing a pending leave
+		self.assertTrue(self.employee.has_pending_leave(get_date(25), get_date(35)))
+		self.assertFalse(self.employee.has_active_leave(get_date(25), get_date(35)))
+		self.assertEqual(self.employee.has_pending_or_active_leave(get_date(25), get_date(35))[1],
+			f"You have pending leave request from {get_date(30)} to {get_date(32)}")
+		# Denied leaves are ignored
+		self.assertFalse(self.employee.has_pending_or_active_leave(get_date(41), get_date(41))[0])
+		self.assertFalse(self.employee.has_pending_leave(get_date(21), get_date(29)))
+
+	def test_has_pending_or_active_leave_query_count(self):
+		# The check is a single query however long the leave history is
+		def get_query_count():
+			with CaptureQueriesContext(connection) as context:
+				self.employee.has_pending_or_active_leave(get_date(1), get_date(2))
+			return len(context.captured_queries)
+
+		counts = []
+		for size in (1, 50):
+			Leave.objects.bulk_create([Leave(employee=self.employee, created_by=self.employee,
+				id=f"lv{size}{no}", start_date=get_date(-1000 + no * 3), end_date=get_date(-999 + no * 3),
+				reason="Testing purposes", a_md="A") for no in range(size)])
+			counts.append(get_query_count())
+		self.assertEqual(counts, [1, 1])
+
+
+
+""" Leave Balance Model Tests """
+class LeaveBalanceTests(TestSetUp):
+	def get_balance(self, leave):
+		return LeaveBalance.objects.filter(employee=leave.employee, year=leave.start_date.year,
+			leave_type=leave.leave_type).values("days_taken", "days_pending").first()
+
+	def test_update_leave_balance(self):
+		leave = Leave.objects.create(employee=self.employee, leave_type="A", start_date=get_date(2),
+			end_date=get_date(5), reason="Testing purposes")
+		balance1 = self.get_balance(leave)
+		leave.a_md = "A"
+		leave.save()
+		balance2 = self.get_balance(leave)
+		leave.a_md = "D"
+		leave.save()
+		balance3 = self.get_balance(leave)
+		leave.a_md = "P"
+		leave.save()
+		leave.delete()
+		balance4 = self.get_balance(leave)
+
+		self.assertEqual(balance1, {"days_taken": 0, "days_pending": 3})
+		self.assertEqual(balance2, {"days_taken": 3, "days_pending": 0})
+		self.assertEqual(balance3, {"days_taken": 0, "days_pending": 0})
+		self.assertEqual(balance4, {"days_taken": 0, "days_pending": 0})
+
+	def test_rebuild_leave_balances(self):
+		leave = Leave.objects.create(employee=self.employee, leave_type="S", start_date=get_date(2),
+			end_date=get_date(4), reason="Testing purposes")
+		Leave.objects.filter(pk=leave.pk).update(a_md="A") # Bypasses the signals
+		stale_balance = self.get_balance(leave)
+		call_command("rebuild_leave_balances", stdout=StringIO())
+
+		self.assertEqual(stale_balance, {"days_taken": 0, "days_pending": 2})
+		self.assertEqual(self.get_balance(leave), {"days_taken": 2, "days_pending": 0})
+		self.assertEqual(self.employee.leaves_taken, 2 if leave.start_date.year == get_date().year else 0)
+
 
 """ Leave Admin Model Tests"""
 class LeaveAdminTests(TestSetUp):
@@ -195,9 +279,10 @@ class LeaveAdminTests(TestSetUp):
 	def test_create_leave_by_supervisor_for_employee(self):
 		""" Test that supervisor can create a leave """
 		can_request = Leave.objects.can_request_leave(self.employee, global_start_date, global_end_date)[0]
-		leave = Leave.admin_objects.create(
-			employee=self.employee, leave_type="C", start_date=global_start_date,
-			end_date=global_end_date, reason="Testing purposes", created_by=self.supervisor)
+		with self.captureOnCommitCallbacks(execute=True):
+			leave = Leave.admin_objects.create(
+				employee=self.employee, leave_type="C", start_date=global_start_date,
+				end_date=global_end_date, reason="Testing purposes", created_by=self.supervisor)
 		a_mail = mail.outbox[0]
 		e_mail = mail.outbox[1]
 
@@ -225,9 +310,10 @@ class LeaveAdminTests(TestSetUp):
 	def test_create_leave_by_hod_for_employee(self):
 		""" Test that hod can create a leave """
 		can_request = Leave.objects.can_request_leave(self.employee, global_start_date, global_end_date)[0]
-		leave = Leave.admin_objects.create(
-			employee=self.employee, leave_type="C", start_date=global_start_date,
-			end_date=global_end_date, reason="Testing purposes", created_by=self.hod)
+		with self.captureOnCommitCallbacks(execute=True):
+			leave = Leave.admin_objects.create(
+				employee=self.employee, leave_type="C", start_date=global_start_date,
+				end_date=global_end_date, reason="Testing purposes", created_by=self.hod)
 		a_mail = mail.outbox[0]
 		e_mail = mail.outbox[1]
 
@@ -255,9 +341,10 @@ class LeaveAdminTests(TestSetUp):
 	def test_create_leave_by_hr_for_employee(self):
 		""" Test that HR can create a leave """
 		can_request = Leave.objects.can_request_leave(self.employee, global_start_date, global_end_date)[0]
-		leave = Leave.admin_objects.create(
-			employee=self.employee, leave_type="C", start_date=global_start_date,
-			end_date=global_end_date, reason="Testing purposes", created_by=self.hr)
+		with self.captureOnCommitCallbacks(execute=True):
+			leave = Leave.admin_objects.create(
+				employee=self.employee, leave_type="C", start_date=global_start_date,
+				end_date=global_end_date, reason="Testing purposes", created_by=self.hr)
 		a_mail = mail.outbox[0]
 		e_mail = mail.outbox[1]
 
@@ -285,9 +372,10 @@ class LeaveAdminTests(TestSetUp):
 	def test_create_leave_by_md_for_employee(self):
 		""" Test that md can create a leave """
 		can_request = Leave.objects.can_request_leave(self.employee, global_start_date, global_end_date)[0]
-		leave = Leave.admin_objects.create(
-			employee=self.employee, leave_type="C", start_date=global_start_date,
-			end_date=global_end_date, reason="Testing purposes", created_by=self.md)
+		with self.captureOnCommitCallbacks(execute=True):
+			leave = Leave.admin_objects.create(
+				employee=self.employee, leave_type="C", start_date=global_start_date,
+				end_date=global_end_date, reason="Testing purposes", created_by=self.md)
 		email = mail.outbox[0]
 
 		self.assertEqual(email.from_email, settings.LEAVE_EMAIL)
@@ -309,14 +397,48 @@ class LeaveAdminTests(TestSetUp):
 		self.assertFalse(Leave.objects.can_update_leave(leave, self.hr))
 		self.assertTrue(Leave.objects.can_update_leave(leave, self.md))
 
+	def test_leave_awaiting_approver(self):
+		leave = Leave.objects.create(employee=self.employee, leave_type="C", start_date=global_start_date,
+			end_date=global_end_date, reason="Testing purposes")
+		awaiting1 = (leave.awaiting_role, leave.awaiting)
+		leave.a_s = "A"
+		leave.save()
+		awaiting2 = (leave.awaiting_role, leave.awaiting)
+		hod_inbox = list(Leave.admin_objects.awaiting(self.hod))
+
+		# A new head of department takes over the pending requests
+		self.department.hod = self.supervisor
+		self.department.save()
+		leave.refresh_from_db()
+		awaiting3 = (leave.awaiting_role, leave.awaiting)
+
+		# The hr's approval moves the leave past the hod
+		leave.a_hr = "A"
+		leave.save()
+		awaiting4 = (leave.awaiting_role, leave.awaiting)
+		md_inbox = list(Leave.admin_objects.awaiting(self.md))
+		leave.a_md = "A"
+		leave.save()
+
+		self.assertEqual(awaiting1, ("supervisor", self.supervisor))
+		self.assertEqual(awaiting2, ("hod", self.hod))
+		self.assertEqual(hod_inbox, [leave])
+		self.assertEqual(awaiting3, ("hod", self.supervisor))
+		self.assertEqual(awaiting4, ("md", None))
+		self.assertEqual(md_inbox, [leave])
+		self.assertEqual((leave.awaiting_role, leave.awaiting), (None, None))
+		self.assertEqual(list(Leave.admin_objects.leaves(self.md)), [leave])
+		self.assertFalse(Leave.admin_objects.awaiting(self.md).exists())
+
 
 """ Overtime Model Tests """
 class OvertimeTests(TestSetUp):
 	# Test to check authorized overtime if created by an employee
 	def test_create_overtime_by_employee(self):
-		overtime = Overtime.objects.create(
-			employee=self.employee, overtime_type="O", date=global_start_date,
-			hours=1, reason="Testing purposes")
+		with self.captureOnCommitCallbacks(execute=True):
+			overtime = Overtime.objects.create(
+				employee=self.employee, overtime_type="O", date=global_start_date,
+				hours=1, reason="Testing purposes")
 		email = mail.outbox[0]
 
 		self.assertEqual(email.from_email, settings.OVERTIME_EMAIL)
@@ -339,9 +461,10 @@ class OvertimeTests(TestSetUp):
 	# Test create overtime by employee without a supervisor or hod.
 	# Email should be sent directly to HR
 	def test_create_overtime_by_employee1(self):
-		overtime = Overtime.objects.create(
-			employee=self.employee1, overtime_type="C", date=global_start_date,
-			hours=1, reason="Testing purposes")
+		with self.captureOnCommitCallbacks(execute=True):
+			overtime = Overtime.objects.create(
+				employee=self.employee1, overtime_type="C", date=global_start_date,
+				hours=1, reason="Testing purposes")
 		email = mail.outbox[0]
 
 		notification = get_instance(Notification, {"message_id": overtime.id, "_type": "O",
@@ -368,9 +491,10 @@ class OvertimeTests(TestSetUp):
 
 	# Test create overtime for supervisor by supervisor
 	def test_create_overtime_by_supervisor(self):
-		overtime = Overtime.objects.create(
-			employee=self.supervisor, overtime_type="C", date=global_start_date,
-			hours=1, reason="Testing purposes")
+		with self.captureOnCommitCallbacks(execute=True):
+			overtime = Overtime.objects.create(
+				employee=self.supervisor, overtime_type="C", date=global_start_date,
+				hours=1, reason="Testing purposes")
 		email = mail.outbox[0]
 
 		self.assertEqual(email.from_email, settings.OVERTIME_EMAIL)
@@ -388,9 +512,10 @@ class OvertimeTests(TestSetUp):
 
 	# Test create overtime by hod for hod
 	def test_create_overtime_by_hod(self):
-		overtime = Overtime.objects.create(
-			employee=self.hod, overtime_type="C", date=global_start_date,
-			hours=1, reason="Testing purposes")
+		with self.captureOnCommitCallbacks(execute=True):
+			overtime = Overtime.objects.create(
+				employee=self.hod, overtime_type="C", date=global_start_date,
+				hours=1, reason="Testing purposes")
 		email = mail.outbox[0]
 
 		self.assertEqual(email.from_email, settings.OVERTIME_EMAIL)
@@ -408,9 +533,10 @@ class OvertimeTests(TestSetUp):
 
 	# Test create overtime by hr for hr
 	def test_create_overtime_by_hr(self):
-		overtime = Overtime.objects.create(
-			employee=self.hr, overtime_type="C", date=global_start_date,
-			hours=1, reason="Testing purposes")
+		with self.captureOnCommitCallbacks(execute=True):
+			overtime = Overtime.objects.create(
+				employee=self.hr, overtime_type="C", date=global_start_date,
+				hours=1, reason="Testing purposes")
 		email = mail.outbox[0]
 
 		self.assertEqual(email.from_email, settings.LEAVE_EMAIL)
@@ -510,9 +636,10 @@ class OvertimeAdminTests(TestSetUp):
 	def test_create_overtime_by_supervisor_for_employee(self):
 		""" Test that supervisor can create an overtime """
 		can_request = Overtime.objects.can_request_overtime(self.employee, global_start_date)[0]
-		overtime = Overtime.admin_objects.create(
-			employee=self.employee, overtime_type="C", date=global_start_date,
-			hours=1, reason="Testing purposes", created_by=self.supervisor)
+		with self.captureOnCommitCallbacks(execute=True):
+			overtime = Overtime.admin_objects.create(
+				employee=self.employee, overtime_type="C", date=global_start_date,
+				hours=1, reason="Testing purposes", created_by=self.supervisor)
 		a_mail = mail.outbox[0]
 		e_mail = mail.outbox[1]
 
@@ -540,9 +667,10 @@ class OvertimeAdminTests(TestSetUp):
 	def test_create_overtime_by_hod_for_employee(self):
 		""" Test that hod can create a overtime """
 		can_request = Overtime.objects.can_request_overtime(self.employee, global_start_date)[0]
-		overtime = Overtime.admin_objects.create(
-			employee=self.employee, overtime_type="C", date=global_start_date,
-			hours=1, reason="Testing purposes", created_by=self.hod)
+		with self.captureOnCommitCallbacks(execute=True):
+			overtime = Overtime.admin_objects.create(
+				employee=self.employee, overtime_type="C", date=global_start_date,
+				hours=1, reason="Testing purposes", created_by=self.hod)
 		a_mail = mail.outbox[0]
 		e_mail = mail.outbox[1]
 
@@ -570,9 +698,10 @@ class OvertimeAdminTests(TestSetUp):
 	def test_create_overtime_by_hr_for_employee(self):
 		""" Test that HR can create an overtime """
 		can_request = Overtime.objects.can_request_overtime(self.employee, global_start_date)[0]
-		overtime = Overtime.admin_objects.create(
-			employee=self.employee, overtime_type="C", date=global_start_date,
-			hours=1, reason="Testing purposes", created_by=self.hr)
+		with self.captureOnCommitCallbacks(execute=True):
+			overtime = Overtime.admin_objects.create(
+				employee=self.employee, overtime_type="C", date=global_start_date,
+				hours=1, reason="Testing purposes", created_by=self.hr)
 		a_mail = mail.outbox[0]
 		e_mail = mail.outbox[1]
 
@@ -600,9 +729,10 @@ class OvertimeAdminTests(TestSetUp):
 	def test_create_overtime_by_md_for_employee(self):
 		""" Test that md can create an overtime """
 		can_request = Overtime.objects.can_request_overtime(self.employee, global_start_date)[0]
-		overtime = Overtime.admin_objects.create(
-			employee=self.employee, overtime_type="C", date=global_start_date,
-			hours=1, reason="Testing purposes", created_by=self.md)
+		with self.captureOnCommitCallbacks(execute=True):
+			overtime = Overtime.admin_objects.create(
+				employee=self.employee, overtime_type="C", date=global_start_date,
+				hours=1, reason="Testing purposes", created_by=self.md)
 		email = mail.outbox[0]
 
 		self.assertEqual(email.from_email, settings.OVERTIME_EMAIL)
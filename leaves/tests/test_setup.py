@@ -5,6 +5,7 @@ from django.urls import reverse
 from rest_framework.test import APIClient, APITestCase
 
 from employees.models import Department, Employee
+from HRMS.celery import app
 
 User = get_user_model()
 
@@ -23,6 +24,11 @@ def get_date(no=None, string=False):
 class TestSetUp(APITestCase):
 
 	def setUp(self):
+		# Send the queued e-mails (see notifications.tasks) right away
+		task_always_eager = app.conf.task_always_eager
+		app.conf.task_always_eager = True
+		self.addCleanup(setattr, app.conf, "task_always_eager", task_always_eager)
+
 		self.client = APIClient()
 		self.login_url = reverse('rest_login')
 		self.leaves_url = reverse('leaves')
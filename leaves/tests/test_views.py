@@ -1,11 +1,16 @@
 import datetime
+from unittest import mock
+from django.contrib.auth import get_user_model
 from django.core import mail
+from django.urls import reverse
 
 from common.utils import get_instance
-from leaves.models import Leave, Overtime
-from notifications.models import Notification
+from leaves.models import Leave, LeaveBalance, Overtime
+from notifications.models import Notification, OutboxMessage
 from .test_setup import get_date, TestSetUp
 
+User = get_user_model()
+
 
 global_start_date = get_date()
 global_end_date = get_date(1)
@@ -23,6 +28,48 @@ class LeaveListViewTests(TestSetUp):
 		response = self.client.get(self.leaves_url)
 		self.assertEqual(response.status_code, 200)
 
+	def test_get_leaves_status_counts(self):
+		for data in [{"a_md": "A"}, {"a_hod": "D"}, {}, {}, {"start_date": get_date(-5)}]:
+			start_date = data.pop("start_date", get_date(2))
+			Leave(employee=self.employee, start_date=start_date, end_date=start_date + datetime.timedelta(days=1),
+				reason="Testing Purposes", **data).save()
+		self.client.post(self.login_url, {
+			"email": self.employee.user.email, "password": "Passing1234"})
+		response1 = self.client.get(self.leaves_url)
+		response2 = self.client.get(self.leaves_url + "?status=pending")
+		response3 = self.client.get(self.leaves_url + "?status=E")
+
+		self.assertEqual(response1.data["count"], 5)
+		self.assertEqual(response1.data["approved_count"], 1)
+		self.assertEqual(response1.data["denied_count"], 1)
+		self.assertEqual(response1.data["pending_count"], 2)
+		self.assertEqual(response2.data["count"], 2)
+		self.assertEqual(response2.data["pending_count"], 2)
+		self.assertEqual(response2.data["approved_count"], 0)
+		self.assertEqual(response3.data["count"], 1)
+		self.assertEqual(response3.data["results"][0]["status"], "expired")
+
+	def test_get_leaves_by_cursor(self):
+		for data in [{"a_md": "A"}, {"a_hod": "D"}, {}, {}, {}]:
+			Leave(employee=self.employee, start_date=get_date(2), end_date=get_date(3),
+				reason="Testing Purposes", **data).save()
+		self.client.post(self.login_url, {
+			"email": self.employee.user.email, "password": "Passing1234"})
+		response1 = self.client.get(self.leaves_url + "?pagination=cursor&limit=2")
+		response2 = self.client.get(response1.data["next"])
+		response3 = self.client.get(response2.data["next"])
+		response4 = self.client.get(self.leaves_url + "?pagination=cursor&cursor=invalid")
+
+		ids = [leave["id"] for response in (response1, response2, response3)
+			for leave in response.data["results"]]
+		self.assertEqual(ids, list(Leave.objects.order_by("-date_requested", "-pk").values_list("id", flat=True)))
+		self.assertIsNone(response1.data["count"])
+		self.assertIsNone(response1.data["previous"])
+		self.assertIsNone(response3.data["next"])
+		self.assertEqual(response2.data["approved_count"], 1)
+		self.assertEqual(response2.data["pending_count"], 3)
+		self.assertEqual(response4.status_code, 404)
+
 	def test_create_leave_by_unauthenticated_user(self):
 		response = self.client.post(self.leaves_url, {})
 		self.assertEqual(response.status_code, 401)
@@ -168,6 +215,54 @@ class LeaveAdminListViewTests(TestSetUp):
 		self.assertEqual(len(response6.data['results']), 0)		
 		self.assertEqual(len(response7.data['results']), 2)
 
+	def test_export_admin_leaves(self):
+		leave1 = Leave.objects.create(employee=self.employee, start_date=global_start_date, 
+			end_date=global_end_date, reason="This is the last season")
+		leave2 = Leave.objects.create(employee=self.employee1, start_date=global_start_date,
+			end_date=global_end_date, reason="This is the last season")
+		Leave.objects.filter(pk=leave1.pk).update(a_s="A", a_hod="A", a_hr="A")
+		Leave.objects.filter(pk=leave2.pk).update(a_s="N", a_hod="N")
+
+		self.client.post(self.login_url, {
+			"email": self.hr.user.email, "password": "Passing1234"})
+		url = reverse("leave-admin-export", kwargs={"file_type": "csv"})
+		response1 = self.client.get(url)
+		response2 = self.client.get(url, {"status": "approved"})
+		response3 = self.client.get(reverse("leave-admin-export", kwargs={"file_type": "excel"}))
+
+		rows1 = b"".join(response1.streaming_content).decode().strip().split("\r\n")
+		rows2 = b"".join(response2.streaming_content).decode().strip().split("\r\n")
+
+		self.assertEqual(response1.status_code, 200)
+		self.assertEqual(len(rows1), 3)
+		self.assertTrue(rows1[0].startswith("First Name,Last Name,E-mail,Leave Type"))
+		self.assertEqual(len(rows2), 2)
+		self.assertIn(self.employee.user.email, rows2[1])
+		self.assertIn(",casual,", rows2[1])
+		self.assertIn(",approved,", rows2[1])
+		self.assertEqual(response3.status_code, 200)
+
+	def test_export_admin_leaves_with_invalid_date(self):
+		self.client.post(self.login_url, {
+			"email": self.hr.user.email, "password": "Passing1234"})
+		url = reverse("leave-admin-export", kwargs={"file_type": "csv"})
+		response = self.client.get(url, {"from": "2022-13-01", "to": "2022-14-01"})
+		self.assertEqual(response.status_code, 400)
+
+	def test_export_admin_leaves_by_admin_user_without_employee(self):
+		User.objects.create_superuser(email="admin@example.com", password="Passing1234",
+			first_name="Admin", last_name="User")
+		self.client.login(email="admin@example.com", password="Passing1234")
+		response1 = self.client.get(reverse("leave-admin-export", kwargs={"file_type": "csv"}))
+		response2 = self.client.get(reverse("overtime-admin-export", kwargs={"file_type": "csv"}))
+
+		rows1 = b"".join(response1.streaming_content).decode().strip().split("\r\n")
+		rows2 = b"".join(response2.streaming_content).decode().strip().split("\r\n")
+		self.assertEqual(response1.status_code, 200)
+		self.assertEqual(response2.status_code, 200)
+		self.assertEqual(len(rows1), 1)
+		self.assertEqual(len(rows2), 1)
+
 	def test_create_leave_admin_by_unauthenticated_user(self):
 		response = self.client.post(self.leaves_admin_url, {})
 		self.assertEqual(response.status_code, 401)
@@ -295,6 +390,71 @@ class LeaveAdminDetailViewTests(TestSetUp):
 		self.assertEqual(instance5.a_md, "A")
 
 
+""" Leave Admin Bulk View Tests """
+class LeaveAdminBulkViewTests(TestSetUp):
+	def test_update_leaves_in_bulk(self):
+		leave1 = Leave(employee=self.employee1, start_date=get_date(2),
+			end_date=get_date(4), reason="This is for test purposes", a_hr="A")
+		leave2 = Leave(employee=self.employee, start_date=get_date(2),
+			end_date=get_date(3), reason="This is for test purposes", a_hr="A")
+		leave3 = Leave(employee=self.employee, start_date=get_date(5),
+			end_date=get_date(6), reason="This is for test purposes", a_hr="A", a_hod="D")
+		for leave in (leave1, leave2, leave3):
+			leave.save()
+		bulk_url = reverse("leaves-admin-bulk")
+
+		self.client.post(self.login_url, {
+			"email": self.employee1.user.email, "password": "Passing1234"})
+		response1 = self.client.patch(bulk_url, {"ids": [leave1.id], "approval": "approved"},
+			format="json")
+
+		self.client.post(self.login_url, {
+			"email": self.md.user.email, "password": "Passing1234"})
+		response2 = self.client.patch(bulk_url, {"ids": [leave1.id], "approval": "maybe"},
+			format="json")
+		# Only the e-mails of the bulk decision, not the ones queued when the leaves were created
+		OutboxMessage.objects.all().delete()
+		mail.outbox = []
+		with self.captureOnCommitCallbacks(execute=True):
+			response3 = self.client.patch(bulk_url, {
+				"ids": [leave1.id, leave2.id, leave3.id, "lve9999"], "approval": "approved"},
+				format="json")
+
+		self.assertEqual(response1.status_code, 403)
+		self.assertEqual(response2.status_code, 400)
+		self.assertEqual(response3.status_code, 200)
+		self.assertEqual(response3.data["updated_count"], 2)
+		self.assertEqual([result["success"] for result in response3.data["results"]],
+			[True, True, False, False])
+		self.assertEqual(response3.data["results"][0]["detail"], "Leave request is Approved")
+		self.assertEqual(get_instance(Leave, {"id": leave1.id}).status, "A")
+		self.assertEqual(get_instance(Leave, {"id": leave2.id}).status, "A")
+		self.assertEqual(get_instance(Leave, {"id": leave3.id}).a_md, "P")
+		balance = LeaveBalance.objects.get(employee=self.employee1, year=leave1.start_date.year, leave_type="C")
+		self.assertEqual((balance.days_taken, balance.days_pending), (2, 0))
+		self.assertEqual(len(mail.outbox), 2)
+		self.assertEqual(Notification.objects.filter(message_id__in=[leave1.id, leave2.id],
+			sender=self.md).count(), 2)
+
+	def test_update_leaves_in_bulk_when_broker_is_down(self):
+		leave = Leave(employee=self.employee1, start_date=get_date(2),
+			end_date=get_date(4), reason="This is for test purposes", a_hr="A")
+		leave.save()
+		self.client.post(self.login_url, {
+			"email": self.md.user.email, "password": "Passing1234"})
+		with mock.patch("leaves.views.send_decision_emails_task.delay", side_effect=OSError("Connection refused")):
+			with self.assertLogs("leaves.views", level="ERROR"):
+				with self.captureOnCommitCallbacks(execute=True):
+					response = self.client.patch(reverse("leaves-admin-bulk"),
+						{"ids": [leave.id], "approval": "denied"}, format="json")
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(get_instance(Leave, {"id": leave.id}).status, "D")
+		self.assertEqual(Notification.objects.filter(message_id=leave.id, sender=self.md).count(), 1)
+		balance = LeaveBalance.objects.get(employee=self.employee1, year=leave.start_date.year, leave_type="C")
+		self.assertEqual((balance.days_taken, balance.days_pending), (0, 0))
+
+
 """ Overtime List View Tests """
 class OvertimeListViewTests(TestSetUp):
 	def test_get_overtime_by_unauthenticated_user(self):
@@ -307,6 +467,21 @@ class OvertimeListViewTests(TestSetUp):
 		response = self.client.get(self.overtime_url)
 		self.assertEqual(response.status_code, 200)
 
+	def test_get_overtime_status_counts(self):
+		for no, data in enumerate([{"a_md": "A"}, {"a_s": "D"}, {}, {"date": get_date(-1)}]):
+			Overtime(employee=self.employee, date=data.pop("date", get_date(no + 1)), hours=2,
+				reason="Testing Purposes", **data).save()
+		self.client.post(self.login_url, {
+			"email": self.employee.user.email, "password": "Passing1234"})
+		response1 = self.client.get(self.overtime_url)
+		response2 = self.client.get(self.overtime_url + "?status=denied")
+
+		self.assertEqual(response1.data["count"], 4)
+		self.assertEqual(response1.data["approved_count"], 1)
+		self.assertEqual(response1.data["denied_count"], 2)
+		self.assertEqual(response1.data["pending_count"], 1)
+		self.assertEqual(response2.data["count"], 2)
+
 	def test_create_overtime_by_unauthenticated_user(self):
 		response = self.client.post(self.overtime_url, {})
 		self.assertEqual(response.status_code, 401)
@@ -1,9 +1,44 @@
 from django.conf import settings
 from django.template.loader import render_to_string
+from rest_framework.exceptions import ValidationError
 
 from common.utils import get_name_prefix, get_leave_type, get_overtime_type
-from leaves.tasks import send_email_task
-from notifications.models import Notification
+from employees.models import Employee
+from notifications.models import Notification, OutboxMessage
+
+
+def get_approval(approval):
+	# The decision code of the "approval" sent to the admin views
+	if approval is None:
+		raise ValidationError({"detail": "approval is required"})
+	if approval != "approved" and approval != "denied":
+		raise ValidationError({"detail": "approval is invalid! Specify 'approved' or 'denied' "})
+	if approval == "approved":
+		return "A"
+	elif approval == "denied":
+		return "D"
+	return "P"
+
+
+def get_position(emp, instance):
+	# The position of the admin emp and the admin next in line for a leave or overtime
+	to = None
+	if emp.is_md:
+		position = "the Managing Director"
+	elif emp.is_hr:
+		position = "the Human Resource Manager"
+		to = Employee.objects.filter(is_md=True).first()
+	elif emp.is_hod:
+		position = "the Head Of Department"
+		to = Employee.objects.filter(is_hr=True).first()
+	else:
+		position = "the/your Supervisor"
+		if instance.employee.department.hod:
+			to = instance.employee.department.hod
+		else:
+			to = Employee.objects.filter(is_hr=True).first()
+	return [position, to]
+
 
 def send_leave_email(decision, emp, leave, recipient, position):
 	if decision == "A":
@@ -24,7 +59,7 @@ def send_leave_email(decision, emp, leave, recipient, position):
 			if emp.job:
 				context.update({"admin_job": emp.job.name})
 			email_body = render_to_string('leaves/md_approved_to_employee.txt', context)
-			send_email_task(message, email_body, settings.LEAVE_EMAIL, [leave.employee.user.email])
+			OutboxMessage.objects.queue(message, email_body, settings.LEAVE_EMAIL, [leave.employee.user.email])
 			if leave.created_by != leave.employee and leave.created_by.user.is_staff and leave.created_by.is_md is False:
 				message = f'{emp.user.get_full_name()} {position} approved the request for a leave.'
 				Notification.objects.create(_type="L", sender=emp, recipient=leave.created_by,
@@ -43,7 +78,7 @@ def send_leave_email(decision, emp, leave, recipient, position):
 				if emp.job:
 					context.update({"admin_job": emp.job.name})
 				email_body = render_to_string('leaves/md_approved_to_admin.txt', context)
-				send_email_task(message, email_body, settings.LEAVE_EMAIL, [leave.created_by.user.email])
+				OutboxMessage.objects.queue(message, email_body, settings.LEAVE_EMAIL, [leave.created_by.user.email])
 		else:
 			message=f"{leave.employee.user.get_full_name().upper()} sent a request for leave"
 			Notification.objects.create(_type="L", sender=leave.employee, recipient=recipient,
@@ -59,7 +94,7 @@ def send_leave_email(decision, emp, leave, recipient, position):
 				"reason": leave.reason
 			}
 			email_body = render_to_string('leaves/employee_to_admin.txt', context)
-			send_email_task(message, email_body, settings.LEAVE_EMAIL, [recipient.user.email])
+			OutboxMessage.objects.queue(message, email_body, settings.LEAVE_EMAIL, [recipient.user.email])
 	elif decision == "D":
 		message = f'{emp.user.get_full_name()} {position} denied your request for a leave.'
 		Notification.objects.create(_type="L", sender=emp, recipient=leave.employee,
@@ -79,7 +114,7 @@ def send_leave_email(decision, emp, leave, recipient, position):
 		if emp.job:
 			context.update({"admin_job": emp.job.name})
 		email_body = render_to_string('leaves/md_denied_to_employee.txt', context)
-		send_email_task(message, email_body, settings.LEAVE_EMAIL, [leave.employee.user.email])
+		OutboxMessage.objects.queue(message, email_body, settings.LEAVE_EMAIL, [leave.employee.user.email])
 		if leave.created_by != leave.employee and leave.created_by.is_staff:
 			message = f'{emp.user.get_full_name()} {position} denied the request for a leave.'
 			Notification.objects.create(_type="L", sender=emp, recipient=leave.created_by,
@@ -99,7 +134,7 @@ def send_leave_email(decision, emp, leave, recipient, position):
 			if emp.job:
 				context.update({"admin_job": emp.job.name})
 			email_body = render_to_string('leaves/md_denied_to_employee.txt', context)
-			send_email_task(message, email_body, settings.LEAVE_EMAIL, [leave.created_by.user.email])
+			OutboxMessage.objects.queue(message, email_body, settings.LEAVE_EMAIL, [leave.created_by.user.email])
 
 
 
@@ -121,7 +156,7 @@ def send_overtime_email(decision, emp, overtime, recipient, position):
 			if emp.job:
 				context.update({"admin_job": emp.job.name})
 			email_body = render_to_string('overtimes/md_approved_to_employee.txt', context)
-			send_email_task(message, email_body, settings.OVERTIME_EMAIL, [overtime.employee.user.email])
+			OutboxMessage.objects.queue(message, email_body, settings.OVERTIME_EMAIL, [overtime.employee.user.email])
 			if overtime.created_by != overtime.employee and overtime.created_by.user.is_staff and overtime.created_by.is_md is False:
 				message = f'{emp.user.get_full_name()} {position} approved the request for overtime.'
 				Notification.objects.create(_type="O", sender=emp, recipient=overtime.created_by,
@@ -139,7 +174,7 @@ def send_overtime_email(decision, emp, overtime, recipient, position):
 				if emp.job:
 					context.update({"admin_job": emp.job.name})
 				email_body = render_to_string('overtimes/md_approved_to_admin.txt', context)
-				send_email_task(message, email_body, settings.OVERTIME_EMAIL, [overtime.created_by.user.email])
+				OutboxMessage.objects.queue(message, email_body, settings.OVERTIME_EMAIL, [overtime.created_by.user.email])
 		else:
 			message=f"{overtime.employee.user.get_full_name().upper()} sent a request for overtime."
 			Notification.objects.create(_type="O", sender=overtime.employee, recipient=recipient,
@@ -154,7 +189,7 @@ def send_overtime_email(decision, emp, overtime, recipient, position):
 				"reason": overtime.reason
 			}
 			email_body = render_to_string('overtimes/employee_to_admin.txt', context)
-			send_email_task(message, email_body, settings.OVERTIME_EMAIL, [recipient.user.email])
+			OutboxMessage.objects.queue(message, email_body, settings.OVERTIME_EMAIL, [recipient.user.email])
 	elif decision == "D":
 		message = f'{emp.user.get_full_name()} {position} denied your request for overtime.'
 		Notification.objects.create(_type="O", sender=emp, recipient=overtime.employee,
@@ -173,7 +208,7 @@ def send_overtime_email(decision, emp, overtime, recipient, position):
 		if emp.job:
 			context.update({"admin_job": emp.job.name})
 		email_body = render_to_string('overtimes/md_denied_to_employee.txt', context)
-		send_email_task(message, email_body, settings.OVERTIME_EMAIL, [overtime.employee.user.email])
+		OutboxMessage.objects.queue(message, email_body, settings.OVERTIME_EMAIL, [overtime.employee.user.email])
 		if overtime.created_by != overtime.employee and overtime.created_by.is_staff:
 			message = f'{emp.user.get_full_name()} {position} denied the request for overtime.'
 			Notification.objects.create(_type="O", sender=emp, recipient=overtime.created_by,
@@ -192,6 +227,6 @@ def send_overtime_email(decision, emp, overtime, recipient, position):
 			if emp.job:
 				context.update({"admin_job": emp.job.name})
 			email_body = render_to_string('overtimes/md_denied_to_employee.txt', context)
-			send_email_task(message, email_body, settings.OVERTIME_EMAIL, [overtime.created_by.user.email])
+			OutboxMessage.objects.queue(message, email_body, settings.OVERTIME_EMAIL, [overtime.created_by.user.email])
 
 
@@ -1,19 +1,23 @@
-import csv
-import xlwt
+import logging
+from collections import OrderedDict
 from django.contrib.auth import get_user_model
-from django.db.models import Q
-from django.http import HttpResponse
+from django.db import transaction
+from django.utils.timezone import now
 from rest_framework import permissions, status
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from common.utils import get_instance, get_instances
-from core.views import ListCreateRetrieveView
-from employees.models import Employee
-from employees.permissions import IsEmployee
+from common.utils import get_instance
+from core.views import ImportDataView, ListCreateRetrieveView
+from employees.cache import invalidate_attendance_info
+from employees.permissions import IsEmployee, IsHROrMD
+from exports.views import ExportDataView
 from notifications.models import Notification
-from .models import Leave, Overtime
+from .exports import LeaveExport, OvertimeExport
+from .imports import LeaveImport
+from .managers import LEAVE_BALANCE_FIELDS, get_admin_status_field, get_awaiting
+from .models import Leave, LeaveBalance, Overtime
 from .pagination import (
 	LeavePagination, 
 	LeaveAdminPagination,
@@ -26,10 +30,13 @@ from .serializers import (
 	OvertimeSerializer,
 	OvertimeAdminSerializer
 )
-from .utils import send_leave_email, send_overtime_email
+from .tasks import send_decision_emails_task
+from .utils import get_approval, get_position, send_leave_email, send_overtime_email
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 
 class LeaveView(ListCreateRetrieveView):
 	permission_classes = (IsEmployee, )
@@ -48,15 +55,8 @@ class LeaveView(ListCreateRetrieveView):
 		authorized = Leave.objects.can_view_leave(leave, request.user.employee)
 		if authorized is True:
 			serializer = LeaveSerializer(leave, context={"request": request})
-			try:
-				notifications = get_instances(Notification, {"message_id": leave.id,"read": False,
-					"recipient": request.user.employee, "_type": "L"})
-				if notifications is not None:
-					for note in notifications:
-						note.read = True
-						note.save()
-			except:
-				pass
+			Notification.objects.filter(message_id=leave.id, recipient=request.user.employee,
+				_type="L").mark_read()
 			return Response(serializer.data, status=status.HTTP_200_OK)
 		raise PermissionDenied({"detail": "You are not authorized to view this information"})
 
@@ -65,10 +65,13 @@ class LeaveView(ListCreateRetrieveView):
 			_from = self.request.query_params.get("from")
 			_to = self.request.query_params.get("to")
 			if _from is not None and _to is not None and _from != "" and _to != "":
-				return Leave.objects.filter_by_date(self.request.user.employee, _from, _to).order_by(
-					'-date_requested')
-			return Leave.objects.filter(
-				employee=self.request.user.employee).order_by('-date_requested')
+				queryset = Leave.objects.filter_by_date(self.request.user.employee, _from, _to)
+			else:
+				queryset = Leave.objects.filter(employee=self.request.user.employee)
+			status = self.request.query_params.get("status")
+			if status:
+				queryset = queryset.filter_by_status(status)
+			return queryset.order_by('-date_requested')
 		except User.employee.RelatedObjectDoesNotExist:
 			pass
 		return Leave.objects.none()
@@ -124,15 +127,7 @@ class LeaveAdminView(ListCreateRetrieveView):
 		return leave
 
 	def _validate_approval(self, approval):
-		if approval is None:
-			raise ValidationError({"detail": "approval is required"})
-		if approval != "approved" and approval != "denied":
-			raise ValidationError({"detail": "approval is invalid! Specify 'approved' or 'denied' "})
-		if approval == "approved":
-			return "A"
-		elif approval == "denied":
-			return "D"
-		return "P"
+		return get_approval(approval)
 
 	def _send_leave_email(self, leave, approval):
 		emp = self.request.user.employee
@@ -140,22 +135,7 @@ class LeaveAdminView(ListCreateRetrieveView):
 		send_leave_email(approval, emp, leave, to, position)
 
 	def _get_position(self, emp, leave):
-		to = None
-		if emp.is_md:
-			position = "the Managing Director"
-		elif emp.is_hr:
-			position = "the Human Resource Manager"
-			to = Employee.objects.filter(is_md=True).first()
-		elif emp.is_hod:
-			position = "the Head Of Department"
-			to = Employee.objects.filter(is_hr=True).first()
-		else:
-			position = "the/your Supervisor"
-			if leave.employee.department.hod:
-				to = leave.employee.department.hod
-			else:
-				to = Employee.objects.filter(is_hr=True).first()
-		return [position, to]
+		return get_position(emp, leave)
 
 
 	def get_queryset(self):
@@ -173,98 +153,118 @@ class LeaveAdminView(ListCreateRetrieveView):
 		return Leave.objects.none()
 	
 
-class LeaveExportDataView(APIView):
+class AdminBulkDecisionView(APIView):
+	"""
+	Approves or denies a list of requests in the admin's queue at once,
+	e.g. {"ids": ["lve0001", "lve0002"], "approval": "approved"}.
+	The decisions are saved with one bulk_update and the notifications are sent
+	by one task once the transaction is committed.
+	"""
 	permission_classes = (permissions.IsAdminUser, )
-	
-	def get(self, request, *args, **kwargs):
-		file_type = kwargs["file_type"]
-		if file_type == "csv":
-			response = self.export_csv_data()
-			return response
-		elif file_type == "excel":
-			response = self.export_excel_data()
-			return response
-		return Response(
-			{"detail": "invalid content type. can only export csv and excel file format."},
-			status=status.HTTP_400_BAD_REQUEST)
-
-	def export_csv_data(self):
-		response = HttpResponse(content_type='text/csv',
-			headers={'Content-Disposition': 'attachment; filename="leaves.csv"'})
-		writer = csv.writer(response)
-		writer.writerow(self.get_leave_headers())
-		
-		leaves = self.get_queryset()
-		for leave in leaves:
-			writer.writerow(self.get_leave_data(leave))
-		return response
-
-	def export_excel_data(self):
-		response = HttpResponse(content_type='application/ms-excel',
-			headers={'Content-Disposition': 'attachment; filename="leaves.xls"'})
-		wb = xlwt.Workbook(encoding='utf-8')
-		ws = wb.add_sheet('Leaves')
-		row_num = 0
-		font_style = xlwt.XFStyle()
-		font_style.font.bold = True
-
-		columns = self.get_leave_headers()
-		for col_num in range(len(columns)):
-			ws.write(row_num, col_num, columns[col_num], font_style)
-		font_style = xlwt.XFStyle()
-
-		leaves = self.get_queryset()
-		for leave in leaves:
-			row_num += 1
-			data = self.get_leave_data(leave)
-
-			for col_num in range(len(data)):
-				ws.write(row_num, col_num, str(data[col_num]), font_style)
-		wb.save(response)
-		return response
-
-	def get_leave_headers(self):
-		return ['First Name', 'Last Name', 'E-mail', 'Leave Type', 'Start Date', 'End Date', 
-			'Resumption Date', 'Number Of Days', 'Reason', 'Created By', 'Status', 
-			'Date Requested']
-
-	def get_leave_data(self, leave):
-		try:
-			return [
-				leave.employee.user.first_name, leave.employee.user.last_name, 
-				leave.employee.user.email, leave.leave_type_name, str(leave.start_date),
-				str(leave.end_date), str(leave.resume_date), leave.no_of_days, leave.reason,
-				leave.created_by.user.get_full_name(), 
-				leave.get_admin_status(self.request.user.employee, True), leave.date_requested
-			]
-		except:
-			pass
-		return []
+	model = None
+	name = None
+	_type = None
 
-	def get_queryset(self):
+	def get_queryset(self, employee):
+		raise NotImplementedError('`get_queryset()` must be implemented.')
+
+	def can_amend(self, employee, instance):
+		raise NotImplementedError('`can_amend()` must be implemented.')
+
+	def amend(self, instance, field, approval, date_updated):
+		setattr(instance, field, approval)
+		instance.awaiting_role, instance.awaiting_id = get_awaiting(instance)
+		instance.date_updated = date_updated
+
+	def perform_bulk_update(self, instances, field):
+		self.model.objects.bulk_update(instances, [field, "awaiting_role", "awaiting", "date_updated"])
+
+	def send_decision_emails(self, admin_id, ids, approval):
 		try:
-			queryset = Leave.admin_objects.leaves(
-				self.request.user.employee).order_by('-date_requested')
-			_from = self.request.query_params.get("from")
-			_to = self.request.query_params.get("to")
-			if _from is not None and _to is not None and _from != "" and _to != "":
-				queryset = Leave.admin_objects.filter_by_date(self.request.user.employee, 
-					_from, _to).order_by('-date_requested')
-			name = self.request.query_params.get("name")
-			if name is not None and name != "":
-				queryset = queryset.filter(
-					Q(employee__user__first_name__icontains=name) |
-					Q(employee__user__last_name__icontains=name) |
-					Q(employee__user__email__icontains=name)
-				)
-			status = self.request.query_params.get('status', None)
-			if status:
-				queryset = [x for x in queryset if x.get_admin_status(
-					self.request.user.employee, True) == status.lower()]
-			return queryset
-		except User.employee.RelatedObjectDoesNotExist:
-			pass
-		return Leave.objects.none()
+			send_decision_emails_task.delay(self._type, admin_id, ids, approval)
+		except Exception:
+			# The decisions are committed, send them from here when the broker is down
+			logger.exception("Could not queue the e-mails of the bulk decisions")
+			try:
+				send_decision_emails_task(self._type, admin_id, ids, approval)
+			except Exception:
+				logger.exception("Could not send the e-mails of the bulk decisions")
+
+	def patch(self, request, *args, **kwargs):
+		employee = request.user.employee
+		approval = get_approval(request.data.get("approval", None))
+		ids = request.data.get("ids", None)
+		if not isinstance(ids, list) or len(ids) == 0:
+			raise ValidationError({"ids": "A list of IDs is required"})
+		field = get_admin_status_field(employee)
+		if field is None:
+			raise PermissionDenied({"detail": "You are not authorized to make this request"})
+
+		date_updated = now()
+		updated = []
+		results = []
+		with transaction.atomic():
+			# Locked so that a decision made meanwhile is not overwritten
+			instances = {
+				instance.id: instance for instance in self.get_queryset(employee).filter(id__in=ids).select_related(
+					"employee__user", "employee__department__hod", "employee__supervisor"
+				).select_for_update(of=("self",))
+			}
+			for _id in OrderedDict.fromkeys(ids):
+				instance = instances.get(_id)
+				if instance is None:
+					results.append(OrderedDict([("id", _id), ("success", False),
+						("detail", f"{self.name} with specified ID was not found!")]))
+					continue
+				[can_amend, reason] = self.can_amend(employee, instance)
+				if can_amend:
+					self.amend(instance, field, approval, date_updated)
+					updated.append(instance)
+					reason = f"{self.name} request is {'Approved' if approval == 'A' else 'Denied'}"
+				results.append(OrderedDict([("id", _id), ("success", can_amend), ("detail", reason)]))
+
+			if updated:
+				updated_ids = [instance.id for instance in updated]
+				self.perform_bulk_update(updated, field)
+				transaction.on_commit(lambda: self.send_decision_emails(employee.pk, updated_ids, approval))
+		return Response(OrderedDict([
+			("updated_count", len(updated)),
+			("results", results),
+		]), status=status.HTTP_200_OK)
+
+
+class LeaveAdminBulkView(AdminBulkDecisionView):
+	model = Leave
+	name = "Leave"
+	_type = "L"
+
+	def get_queryset(self, employee):
+		return Leave.admin_objects.leaves(employee)
+
+	def can_amend(self, employee, instance):
+		return Leave.admin_objects.can_amend_leave(employee, instance)
+
+	def amend(self, instance, field, approval, date_updated):
+		# Kept for perform_bulk_update to take the previous state off the ledger
+		instance._balance_fields = {name: getattr(instance, name) for name in LEAVE_BALANCE_FIELDS}
+		super().amend(instance, field, approval, date_updated)
+
+	def perform_bulk_update(self, instances, field):
+		super().perform_bulk_update(instances, field)
+		# bulk_update skips the signals that keep the ledger up to date
+		LeaveBalance.objects.record_many([
+			(instance._balance_fields, {name: getattr(instance, name) for name in LEAVE_BALANCE_FIELDS})
+			for instance in instances
+		])
+
+
+class LeaveExportDataView(ExportDataView):
+	export_class = LeaveExport
+
+
+class LeaveImportDataView(ImportDataView):
+	permission_classes = (IsHROrMD, )
+	import_class = LeaveImport
 
 
 class OvertimeView(ListCreateRetrieveView):
@@ -284,15 +284,8 @@ class OvertimeView(ListCreateRetrieveView):
 		authorized = Overtime.objects.can_view_overtime(overtime, request.user.employee)
 		if authorized is True:
 			serializer = OvertimeSerializer(overtime, context={"request": request})
-			try:
-				notifications = get_instances(Notification, {"message_id": overtime.id,"read": False,
-					"recipient": request.user.employee, "_type": "O"})
-				if notifications is not None:
-					for note in notifications:
-						note.read = True
-						note.save()
-			except:
-				pass
+			Notification.objects.filter(message_id=overtime.id, recipient=request.user.employee,
+				_type="O").mark_read()
 			return Response(serializer.data, status=status.HTTP_200_OK)
 		raise PermissionDenied({"detail": "You are not authorized to view this information"})
 
@@ -301,10 +294,13 @@ class OvertimeView(ListCreateRetrieveView):
 			_from = self.request.query_params.get("from", None)
 			_to = self.request.query_params.get("to", None)
 			if _from is not None and _from != "":
-				return Overtime.objects.filter_by_date(self.request.user.employee, _from, _to).order_by(
-					'-date_requested')
-			return Overtime.objects.filter(
-				employee=self.request.user.employee).order_by('-date_requested')
+				queryset = Overtime.objects.filter_by_date(self.request.user.employee, _from, _to)
+			else:
+				queryset = Overtime.objects.filter(employee=self.request.user.employee)
+			status = self.request.query_params.get("status")
+			if status:
+				queryset = queryset.filter_by_status(status)
+			return queryset.order_by('-date_requested')
 		except User.employee.RelatedObjectDoesNotExist:
 			pass
 		return Overtime.objects.none()
@@ -360,15 +356,7 @@ class OvertimeAdminView(ListCreateRetrieveView):
 		return overtime
 
 	def _validate_approval(self, approval):
-		if approval is None:
-			raise ValidationError({"detail": "approval is required"})
-		if approval != "approved" and approval != "denied":
-			raise ValidationError({"detail": "approval is invalid! Specify 'approved' or 'denied' "})
-		if approval == "approved":
-			return "A"
-		elif approval == "denied":
-			return "D"
-		return "P"
+		return get_approval(approval)
 
 	def _send_overtime_email(self, overtime, approval):
 		emp = self.request.user.employee
@@ -376,22 +364,7 @@ class OvertimeAdminView(ListCreateRetrieveView):
 		send_overtime_email(approval, emp, overtime, to, position)
 
 	def _get_position(self, emp, overtime):
-		to = None
-		if emp.is_md:
-			position = "the Managing Director"
-		elif emp.is_hr:
-			position = "the Human Resource Manager"
-			to = Employee.objects.filter(is_md=True).first()
-		elif emp.is_hod:
-			position = "the Head Of Department"
-			to = Employee.objects.filter(is_hr=True).first()
-		else:
-			position = "the/your Supervisor"
-			if overtime.employee.department.hod:
-				to = overtime.employee.department.hod
-			else:
-				to = Employee.objects.filter(is_hr=True).first()
-		return [position, to]
+		return get_position(emp, overtime)
 
 	def get_queryset(self):
 		try:
@@ -408,93 +381,23 @@ class OvertimeAdminView(ListCreateRetrieveView):
 		return Overtime.objects.none()
 
 
-class OvertimeExportDataView(APIView):
-	permission_classes = (permissions.IsAdminUser, )
+class OvertimeExportDataView(ExportDataView):
+	export_class = OvertimeExport
 
-	def get(self, request, *args, **kwargs):
-		file_type = kwargs["file_type"]
-		if file_type == "csv":
-			response = self.export_csv_data()
-			return response
-		elif file_type == "excel":
-			response = self.export_excel_data()
-			return response
-		return Response(
-			{"detail": "invalid content type. can only export csv and excel file format."},
-			status=status.HTTP_400_BAD_REQUEST)
-
-	def export_csv_data(self):
-		response = HttpResponse(content_type='text/csv',
-			headers={'Content-Disposition': 'attachment; filename="overtime.csv"'})
-		writer = csv.writer(response)
-		writer.writerow(self.get_overtime_headers())
-		
-		overtime = self.get_queryset()
-		for ov in overtime:
-			writer.writerow(self.get_overtime_data(ov))
-		return response
-
-	def export_excel_data(self):
-		response = HttpResponse(content_type='application/ms-excel',
-			headers={'Content-Disposition': 'attachment; filename="overtime.xls"'})
-		wb = xlwt.Workbook(encoding='utf-8')
-		ws = wb.add_sheet('Overtime')
-		row_num = 0
-		font_style = xlwt.XFStyle()
-		font_style.font.bold = True
-
-		columns = self.get_overtime_headers()
-		for col_num in range(len(columns)):
-			ws.write(row_num, col_num, columns[col_num], font_style)
-		font_style = xlwt.XFStyle()
-
-		overtime = self.get_queryset()
-		for ov in overtime:
-			row_num += 1
-			data = self.get_overtime_data(ov)
-
-			for col_num in range(len(data)):
-				ws.write(row_num, col_num, str(data[col_num]), font_style)
-		wb.save(response)
-		return response
-
-	def get_overtime_headers(self):
-		return ['First Name', 'Last Name', 'E-mail', 'Overtime Type', 'Date', 'Hours', 
-			'Reason', 'Created By', 'Status', 'Date Requested']
-
-	def get_overtime_data(self, overtime):
-		try:
-			return [
-				overtime.employee.user.first_name, overtime.employee.user.last_name, 
-				overtime.employee.user.email, overtime.overtime_type_name, str(overtime.date),
-				str(overtime.hours), overtime.reason, overtime.created_by.user.get_full_name(), 
-				overtime.get_admin_status(self.request.user.employee, True), overtime.date_requested
-			]
-		except:
-			pass
-		return []
 
-	def get_queryset(self):
-		try:
-			queryset = Overtime.admin_objects.overtimes(
-				self.request.user.employee).order_by('-date_requested')
-			_from = self.request.query_params.get("from")
-			if _from is not None and _from != "":
-				queryset = Overtime.admin_objects.filter_by_date(self.request.user.employee, 
-					_from).order_by('-date_requested')
-			name = self.request.query_params.get("name")
-			if name is not None and name != "":
-				queryset = queryset.filter(
-					Q(employee__user__first_name__icontains=name) |
-					Q(employee__user__last_name__icontains=name) |
-					Q(employee__user__email__icontains=name)
-				)
-			status = self.request.query_params.get('status', None)
-			if status:
-				queryset = [x for x in queryset if x.get_admin_status(
-					self.request.user.employee, True) == status.lower()]
-			return queryset
-		except User.employee.RelatedObjectDoesNotExist:
-			pass
-		return Overtime.objects.none()
+class OvertimeAdminBulkView(AdminBulkDecisionView):
+	model = Overtime
+	name = "Overtime"
+	_type = "O"
+
+	def get_queryset(self, employee):
+		return Overtime.admin_objects.overtimes(employee)
+
+	def can_amend(self, employee, instance):
+		return Overtime.admin_objects.can_amend_overtime(employee, instance)
 
+	def perform_bulk_update(self, instances, field):
+		super().perform_bulk_update(instances, field)
+		# bulk_update skips the signals that reset the attendance info
+		for employee_id in {instance.employee_id for instance in instances}:
+			invalidate_attendance_info(employee_id)
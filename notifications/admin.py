@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, OutboxMessage
 
 
 class NotificationAdmin(admin.ModelAdmin):
@@ -7,4 +7,10 @@ class NotificationAdmin(admin.ModelAdmin):
 	list_filter = ('_type', 'sender', 'recipient', 'read', 'date_sent')
 
 
-admin.site.register(Notification, NotificationAdmin)
\ No newline at end of file
+class OutboxMessageAdmin(admin.ModelAdmin):
+	list_display = ('subject', 'status', 'attempts', 'date_created', 'date_sent')
+	list_filter = ('status', 'date_created')
+
+
+admin.site.register(Notification, NotificationAdmin)
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
\ No newline at end of file
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+_broker = None
+
+
+def get_broker():
+	# The NOTIFICATION_BROKER of the process
+	global _broker
+	if _broker is None:
+		_broker = import_string(settings.NOTIFICATION_BROKER)()
+	return _broker
+
+
+def get_channel(employee_id):
+	return f"notifications:{employee_id}"
+
+
+class InMemoryBroker:
+	"""
+	Fans the published messages out to the subscribers of this process only,
+	i.e. the notifications must be created by the process serving the streams.
+	Use RedisBroker when they are also created by other processes (e.g. celery).
+	"""
+
+	def __init__(self):
+		self.subscriptions = defaultdict(set)
+		self.lock = threading.Lock()
+
+	def publish(self, channel, message):
+		# Can be called from any thread
+		with self.lock:
+			subscriptions = list(self.subscriptions.get(channel, ()))
+		for subscription in subscriptions:
+			subscription.put(message)
+		return len(subscriptions)
+
+	async def subscribe(self, channel):
+		subscription = InMemorySubscription(self, channel)
+		with self.lock:
+			self.subscriptions[channel].add(subscription)
+		return subscription
+
+	def unsubscribe(self, subscription):
+		with self.lock:
+			self.subscriptions[subscription.channel].discard(subscription)
+			if not self.subscriptions[subscription.channel]:
+				del self.subscriptions[subscription.channel]
+
+
+class InMemorySubscription:
+	def __init__(self, broker, channel):
+		self.broker = broker
+		self.channel = channel
+		self.loop = asyncio.get_running_loop()
+		self.queue = asyncio.Queue()
+
+	def put(self, message):
+		try:
+			self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+		except RuntimeError:
+			# The event loop of the subscriber is closed
+			self.broker.unsubscribe(self)
+
+	async def get(self):
+		return await self.queue.get()
+
+	async def close(self):
+		self.broker.unsubscribe(self)
+
+
+class RedisBroker:
+	"""
+	Fans the messages out through Redis pub/sub to the subscribers of every
+	process. Requires the redis package and NOTIFICATION_BROKER_URL.
+	"""
+
+	def __init__(self, url=None):
+		import redis
+
+		self.url = url or settings.NOTIFICATION_BROKER_URL
+		self.client = redis.Redis.from_url(self.url)
+
+	def publish(self, channel, message):
+		return self.client.publish(channel, json.dumps(message))
+
+	async def subscribe(self, channel):
+		subscription = RedisSubscription(self.url, channel)
+		await subscription.start()
+		return subscription
+
+
+class RedisSubscription:
+	def __init__(self, url, channel):
+		from redis import asyncio as aioredis
+
+		self.channel = channel
+		self.client = aioredis.Redis.from_url(url)
+		self.pubsub = self.client.pubsub()
+
+	async def start(self):
+		await self.pubsub.subscribe(self.channel)
+
+	async def get(self):
+		while True:
+			message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+			if message is not None:
+				return json.loads(message["data"])
+
+	async def close(self):
+		await self.pubsub.unsubscribe(self.channel)
+		await self.pubsub.close()
+		await self.client.close()
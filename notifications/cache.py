@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from core.utils import get_app_model
+
+UNREAD_COUNT_KEY = "notifications:unread-count:%s"
+
+
+def get_unread_count_key(employee_id):
+	return UNREAD_COUNT_KEY % employee_id
+
+
+def is_cache_shared():
+	# A local memory cache is private to the process, the counter would miss the
+	# notifications created by the other processes e.g. the celery workers
+	return not isinstance(caches["default"], LocMemCache)
+
+
+def get_unread_count(employee_id):
+	# Counted once and then kept up to date by the notifications signals
+	if not is_cache_shared():
+		Notification = get_app_model("notifications.Notification")
+		return Notification.objects.filter(recipient_id=employee_id, read=False).count()
+	key = get_unread_count_key(employee_id)
+	count = cache.get(key)
+	if count is None:
+		Notification = get_app_model("notifications.Notification")
+		count = Notification.objects.filter(recipient_id=employee_id, read=False).count()
+		cache.set(key, count, settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT)
+	return count
+
+
+def update_unread_count(employee_id, delta):
+	try:
+		if cache.incr(get_unread_count_key(employee_id), delta) < 0:
+			invalidate_unread_count(employee_id)
+	except ValueError:
+		# Not cached, it is counted on the next read
+		pass
+
+
+def invalidate_unread_count(employee_id):
+	cache.delete(get_unread_count_key(employee_id))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications.models import Notification
+
+
+class Command(BaseCommand):
+	help = "Delete the read notifications older than NOTIFICATION_RETENTION_DAYS"
+
+	def add_arguments(self, parser):
+		parser.add_argument("--days", type=int, help="Delete the read notifications older than this many days")
+		parser.add_argument("--chunk-size", type=int, help="Notifications deleted at a time")
+
+	def handle(self, *args, **options):
+		if options["days"] is not None and options["days"] < 0:
+			raise CommandError("--days cannot be negative")
+		deleted = Notification.objects.purge(days=options["days"], chunk_size=options["chunk_size"])
+		self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} read notifications"))
@@ -0,0 +1,169 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import connections, models, transaction
+from django.db.models import Min, Q
+from django.utils.timezone import now
+
+from .cache import invalidate_unread_count
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationQuerySet(models.QuerySet):
+	def mark_read(self):
+		# Marks the unread notifications read with a single update
+		queryset = self.filter(read=False)
+		recipients = set(queryset.values_list("recipient_id", flat=True).distinct())
+		count = queryset.update(read=True)
+		for recipient_id in recipients - {None}:
+			transaction.on_commit(lambda recipient_id=recipient_id: invalidate_unread_count(recipient_id))
+		return count
+
+	def bulk_delete(self, chunk_size=None):
+		"""
+		Deletes the notifications with one DELETE of chunk_size rows at a time.
+		Unlike delete() the rows are not collected and no post_delete signal is
+		sent for each of them, the unread counts of their recipients are
+		invalidated once instead.
+		"""
+		chunk_size = chunk_size or settings.NOTIFICATION_RETENTION_CHUNK_SIZE
+		rows = list(self.values_list("pk", "recipient_id", "read"))
+		pks = [pk for pk, recipient_id, read in rows]
+		deleted = 0
+		for start in range(0, len(pks), chunk_size):
+			deleted += self.delete_pks(pks[start:start + chunk_size])
+		recipients = {recipient_id for pk, recipient_id, read in rows if not read}
+		for recipient_id in recipients - {None}:
+			transaction.on_commit(lambda recipient_id=recipient_id: invalidate_unread_count(recipient_id))
+		return deleted
+
+	def delete_pks(self, pks):
+		# A single DELETE ... WHERE pk IN (...), without signals or unread counts
+		if not pks:
+			return 0
+		quote_name = connections[self.db].ops.quote_name
+		table = quote_name(self.model._meta.db_table)
+		column = quote_name(self.model._meta.pk.column)
+		placeholders = ", ".join(["%s"] * len(pks))
+		with connections[self.db].cursor() as cursor:
+			cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", pks)
+			return cursor.rowcount
+
+
+class NotificationManager(models.Manager):
+	def get_queryset(self):
+		return NotificationQuerySet(self.model, using=self._db)
+
+	def purge(self, days=None, chunk_size=None):
+		"""
+		Deletes the read notifications sent more than days ago, by default
+		NOTIFICATION_RETENTION_DAYS, in chunks of chunk_size so that the table
+		is never locked for long. Returns the number of notifications deleted.
+		"""
+		days = settings.NOTIFICATION_RETENTION_DAYS if days is None else days
+		chunk_size = chunk_size or settings.NOTIFICATION_RETENTION_CHUNK_SIZE
+		queryset = self.filter(read=True, date_sent__lt=now() - timedelta(days=days)).order_by("pk")
+		deleted = 0
+		while True:
+			with transaction.atomic():
+				pks = list(queryset.values_list("pk", flat=True)[:chunk_size])
+				if not pks:
+					return deleted
+				# Only read notifications, the unread counts do not change
+				deleted += self.get_queryset().delete_pks(pks)
+
+
+class OutboxMessageManager(models.Manager):
+	def queue(self, subject, body, from_email, to):
+		"""
+		Saves an e-mail in the current transaction. It is sent by
+		dispatch_outbox_task once the transaction is committed.
+		"""
+		if isinstance(to, list) is False and isinstance(to, tuple) is False:
+			to = [to]
+		message = self.create(subject=subject, body=body, from_email=from_email, to=list(to))
+		from .tasks import schedule_dispatch
+		transaction.on_commit(schedule_dispatch)
+		return message
+
+	def due(self, at=None):
+		# The pending messages that are neither leased nor waiting for their next attempt
+		at = at or now()
+		return self.filter(
+			Q(locked_until__isnull=True) | Q(locked_until__lt=at),
+			Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=at),
+			status="P")
+
+	def get_next_attempt(self):
+		# When the first of the failed messages can be tried again
+		return self.filter(status="P", next_attempt_at__isnull=False).aggregate(
+			next_attempt_at=Min("next_attempt_at"))["next_attempt_at"]
+
+	def claim(self, batch_size):
+		"""
+		Leases a batch of the pending messages to the caller for
+		OUTBOX_LEASE_TIMEOUT seconds so that other workers skip them while
+		they are sent. The lease is committed before anything is sent, the
+		messages of a worker that died are claimed again once it expires.
+		"""
+		started = now()
+		with transaction.atomic():
+			# Skip the messages locked by another worker
+			messages = list(self.due(started).select_for_update(skip_locked=True).order_by(
+				"date_created")[:batch_size])
+			locked_until = started + timedelta(seconds=settings.OUTBOX_LEASE_TIMEOUT)
+			self.filter(pk__in=[message.pk for message in messages]).update(locked_until=locked_until)
+		return messages
+
+	def dispatch(self, batch_size=None, connection=None):
+		"""
+		Sends a batch of the pending messages over a single connection of the
+		e-mail backend. A message that fails, or that could not be sent because
+		the connection could not be opened, is retried until it has failed
+		OUTBOX_MAX_ATTEMPTS times, waiting twice as long after each attempt (see
+		set_failed). Returns the number of messages sent and the
+		number of messages that failed.
+		"""
+		messages = self.claim(batch_size or settings.OUTBOX_BATCH_SIZE)
+		sent = failed = 0
+		if not messages:
+			return sent, failed
+		try:
+			connection = connection or get_connection(fail_silently=False)
+			connection.open()
+		except Exception as error:
+			for message in messages:
+				self.set_failed(message, error)
+			failed = len(messages)
+		else:
+			try:
+				for message in messages:
+					try:
+						# One message at a time to record which of them failed
+						connection.send_messages([message.get_email(connection)])
+						message.status = "S"
+						message.date_sent = now()
+						sent += 1
+					except Exception as error:
+						self.set_failed(message, error)
+						failed += 1
+			finally:
+				try:
+					connection.close()
+				except Exception:
+					logger.exception("Could not close the e-mail connection")
+		for message in messages:
+			message.locked_until = None
+		self.bulk_update(messages, ["status", "attempts", "error", "date_sent", "locked_until", "next_attempt_at"])
+		return sent, failed
+
+	def set_failed(self, message, error):
+		message.attempts += 1
+		message.error = str(error)
+		# OUTBOX_RETRY_DELAY after the first attempt, then twice as long each time
+		message.next_attempt_at = now() + timedelta(
+			seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (message.attempts - 1))
+		if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+			message.status = "F"
@@ -0,0 +1,21 @@
+# Generated by Django 4.0.3 on 2026-10-18 21:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['_type', 'message_id'], name='notificatio__type_cdbe96_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'read', 'date_sent'], name='notificatio_recipie_7b52a0_idx'),
+        ),
+    ]
@@ -1,7 +1,9 @@
 from django.conf import settings
+from django.core.mail import EmailMessage
 from django.db import models
 from django.urls import reverse
 from employees.models import Employee
+from .managers import NotificationManager, OutboxMessageManager
 
 
 NOTIFICATION_CHOICES = (
@@ -9,6 +11,12 @@ NOTIFICATION_CHOICES = (
 	('O', 'Overtime')
 )
 
+OUTBOX_STATUS = (
+	('F', 'Failed'),
+	('P', 'Pending'),
+	('S', 'Sent'),
+)
+
 ID_LENGTH = settings.LEAVE_ID_MAX_LENGTH
 
 class Notification(models.Model):
@@ -20,8 +28,50 @@ class Notification(models.Model):
 	read = models.BooleanField(default=False)
 	date_sent = models.DateTimeField(auto_now_add=True)
 
+	objects = NotificationManager()
+
+	class Meta:
+		indexes = [
+			# The notifications of a leave or an overtime
+			models.Index(fields=["_type", "message_id"]),
+			# The notifications and the unread count of an employee
+			models.Index(fields=["recipient", "read", "date_sent"]),
+		]
+
 	def __str__(self):
 		return "from %s to %s" % (self.sender.user.email, self.recipient.user.email)
 
 	def get_absolute_url(self):
-		return reverse('notification-detail', kwargs={"id": self.id})
\ No newline at end of file
+		return reverse('notification-detail', kwargs={"id": self.id})
+
+
+class OutboxMessage(models.Model):
+	"""
+	An e-mail saved in the transaction that triggered it and sent after the
+	commit by dispatch_outbox_task.
+	"""
+	subject = models.TextField()
+	body = models.TextField()
+	from_email = models.CharField(max_length=255, blank=True, null=True)
+	to = models.JSONField(default=list)
+	status = models.CharField(max_length=1, choices=OUTBOX_STATUS, default="P")
+	attempts = models.PositiveIntegerField(default=0)
+	error = models.TextField(blank=True, null=True)
+	date_created = models.DateTimeField(auto_now_add=True)
+	date_sent = models.DateTimeField(blank=True, null=True)
+	# Set while a worker is sending the message, see OutboxMessageManager.claim
+	locked_until = models.DateTimeField(blank=True, null=True)
+	# Set when the message failed, it is not tried again before then
+	next_attempt_at = models.DateTimeField(blank=True, null=True)
+
+	objects = OutboxMessageManager()
+
+	class Meta:
+		indexes = [models.Index(fields=["status", "date_created"])]
+
+	def __str__(self):
+		return "%s to %s" % (self.subject, ", ".join(self.to))
+
+	def get_email(self, connection=None):
+		return EmailMessage(self.subject, self.body,
+			self.from_email or settings.DEFAULT_FROM_EMAIL, self.to, connection=connection)
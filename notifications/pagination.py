@@ -2,14 +2,17 @@ from collections import OrderedDict
 from rest_framework.response import Response
 
 from core.pagination import CustomLimitOffsetPagination
+from .cache import get_unread_count
 
 
 class NotificationPagination(CustomLimitOffsetPagination):
+	cursor_ordering = ("-date_sent", "-pk")
+
 	def get_paginated_response(self, data, queryset):
 		return Response(OrderedDict([
 			('count', self.count),
 			('next', self.get_next_link()),
 			('previous', self.get_previous_link()),
 			('results', data),
-			('unread_count', queryset.filter(read=False).count())
+			('unread_count', get_unread_count(self.request.user.employee.pk))
 		]))
\ No newline at end of file
@@ -0,0 +1,41 @@
+import logging
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .broker import get_broker, get_channel
+from .cache import invalidate_unread_count, update_unread_count
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Notification)
+def count_unread_notification(sender, instance, created, **kwargs):
+	if instance.recipient_id is None:
+		return
+	if created and not instance.read:
+		transaction.on_commit(lambda: update_unread_count(instance.recipient_id, 1))
+	elif not created:
+		# The notification may have been read or unread
+		transaction.on_commit(lambda: invalidate_unread_count(instance.recipient_id))
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_unread_notification(sender, instance, **kwargs):
+	if instance.recipient_id is not None and not instance.read:
+		transaction.on_commit(lambda: update_unread_count(instance.recipient_id, -1))
+
+
+@receiver(post_save, sender=Notification)
+def publish_notification(sender, instance, created, **kwargs):
+	# Sent to the recipient's open streams, see notifications.streams
+	if created and instance.recipient_id is not None:
+		transaction.on_commit(lambda: publish(instance))
+
+
+def publish(instance):
+	try:
+		get_broker().publish(get_channel(instance.recipient_id), {"id": instance.pk})
+	except Exception:
+		logger.exception(f"Could not publish notification {instance.pk}")
@@ -0,0 +1,123 @@
+import asyncio
+import io
+import json
+from importlib import import_module
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.core.handlers.asgi import ASGIRequest
+
+from employees.models import Employee
+from .broker import get_broker, get_channel
+from .models import Notification
+from .serializers import NotificationSerializer
+
+STREAM_PATH = "/api/notifications/stream/"
+
+
+@sync_to_async
+def get_employee_id(request):
+	# The employee logged in with the session cookie, as CustomSessionAuthentication
+	engine = import_module(settings.SESSION_ENGINE)
+	request.session = engine.SessionStore(request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+	user = get_user(request)
+	if not user.is_authenticated or not user.is_active:
+		return None
+	return Employee.objects.filter(user=user).values_list("pk", flat=True).first()
+
+
+@sync_to_async
+def get_notifications(employee_id, ids=None, after=None):
+	queryset = Notification.objects.filter(recipient_id=employee_id).select_related(
+		"sender__user__profile", "sender__job", "recipient__user__profile", "recipient__job")
+	if ids is not None:
+		queryset = queryset.filter(pk__in=ids)
+	if after is not None:
+		queryset = queryset.filter(pk__gt=after)
+	return NotificationSerializer(queryset.order_by("pk"), many=True).data
+
+
+def get_last_event_id(request):
+	# Sent by EventSource when it reconnects, or given on the first connection
+	value = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+	try:
+		return int(value) if value else None
+	except ValueError:
+		return None
+
+
+def format_event(notification):
+	return (f"id: {notification['id']}\nevent: notification\n"
+		f"data: {json.dumps(notification, default=str)}\n\n").encode("utf-8")
+
+
+class NotificationStream:
+	"""
+	ASGI application streaming the notifications created for the logged in
+	employee as Server-Sent Events, mounted on STREAM_PATH by HRMS.asgi.
+
+	The id of an event is the id of the notification so a client reconnecting
+	with a Last-Event-ID first gets the notifications it missed. A comment is
+	sent every NOTIFICATION_STREAM_HEARTBEAT seconds to keep the connection open.
+	"""
+
+	async def __call__(self, scope, receive, send):
+		request = ASGIRequest(scope, io.BytesIO())
+		employee_id = await get_employee_id(request)
+		if employee_id is None:
+			await send({"type": "http.response.start", "status": 401,
+				"headers": [(b"content-type", b"application/json")]})
+			await send({"type": "http.response.body",
+				"body": b'{"detail": "Authentication credentials were not provided."}'})
+			return
+
+		await send({"type": "http.response.start", "status": 200, "headers": [
+			(b"content-type", b"text/event-stream"),
+			(b"cache-control", b"no-cache"),
+			(b"x-accel-buffering", b"no"),
+		]})
+		await send({"type": "http.response.body", "more_body": True,
+			"body": f"retry: {settings.NOTIFICATION_STREAM_RETRY}\n\n".encode("utf-8")})
+
+		# Subscribe before reading the missed notifications so that none is lost
+		subscription = await get_broker().subscribe(get_channel(employee_id))
+		disconnected = asyncio.ensure_future(self.wait_for_disconnect(receive))
+		try:
+			last_id = get_last_event_id(request)
+			if last_id is not None:
+				last_id = await self.send_notifications(send, employee_id, last_id, after=last_id)
+			await self.stream(send, subscription, disconnected, employee_id, last_id)
+		finally:
+			disconnected.cancel()
+			await subscription.close()
+
+	async def stream(self, send, subscription, disconnected, employee_id, last_id):
+		message = None
+		while not disconnected.done():
+			if message is None:
+				message = asyncio.ensure_future(subscription.get())
+			done, _ = await asyncio.wait({message, disconnected},
+				timeout=settings.NOTIFICATION_STREAM_HEARTBEAT, return_when=asyncio.FIRST_COMPLETED)
+			if disconnected in done:
+				break
+			elif message in done:
+				notification_id = message.result()["id"]
+				message = None
+				if last_id is None or notification_id > last_id:
+					last_id = await self.send_notifications(send, employee_id, last_id, ids=[notification_id])
+			else:
+				await send({"type": "http.response.body", "body": b": heartbeat\n\n", "more_body": True})
+		if message is not None:
+			message.cancel()
+
+	async def send_notifications(self, send, employee_id, last_id, **filters):
+		for notification in await get_notifications(employee_id, **filters):
+			await send({"type": "http.response.body", "body": format_event(notification), "more_body": True})
+			last_id = notification["id"]
+		return last_id
+
+	async def wait_for_disconnect(self, receive):
+		while True:
+			message = await receive()
+			if message["type"] == "http.disconnect":
+				return
@@ -0,0 +1,51 @@
+import math
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
+
+from .models import Notification, OutboxMessage
+
+logger = get_task_logger(__name__)
+
+DISPATCH_SCHEDULED_KEY = "notifications:outbox-dispatch-scheduled"
+
+
+def schedule_dispatch():
+	# Schedules a single dispatch_outbox_task for the e-mails queued in the
+	# next OUTBOX_BATCH_DELAY seconds so that they share a connection
+	timeout = settings.OUTBOX_BATCH_DELAY + settings.OUTBOX_RETRY_DELAY
+	if cache.add(DISPATCH_SCHEDULED_KEY, True, timeout=timeout):
+		try:
+			dispatch_outbox_task.apply_async(countdown=settings.OUTBOX_BATCH_DELAY)
+		except Exception:
+			# The messages are committed, they are sent by the next scheduled
+			# task or by the periodic dispatch of CELERY_BEAT_SCHEDULE
+			logger.exception("Could not schedule the dispatch of the outbox")
+			cache.delete(DISPATCH_SCHEDULED_KEY)
+
+
+@shared_task
+def dispatch_outbox_task():
+	# E-mails queued from now on need another task
+	cache.delete(DISPATCH_SCHEDULED_KEY)
+	sent, failed = OutboxMessage.objects.dispatch()
+	logger.info(f"Sent {sent} e-mails, {failed} failed")
+	if OutboxMessage.objects.due().exists():
+		# Send the rest of a burst larger than OUTBOX_BATCH_SIZE
+		dispatch_outbox_task.apply_async(countdown=settings.OUTBOX_BATCH_DELAY)
+	elif failed:
+		# Retry the failed messages once the first of them is due
+		next_attempt_at = OutboxMessage.objects.get_next_attempt()
+		if next_attempt_at is not None:
+			countdown = max(math.ceil((next_attempt_at - now()).total_seconds()), 0)
+			dispatch_outbox_task.apply_async(countdown=countdown)
+	return sent, failed
+
+
+@shared_task
+def purge_notifications_task():
+	deleted = Notification.objects.purge()
+	logger.info(f"Deleted {deleted} read notifications")
+	return deleted
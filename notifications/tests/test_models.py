@@ -1,5 +1,17 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from notifications.models import Notification
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils.timezone import now
+from HRMS.celery import app
+from notifications.cache import get_unread_count
+from notifications.models import Notification, OutboxMessage
+from notifications.tasks import DISPATCH_SCHEDULED_KEY, dispatch_outbox_task, schedule_dispatch
 
 from .test_setup import TestSetUp
 
@@ -17,4 +29,109 @@ class NotificationTests(TestSetUp):
 		self.assertEqual(notification.sender, self.employee2)
 		self.assertEqual(notification.recipient, self.employee)
 		self.assertEqual(notification._type, "L")
-		self.assertFalse(notification.read)
\ No newline at end of file
+		self.assertFalse(notification.read)
+
+	def test_bulk_delete_notifications(self):
+		for message_id in ("lve0001", "lve0001", "lve0002"):
+			Notification.objects.create(_type="L", sender=self.employee2, recipient=self.employee,
+				message="This is test message", message_id=message_id)
+		self.assertEqual(get_unread_count(self.employee.pk), 3)
+
+		with self.captureOnCommitCallbacks(execute=True):
+			with self.assertNumQueries(2):
+				deleted = Notification.objects.filter(_type="L", message_id="lve0001").bulk_delete()
+		self.assertEqual(deleted, 2)
+		self.assertEqual(get_unread_count(self.employee.pk), 1)
+
+	def test_purge_read_notifications(self):
+		notifications = [Notification.objects.create(_type="L", sender=self.employee2, recipient=self.employee,
+			message="This is test message", message_id=f"lve000{i}", read=i % 2 == 0) for i in range(5)]
+		old = [note.id for note in notifications[:4]]
+		Notification.objects.filter(id__in=old).update(date_sent=now() - timedelta(days=91))
+
+		self.assertEqual(Notification.objects.purge(days=90, chunk_size=1), 2)
+		self.assertEqual(sorted(Notification.objects.values_list("message_id", flat=True)),
+			["lve0001", "lve0003", "lve0004"])
+
+		Notification.objects.filter(id__in=old).update(read=True)
+		out = StringIO()
+		call_command("purge_notifications", "--days=90", stdout=out)
+		self.assertIn("Deleted 2 read notifications", out.getvalue())
+		self.assertEqual(list(Notification.objects.values_list("message_id", flat=True)), ["lve0004"])
+
+
+""" Outbox Message Model Tests """
+class OutboxMessageTests(TestSetUp):
+	@override_settings(OUTBOX_MAX_ATTEMPTS=2)
+	def test_dispatch_outbox_messages(self):
+		message1 = OutboxMessage.objects.queue("Subject 1", "Body", None, "employee@example.com")
+		message2 = OutboxMessage.objects.queue("Subject 2", "Body", None, ["employee2@example.com"])
+
+		with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages",
+				side_effect=OSError("Connection refused")):
+			self.assertEqual(OutboxMessage.objects.dispatch(), (0, 2))
+			# Not tried again before their next attempt
+			self.assertEqual(OutboxMessage.objects.dispatch(), (0, 0))
+			OutboxMessage.objects.update(next_attempt_at=now())
+			self.assertEqual(OutboxMessage.objects.dispatch(batch_size=1), (0, 1))
+		message1.refresh_from_db()
+		message2.refresh_from_db()
+		self.assertEqual((message1.status, message1.attempts), ("F", 2))
+		self.assertEqual((message2.status, message2.attempts), ("P", 1))
+		self.assertEqual(message2.error, "Connection refused")
+		# Twice OUTBOX_RETRY_DELAY after the second attempt
+		self.assertGreater(message1.next_attempt_at, now() + timedelta(seconds=settings.OUTBOX_RETRY_DELAY))
+
+		OutboxMessage.objects.update(next_attempt_at=now())
+		self.assertEqual(OutboxMessage.objects.dispatch(), (1, 0))
+		message2.refresh_from_db()
+		self.assertEqual(message2.status, "S")
+		self.assertIsNotNone(message2.date_sent)
+		self.assertEqual(len(mail.outbox), 1)
+		self.assertEqual(mail.outbox[0].to, ["employee2@example.com"])
+
+	def test_dispatch_outbox_messages_over_one_connection(self):
+		task_always_eager = app.conf.task_always_eager
+		app.conf.task_always_eager = True
+		self.addCleanup(setattr, app.conf, "task_always_eager", task_always_eager)
+
+		with mock.patch("notifications.managers.get_connection", wraps=mail.get_connection) as get_connection:
+			with self.captureOnCommitCallbacks(execute=True):
+				for i in range(3):
+					OutboxMessage.objects.queue(f"Subject {i}", "Body", None, "employee@example.com")
+
+		self.assertEqual(get_connection.call_count, 1)
+		self.assertEqual(len(mail.outbox), 3)
+		self.assertFalse(OutboxMessage.objects.filter(status="P").exists())
+
+	def test_dispatch_outbox_messages_when_connection_fails(self):
+		message = OutboxMessage.objects.queue("Subject", "Body", None, "employee@example.com")
+
+		with mock.patch("django.core.mail.backends.locmem.EmailBackend.open",
+				side_effect=OSError("Connection refused")):
+			with mock.patch("notifications.tasks.dispatch_outbox_task.apply_async") as apply_async:
+				self.assertEqual(dispatch_outbox_task(), (0, 1))
+		apply_async.assert_called_once_with(countdown=settings.OUTBOX_RETRY_DELAY)
+		message.refresh_from_db()
+		self.assertEqual((message.status, message.attempts), ("P", 1))
+		self.assertEqual(message.error, "Connection refused")
+		self.assertIsNone(message.locked_until)
+
+		# A message claimed by another worker is skipped until its lease expires
+		OutboxMessage.objects.filter(pk=message.pk).update(locked_until=now() + timedelta(minutes=1))
+		self.assertEqual(OutboxMessage.objects.dispatch(), (0, 0))
+		OutboxMessage.objects.filter(pk=message.pk).update(locked_until=now() - timedelta(minutes=1))
+		self.assertEqual(OutboxMessage.objects.dispatch(), (0, 0))
+		OutboxMessage.objects.filter(pk=message.pk).update(next_attempt_at=now())
+		self.assertEqual(OutboxMessage.objects.dispatch(), (1, 0))
+
+	def test_schedule_dispatch_when_broker_is_down(self):
+		cache.delete(DISPATCH_SCHEDULED_KEY)
+		self.addCleanup(cache.delete, DISPATCH_SCHEDULED_KEY)
+		with mock.patch("notifications.tasks.dispatch_outbox_task.apply_async",
+				side_effect=OSError("Connection refused")):
+			with self.assertLogs("notifications.tasks", level="ERROR"):
+				with self.captureOnCommitCallbacks(execute=True):
+					message = OutboxMessage.objects.queue("Subject", "Body", None, "employee@example.com")
+		self.assertIsNone(cache.get(DISPATCH_SCHEDULED_KEY))
+		self.assertEqual(OutboxMessage.objects.get(pk=message.pk).status, "P")
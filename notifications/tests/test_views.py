@@ -1,6 +1,19 @@
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITransactionTestCase
+
+from employees.models import Employee
 from notifications.models import Notification
+from notifications.streams import STREAM_PATH, NotificationStream
 from .test_setup import TestSetUp
 
+User = get_user_model()
+
 
 """ Notification List View Tests """
 class NotificationListViewTests(TestSetUp):
@@ -26,4 +39,120 @@ class NotificationListViewTests(TestSetUp):
 		self.assertEqual(len(response2.data['results']), 50)
 
 
+""" Notification Unread Count View Tests """
+class NotificationUnreadCountViewTests(TestSetUp):
+	def setUp(self):
+		cache.clear()
+		return super().setUp()
+
+	def test_unread_count(self):
+		url = reverse("notifications-unread-count")
+		self.client.post(self.login_url, {
+			"email": self.employee.user.email, "password": "Passing1234"})
+		response1 = self.client.get(url)
+		with self.captureOnCommitCallbacks(execute=True):
+			notes = [Notification.objects.create(_type="L", sender=self.employee2,
+				recipient=self.employee, message=f"This is test message {i}", message_id=i) for i in range(3)]
+		response2 = self.client.get(url)
+		with self.captureOnCommitCallbacks(execute=True):
+			response3 = self.client.post(reverse("notifications-read"), {"ids": [notes[0].id]}, format="json")
+		response4 = self.client.get(self.notifications_url)
+		with self.captureOnCommitCallbacks(execute=True):
+			notes[1].delete()
+		response5 = self.client.get(url)
+		response6 = self.client.post(reverse("notifications-read"), {"ids": "all"}, format="json")
+
+		self.assertEqual(response1.data["unread_count"], 0)
+		self.assertEqual(response2.data["unread_count"], 3)
+		self.assertEqual(response3.data["updated_count"], 1)
+		self.assertEqual(response4.data["unread_count"], 2)
+		self.assertEqual(response5.data["unread_count"], 1)
+		self.assertEqual(response6.status_code, 400)
+
+	def test_unread_count_with_shared_cache(self):
+		url = reverse("notifications-unread-count")
+		self.client.post(self.login_url, {
+			"email": self.employee.user.email, "password": "Passing1234"})
+		Notification.objects.bulk_create([Notification(_type="L", sender=self.employee2,
+			recipient=self.employee, message="This is test message", message_id=i) for i in range(2)])
+		# Created without the signals, e.g. by another process with a local cache
+		response1 = self.client.get(url)
+		with mock.patch("notifications.cache.is_cache_shared", return_value=True):
+			response2 = self.client.get(url)
+			Notification.objects.filter(recipient=self.employee).update(read=True)
+			response3 = self.client.get(url)
+		response4 = self.client.get(url)
+
+		self.assertEqual(response1.data["unread_count"], 2)
+		self.assertEqual(response2.data["unread_count"], 2)
+		self.assertEqual(response3.data["unread_count"], 2)
+		self.assertEqual(response4.data["unread_count"], 0)
+
+
+""" Notification Stream Tests """
+@override_settings(NOTIFICATION_BROKER="notifications.broker.InMemoryBroker", NOTIFICATION_STREAM_HEARTBEAT=0.2)
+class NotificationStreamTests(APITransactionTestCase):
+	# The stream reads the database from another thread, which only sees committed rows
+
+	def setUp(self):
+		self.user1 = User.objects.create(email="employee@example.com")
+		self.user1.set_password("Passing1234")
+		self.user1.save()
+		self.user2 = User.objects.create(email="employee2@example.com")
+
+		self.employee = Employee.objects.create(user=self.user1)
+		self.employee2 = Employee.objects.create(user=self.user2)
+		return super().setUp()
+
+	def get_scope(self, headers=()):
+		return {"type": "http", "method": "GET", "path": STREAM_PATH, "query_string": b"",
+			"headers": [(key.encode(), value.encode()) for key, value in headers]}
+
+	def create_notification(self, message_id):
+		return Notification.objects.create(_type="L", sender=self.employee2,
+			recipient=self.employee, message="This is test message", message_id=message_id)
+
+	async def read_events(self, communicator, count):
+		body = b""
+		while body.count(b"\n\n") < count:
+			output = await communicator.receive_output(timeout=2)
+			body += output.get("body", b"")
+		return body.decode("utf-8")
+
+	async def stream(self, note1):
+		communicator = ApplicationCommunicator(NotificationStream(), self.get_scope([
+			("cookie", f"sessionid={self.client.cookies['sessionid'].value}"),
+			("last-event-id", str(note1.id - 1))]))
+		await communicator.send_input({"type": "http.request"})
+		start = await communicator.receive_output(timeout=2)
+		# The retry interval and the notification missed before reconnecting
+		body1 = await self.read_events(communicator, 2)
+		note2 = await sync_to_async(self.create_notification)("lve0002")
+		body2 = await self.read_events(communicator, 1)
+		body3 = await self.read_events(communicator, 1)
+		await communicator.send_input({"type": "http.disconnect"})
+		await communicator.wait(timeout=2)
+		return start, body1, note2, body2, body3
+
+	async def stream_unauthenticated(self):
+		communicator = ApplicationCommunicator(NotificationStream(), self.get_scope())
+		await communicator.send_input({"type": "http.request"})
+		start = await communicator.receive_output(timeout=2)
+		await communicator.wait(timeout=2)
+		return start
+
+	def test_stream_notifications(self):
+		note1 = self.create_notification("lve0001")
+		self.client.login(email=self.employee.user.email, password="Passing1234")
+
+		start, body1, note2, body2, body3 = async_to_sync(self.stream)(note1)
+		start2 = async_to_sync(self.stream_unauthenticated)()
 
+		self.assertEqual(start["status"], 200)
+		self.assertIn((b"content-type", b"text/event-stream"), start["headers"])
+		self.assertTrue(body1.startswith("retry: "))
+		self.assertIn(f"id: {note1.id}\nevent: notification\ndata: ", body1)
+		self.assertIn('"message_id": "lve0001"', body1)
+		self.assertTrue(body2.startswith(f"id: {note2.id}\n"))
+		self.assertEqual(body3, ": heartbeat\n\n")
+		self.assertEqual(start2["status"], 401)
@@ -1,9 +1,14 @@
 from django.urls import path
 
-from .views import NotificationListView, NotificationDetailView
+from .views import (
+	NotificationListView, NotificationDetailView, NotificationReadView, NotificationUnreadCountView
+)
 
 urlpatterns = [
 	path('api/notifications/', NotificationListView.as_view(), name='notifications'),
+	path('api/notifications/read/', NotificationReadView.as_view(), name='notifications-read'),
+	path('api/notifications/unread-count/',
+		NotificationUnreadCountView.as_view(), name='notifications-unread-count'),
 	path('api/notifications/<int:id>/', 
 		NotificationDetailView.as_view(), name='notification-detail'),
-]
\ No newline at end of file
+]
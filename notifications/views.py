@@ -1,6 +1,11 @@
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from core.views import ListView
+from employees.permissions import IsEmployee
+from .cache import get_unread_count
 from .models import Notification
 from .pagination import NotificationPagination
 from .serializers import NotificationSerializer
@@ -21,3 +26,26 @@ class NotificationDetailView(generics.DestroyAPIView):
 	
 	def get_queryset(self):
 		return Notification.objects.filter(recipient=self.request.user.employee)
+
+
+class NotificationReadView(APIView):
+	"""
+	Marks the notifications with the "ids" read, or all of them if no ids are given.
+	"""
+	permission_classes = (IsEmployee, )
+
+	def post(self, request, *args, **kwargs):
+		queryset = Notification.objects.filter(recipient=request.user.employee)
+		ids = request.data.get("ids", None)
+		if ids is not None:
+			if not isinstance(ids, list) or not all(isinstance(id, int) for id in ids):
+				raise ValidationError({"detail": "ids must be a list of notification ids"})
+			queryset = queryset.filter(id__in=ids)
+		return Response({"updated_count": queryset.mark_read()})
+
+
+class NotificationUnreadCountView(APIView):
+	permission_classes = (IsEmployee, )
+
+	def get(self, request, *args, **kwargs):
+		return Response({"unread_count": get_unread_count(request.user.employee.pk)})
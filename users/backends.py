@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+User = get_user_model()
+
+
+class UserModelBackend(ModelBackend):
+    """
+    Loads the session user together with its employee and client
+    so that the user's is_employee, is_client and is_staff do not
+    query the database again for every request.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = User._default_manager.select_related(
+                'employee', 'client').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
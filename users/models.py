@@ -1,5 +1,5 @@
-from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.utils.timezone import now
@@ -50,38 +50,25 @@ class User(AbstractBaseUser, PermissionsMixin):
     def is_staff(self):
         if self.is_admin is True:
             return True
-        try:
-            user = get_user_model().objects.get(email=self.email)
-            if user.employee:
-                employee = user.employee
-                if (employee.is_md is True) or (employee.is_hr is True) or (
-                    employee.is_hod is True) or (employee.is_supervisor is True):
-                    return True
-        except:
-            pass
+        if self.is_employee:
+            return self.employee.role.is_staff
         return False
 
     @property
     def is_employee(self):
-    	try:
-    		user = get_user_model().objects.get(email=self.email)
-    		if user.employee:
-    			return True
-    		return False
-    	except:
-    		pass
-    	return False
+        # The reverse one-to-one is cached on the instance (including a
+        # missing employee) and is loaded with the user by UserModelBackend
+        try:
+            return self.employee is not None
+        except ObjectDoesNotExist:
+            return False
 
     @property
     def is_client(self):
-    	try:
-    		user = get_user_model().objects.get(email=self.email)
-    		if user.client:
-    			return True
-    		return False
-    	except:
-    		pass
-    	return False
+        try:
+            return self.client is not None
+        except ObjectDoesNotExist:
+            return False
 
 
 class Profile(models.Model):
@@ -3,6 +3,8 @@ from django.db import IntegrityError
 from django.test import TestCase
 
 from common.utils import get_instance
+from employees.models import Client, Employee
+from users.backends import UserModelBackend
 from users.models import Profile
 
 User = get_user_model()
@@ -61,3 +63,25 @@ class UsersManagersTests(TestCase):
 			User.objects.create_superuser(email='', password="foo")
 		with self.assertRaises(IntegrityError):
 			User.objects.create_superuser('super2@user.com', 'foo')
+
+	def test_user_flags_from_backend(self):
+		user = User.objects.create_user(email='employee@user.com', password='foo')
+		user2 = User.objects.create_user(email='client@user.com', password='foo')
+		Employee.objects.create(user=user, is_hr=True)
+		Client.objects.create(contact=user2, company="company", position="ceo")
+
+		backend = UserModelBackend()
+		with self.assertNumQueries(1):
+			user = backend.get_user(user.pk)
+		with self.assertNumQueries(1):
+			user2 = backend.get_user(user2.pk)
+		with self.assertNumQueries(0):
+			self.assertTrue(user.is_employee)
+			self.assertFalse(user.is_client)
+			self.assertFalse(user2.is_employee)
+			self.assertTrue(user2.is_client)
+			self.assertFalse(user2.is_staff)
+		# Only the hod and supervisor roles are looked up, once
+		with self.assertNumQueries(1):
+			self.assertTrue(user.is_staff)
+			self.assertTrue(user.is_staff)